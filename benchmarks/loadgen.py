@@ -0,0 +1,454 @@
+"""
+Mixed-workload load generator for the user-management (Flask) and test-reports (FastAPI) services.
+
+Each worker thread keeps one persistent HTTP connection per service and picks operations
+from a weighted mix. Per-operation throughput, error counts and p50/p95/p99 latency are
+written as JSON; --baseline compares the run against an earlier result file.
+
+    python benchmarks/loadgen.py --users-url http://127.0.0.1:5001 --reports-url http://127.0.0.1:8000 \\
+        --duration 30 --concurrency 16 --output results.json
+"""
+import argparse
+import http.client
+import json
+import random
+import struct
+import sys
+import threading
+import time
+import uuid
+import zlib
+from urllib.parse import urlencode, urlsplit
+
+DEFAULT_USER_MIX = {
+    'users.list': 40,
+    'users.get': 30,
+    'users.search': 15,
+    'users.create': 10,
+    'users.update': 15,
+    'users.delete': 5,
+}
+DEFAULT_REPORT_MIX = {
+    'reports.list': 50,
+    'reports.upload': 20,
+    'reports.status': 30,
+}
+# Typeahead queries: prefixes of seeded names, usernames and phone numbers
+USER_SEARCH_QUERIES = ['a', 'am', 'amin', 'garc', 'garcia', 'jonas k', 'tara sil', 'priya.k', '555', '+1555000']
+USER_LIST_COLUMNS = ['firstName', 'lastName', 'username', 'email', 'phone', 'gender', 'status', 'id']
+REPORT_STATUSES = ['open', 'in_progress', 'resolved']
+ID_SAMPLE_PAGES = 5
+ID_SAMPLE_PAGE_SIZE = 200
+
+
+def tiny_png(width=64, height=64, colour=(0x30, 0x60, 0x90)):
+    """Builds a valid solid-colour PNG so uploads exercise the real multipart path."""
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+    raw = b''.join(b'\x00' + bytes(colour) * width for _ in range(height))
+    return (b'\x89PNG\r\n\x1a\n'
+            + chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0))
+            + chunk(b'IDAT', zlib.compress(raw))
+            + chunk(b'IEND', b''))
+
+
+def multipart_body(fields, file_field, filename, content, content_type='image/png'):
+    boundary = uuid.uuid4().hex
+    parts = []
+    for name, value in fields.items():
+        parts.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    parts.append((f'--{boundary}\r\nContent-Disposition: form-data; name="{file_field}"; filename="{filename}"\r\n'
+                  f'Content-Type: {content_type}\r\n\r\n').encode() + content + b'\r\n')
+    parts.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(parts), f'multipart/form-data; boundary={boundary}'
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class Connection:
+    """A keep-alive HTTP connection that reconnects after the server closes it."""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port or 80
+        self.timeout = timeout
+        self._conn = None
+
+    def request(self, method, path, body=None, headers=None):
+        """Returns (status, body bytes)."""
+        for attempt in range(2):
+            if self._conn is None:
+                self._conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+            try:
+                self._conn.request(method, path, body=body, headers=headers or {})
+                response = self._conn.getresponse()
+                return response.status, response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                self.close()
+                if attempt:
+                    raise
+        raise RuntimeError('unreachable')
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class IdPool:
+    """Thread-safe pool of known document ids; created ids are added, deleted ones removed."""
+
+    def __init__(self, ids, rng):
+        self._ids = list(ids)
+        self._lock = threading.Lock()
+        self._rng = rng
+
+    def __len__(self):
+        return len(self._ids)
+
+    def pick(self):
+        with self._lock:
+            return self._rng.choice(self._ids) if self._ids else None
+
+    def add(self, doc_id):
+        with self._lock:
+            self._ids.append(doc_id)
+
+    def take(self):
+        with self._lock:
+            if not self._ids:
+                return None
+            index = self._rng.randrange(len(self._ids))
+            self._ids[index], self._ids[-1] = self._ids[-1], self._ids[index]
+            return self._ids.pop()
+
+
+class Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+        self.statuses = {}
+
+    def record(self, op, elapsed_ms, status):
+        with self._lock:
+            self.latencies.setdefault(op, []).append(elapsed_ms)
+            codes = self.statuses.setdefault(op, {})
+            codes[str(status)] = codes.get(str(status), 0) + 1
+            if not isinstance(status, int) or status >= 400:
+                self.errors[op] = self.errors.get(op, 0) + 1
+
+    def summary(self, duration):
+        operations = {}
+        for op, values in sorted(self.latencies.items()):
+            values = sorted(values)
+            operations[op] = {
+                'count': len(values),
+                'errors': self.errors.get(op, 0),
+                'throughput_rps': round(len(values) / duration, 2),
+                'p50_ms': round(percentile(values, 0.50), 2),
+                'p95_ms': round(percentile(values, 0.95), 2),
+                'p99_ms': round(percentile(values, 0.99), 2),
+                'max_ms': round(values[-1], 2),
+                'statuses': self.statuses.get(op, {}),
+            }
+        total = sum(op['count'] for op in operations.values())
+        return {
+            'total_requests': total,
+            'total_errors': sum(op['errors'] for op in operations.values()),
+            'throughput_rps': round(total / duration, 2),
+            'operations': operations,
+        }
+
+
+class Workload:
+    def __init__(self, users_url, reports_url, user_ids, report_ids, timeout, rng):
+        self.users_url = users_url
+        self.reports_url = reports_url
+        self.user_ids = user_ids
+        self.report_ids = report_ids
+        self.timeout = timeout
+        self.rng = rng
+
+    def connections(self):
+        return {
+            'users': Connection(self.users_url, self.timeout) if self.users_url else None,
+            'reports': Connection(self.reports_url, self.timeout) if self.reports_url else None,
+        }
+
+    def run(self, op, conns, rng):
+        handler = getattr(self, 'op_' + op.replace('.', '_'))
+        return handler(conns['users'] if op.startswith('users.') else conns['reports'], rng)
+
+    def op_users_list(self, conn, rng):
+        params = {
+            'draw': 1,
+            'start': rng.choice([0, 0, 0, 10, 50, 200]),
+            'length': 10,
+            'order[0][column]': rng.randrange(len(USER_LIST_COLUMNS) - 1),
+            'order[0][dir]': rng.choice(['asc', 'desc']),
+        }
+        for index, name in enumerate(USER_LIST_COLUMNS):
+            params[f'columns[{index}][data]'] = name
+        if rng.random() < 0.2:
+            params['search[value]'] = rng.choice(['amina', 'garcia', 'tester', 'example.com'])
+        status, _ = conn.request('GET', '/api/users?' + urlencode(params))
+        return status
+
+    def op_users_get(self, conn, rng):
+        user_id = self.user_ids.pick()
+        if user_id is None:
+            return 'skipped'
+        status, _ = conn.request('GET', f'/api/users/{user_id}')
+        return status
+
+    def op_users_search(self, conn, rng):
+        params = {'q': rng.choice(USER_SEARCH_QUERIES), 'limit': 10}
+        status, _ = conn.request('GET', '/api/users/search?' + urlencode(params))
+        return status
+
+    def op_users_create(self, conn, rng):
+        suffix = uuid.uuid4().hex[:12]
+        payload = {
+            'firstName': 'Bench',
+            'lastName': 'User',
+            'username': f'bench.{suffix}',
+            'email': f'bench.{suffix}@example.com',
+            'phone': '+15550000000',
+            'gender': 'Other',
+            'status': 'active',
+            'dateOfBirth': '1990-01-01',
+        }
+        status, body = conn.request('POST', '/api/users?return=minimal', body=json.dumps(payload),
+                                    headers={'Content-Type': 'application/json'})
+        if status in (200, 201):
+            self.user_ids.add(json.loads(body)['id'])
+        return status
+
+    def op_users_update(self, conn, rng):
+        user_id = self.user_ids.pick()
+        if user_id is None:
+            return 'skipped'
+        payload = {'status': rng.choice(['active', 'inactive']), 'phone': f'+1555{rng.randrange(10**7):07d}'}
+        status, _ = conn.request('PUT', f'/api/users/{user_id}?return=minimal', body=json.dumps(payload),
+                                 headers={'Content-Type': 'application/json'})
+        return status
+
+    def op_users_delete(self, conn, rng):
+        user_id = self.user_ids.take()
+        if user_id is None:
+            return 'skipped'
+        status, _ = conn.request('DELETE', f'/api/users/{user_id}')
+        return status
+
+    def op_reports_list(self, conn, rng):
+        params = {'page_size': rng.choice([20, 50, 100]), 'order_by': rng.choice(['_id', 'created_at'])}
+        status, _ = conn.request('GET', '/reports?' + urlencode(params))
+        return status
+
+    def op_reports_upload(self, conn, rng):
+        body, content_type = multipart_body(
+            {'description': 'Benchmark upload', 'tester_name': f'tester{rng.randrange(50)}'},
+            # A random colour per upload, so the service's content deduplication does not kick in
+            'file', 'screenshot.png', tiny_png(colour=(rng.randrange(256), rng.randrange(256), rng.randrange(256))),
+        )
+        status, response = conn.request('POST', '/reports?return=minimal', body=body,
+                                         headers={'Content-Type': content_type})
+        if status == 200:
+            self.report_ids.add(json.loads(response)['id'])
+        return status
+
+    def op_reports_status(self, conn, rng):
+        report_id = self.report_ids.pick()
+        if report_id is None:
+            return 'skipped'
+        query = urlencode({'status': rng.choice(REPORT_STATUSES), 'return': 'minimal'})
+        status, _ = conn.request('PUT', f'/reports/{report_id}/status?{query}')
+        return status
+
+
+def sample_user_ids(users_url, timeout):
+    conn = Connection(users_url, timeout)
+    ids, cursor = [], None
+    try:
+        for _ in range(ID_SAMPLE_PAGES):
+            query = {'page_size': ID_SAMPLE_PAGE_SIZE}
+            if cursor:
+                query['cursor'] = cursor
+            status, body = conn.request('GET', '/api/users?' + urlencode(query))
+            if status != 200:
+                raise RuntimeError(f'Listing users failed with HTTP {status}: {body[:200]!r}')
+            page = json.loads(body)
+            ids.extend(user['id'] for user in page['data'])
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+    finally:
+        conn.close()
+    return ids
+
+
+def sample_report_ids(reports_url, timeout):
+    conn = Connection(reports_url, timeout)
+    ids, cursor = [], None
+    try:
+        for _ in range(ID_SAMPLE_PAGES):
+            query = {'page_size': ID_SAMPLE_PAGE_SIZE}
+            if cursor:
+                query['cursor'] = cursor
+            status, body = conn.request('GET', '/reports?' + urlencode(query))
+            if status != 200:
+                raise RuntimeError(f'Listing reports failed with HTTP {status}: {body[:200]!r}')
+            page = json.loads(body)
+            ids.extend(report['id'] for report in page['data'])
+            cursor = page.get('next_cursor')
+            if not cursor:
+                break
+    finally:
+        conn.close()
+    return ids
+
+
+def build_mix(users_url, reports_url, user_mix, report_mix):
+    mix = {}
+    if users_url:
+        mix.update(user_mix)
+    if reports_url:
+        mix.update(report_mix)
+    mix = {op: weight for op, weight in mix.items() if weight > 0}
+    if not mix:
+        raise ValueError('No operations to run; pass --users-url and/or --reports-url')
+    return list(mix), list(mix.values())
+
+
+def run_load(users_url=None, reports_url=None, duration=30.0, concurrency=8, warmup=2.0,
+             user_mix=None, report_mix=None, timeout=30.0, random_seed=7):
+    """Runs the mixed workload and returns the JSON-serializable summary."""
+    rng = random.Random(random_seed)
+    user_ids = IdPool(sample_user_ids(users_url, timeout) if users_url else [], random.Random(rng.random()))
+    report_ids = IdPool(sample_report_ids(reports_url, timeout) if reports_url else [], random.Random(rng.random()))
+    workload = Workload(users_url, reports_url, user_ids, report_ids, timeout, rng)
+    ops, weights = build_mix(users_url, reports_url, user_mix or DEFAULT_USER_MIX, report_mix or DEFAULT_REPORT_MIX)
+
+    recorder = Recorder()
+    measuring = threading.Event()
+    stop = threading.Event()
+
+    def worker(worker_seed):
+        worker_rng = random.Random(worker_seed)
+        conns = workload.connections()
+        try:
+            while not stop.is_set():
+                op = worker_rng.choices(ops, weights)[0]
+                started = time.perf_counter()
+                try:
+                    status = workload.run(op, conns, worker_rng)
+                except Exception as e:
+                    status = type(e).__name__
+                    for conn in conns.values():
+                        if conn is not None:
+                            conn.close()
+                elapsed_ms = (time.perf_counter() - started) * 1000
+                if status != 'skipped' and measuring.is_set() and not stop.is_set():
+                    recorder.record(op, elapsed_ms, status)
+        finally:
+            for conn in conns.values():
+                if conn is not None:
+                    conn.close()
+
+    threads = [threading.Thread(target=worker, args=(rng.random(),), daemon=True) for _ in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    time.sleep(warmup)
+    measuring.set()
+    started = time.perf_counter()
+    time.sleep(duration)
+    stop.set()
+    measured = time.perf_counter() - started
+    for thread in threads:
+        thread.join(timeout)
+
+    result = recorder.summary(measured)
+    result['config'] = {
+        'users_url': users_url,
+        'reports_url': reports_url,
+        'duration_s': round(measured, 3),
+        'warmup_s': warmup,
+        'concurrency': concurrency,
+        'mix': dict(zip(ops, weights)),
+        'sampled_user_ids': len(user_ids),
+        'sampled_report_ids': len(report_ids),
+    }
+    return result
+
+
+def compare(result, baseline):
+    """Per-operation ratios against a baseline result (below 1.0 is faster for latencies)."""
+    comparison = {}
+    for op, current in result['operations'].items():
+        previous = baseline.get('operations', {}).get(op)
+        if not previous:
+            continue
+        entry = {}
+        for metric in ('throughput_rps', 'p50_ms', 'p95_ms', 'p99_ms'):
+            if previous.get(metric):
+                entry[metric] = round(current[metric] / previous[metric], 3)
+        comparison[op] = entry
+    return comparison
+
+
+def parse_mix(text, defaults):
+    """Parses 'users.list=50,users.get=20' overrides on top of the default weights."""
+    mix = dict(defaults)
+    for item in filter(None, (text or '').split(',')):
+        op, _, weight = item.partition('=')
+        if op.strip() not in defaults:
+            raise argparse.ArgumentTypeError(f"Unknown operation {op!r}; choose from {', '.join(defaults)}")
+        mix[op.strip()] = int(weight)
+    return mix
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users-url', help='user-management base URL, e.g. http://127.0.0.1:5001')
+    parser.add_argument('--reports-url', help='test-reports base URL, e.g. http://127.0.0.1:8000')
+    parser.add_argument('--duration', type=float, default=30.0, help='measured seconds')
+    parser.add_argument('--warmup', type=float, default=2.0, help='unmeasured seconds before measuring')
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--timeout', type=float, default=30.0)
+    parser.add_argument('--user-mix', help='weight overrides, e.g. users.list=60,users.delete=0')
+    parser.add_argument('--report-mix', help='weight overrides, e.g. reports.upload=0')
+    parser.add_argument('--output', help='write the JSON result here instead of stdout')
+    parser.add_argument('--baseline', help='earlier result JSON to compare against')
+    args = parser.parse_args()
+
+    result = run_load(
+        users_url=args.users_url,
+        reports_url=args.reports_url,
+        duration=args.duration,
+        concurrency=args.concurrency,
+        warmup=args.warmup,
+        user_mix=parse_mix(args.user_mix, DEFAULT_USER_MIX),
+        report_mix=parse_mix(args.report_mix, DEFAULT_REPORT_MIX),
+        timeout=args.timeout,
+    )
+    if args.baseline:
+        with open(args.baseline) as f:
+            result['comparison'] = compare(result, json.load(f))
+
+    text = json.dumps(result, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
+
+
+if __name__ == '__main__':
+    main()
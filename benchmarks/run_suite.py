@@ -0,0 +1,175 @@
+"""
+Runs the full benchmark suite: for each dataset size, seed MongoDB, start the storage stub
+and both services against it, drive the mixed workload and collect the results.
+
+Needs a MongoDB server you can drop the CruiseDB.users and test_reports.test_report
+collections on (a throwaway local mongod or container), plus the requirements of both
+services. One JSON file is written per size, and a combined suite.json alongside them.
+
+    python benchmarks/run_suite.py --mongo-uri mongodb://localhost:27017 --sizes 10000,100000,1000000 \\
+        --duration 60 --concurrency 16 --output-dir bench-results
+
+--serving production runs the services the way they are deployed (gunicorn for the users
+API, uvicorn worker processes for the reports API) with --workers processes each, to see
+how throughput scales with cores.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timezone
+
+from loadgen import compare, run_load
+from seed import seed
+from storage_stub import start_storage_stub
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+USERS_SERVICE_DIR = os.path.join(REPO_ROOT, 'user-management')
+REPORTS_SERVICE_DIR = os.path.join(REPO_ROOT, 'test-reports')
+USERS_PORT = 5001
+REPORTS_PORT = 8000
+STARTUP_TIMEOUT = 120
+
+
+def wait_until_ready(url, process, timeout=STARTUP_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'Service exited with code {process.returncode} before becoming ready: {url}')
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise RuntimeError(f'Service not ready after {timeout}s: {url}')
+
+
+def start_services(mongo_uri, storage_url, log_dir, serving='dev', workers=1):
+    if serving != 'production':
+        workers = 1
+    env = dict(
+        os.environ,
+        MONGO_URI=mongo_uri,
+        SUPABASE_URL=storage_url,
+        # supabase-py only checks that the key looks like a JWT
+        SUPABASE_KEY=os.environ.get('BENCH_SUPABASE_KEY', 'bench.bench.bench'),
+        LOG_LEVEL=os.environ.get('LOG_LEVEL', 'WARNING'),
+        FLASK_DEBUG='0',
+        WEB_CONCURRENCY=str(workers),
+        GUNICORN_BIND=f'127.0.0.1:{USERS_PORT}',
+    )
+    # All load comes from one address, so the per-client rate limits of admission control
+    # would only measure 429s; its concurrency limits stay on. Set one explicitly to keep it.
+    for route_class in ('list', 'bulk', 'search', 'stream', 'read', 'write'):
+        env.setdefault(f'ADMISSION_{route_class.upper()}_RATE', '0')
+    users_log = open(os.path.join(log_dir, 'user-management.log'), 'w')
+    reports_log = open(os.path.join(log_dir, 'test-reports.log'), 'w')
+    if serving == 'production':
+        users_command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'Backend:app']
+    else:
+        # Backend.py serves on a fixed port 5001
+        users_command = [sys.executable, 'Backend.py']
+    users = subprocess.Popen(
+        users_command,
+        cwd=USERS_SERVICE_DIR, env=env, stdout=users_log, stderr=subprocess.STDOUT,
+    )
+    reports = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'tester:app', '--host', '127.0.0.1', '--port', str(REPORTS_PORT),
+         '--log-level', 'warning', '--workers', str(workers)],
+        cwd=REPORTS_SERVICE_DIR, env=env, stdout=reports_log, stderr=subprocess.STDOUT,
+    )
+    return [(users, users_log), (reports, reports_log)]
+
+
+def stop_services(services):
+    for process, log in services:
+        process.terminate()
+    for process, log in services:
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+        log.close()
+
+
+def run_size(size, args, storage_url):
+    size_dir = os.path.join(args.output_dir, str(size))
+    os.makedirs(size_dir, exist_ok=True)
+    print(f'[{size}] seeding {size} users and {size} reports...', flush=True)
+    seed_timings = seed(args.mongo_uri, users=size, reports=size, drop=True)
+
+    services = start_services(args.mongo_uri, storage_url, size_dir, args.serving, args.workers)
+    try:
+        users_url = f'http://127.0.0.1:{USERS_PORT}'
+        reports_url = f'http://127.0.0.1:{REPORTS_PORT}'
+        wait_until_ready(f'{users_url}/readyz', services[0][0])
+        wait_until_ready(f'{reports_url}/', services[1][0])
+        print(f'[{size}] running load for {args.duration}s at concurrency {args.concurrency}...', flush=True)
+        result = run_load(
+            users_url=users_url,
+            reports_url=reports_url,
+            duration=args.duration,
+            concurrency=args.concurrency,
+            warmup=args.warmup,
+        )
+    finally:
+        stop_services(services)
+
+    result['dataset'] = {'users': size, 'reports': size, 'seed': seed_timings}
+    with open(os.path.join(size_dir, 'result.json'), 'w') as f:
+        json.dump(result, f, indent=2)
+    print(f"[{size}] {result['throughput_rps']} req/s, {result['total_errors']} errors", flush=True)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='comma-separated dataset sizes')
+    parser.add_argument('--duration', type=float, default=30.0)
+    parser.add_argument('--warmup', type=float, default=5.0)
+    parser.add_argument('--concurrency', type=int, default=8)
+    parser.add_argument('--storage-port', type=int, default=54321)
+    parser.add_argument('--storage-latency-ms', type=float, default=0, help='simulated object store latency')
+    parser.add_argument('--serving', choices=['dev', 'production'], default='dev',
+                        help='development servers, or gunicorn/uvicorn worker processes')
+    parser.add_argument('--workers', type=int, default=1, help='worker processes per service with --serving production')
+    parser.add_argument('--output-dir', default='bench-results')
+    parser.add_argument('--baseline', help='earlier suite.json to compare against')
+    args = parser.parse_args()
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    storage = start_storage_stub(port=args.storage_port, root=os.path.join(args.output_dir, 'storage'),
+                                 latency_ms=args.storage_latency_ms)
+    storage_url = f'http://127.0.0.1:{args.storage_port}'
+    suite = {
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'config': {key: value for key, value in vars(args).items() if key != 'baseline'},
+        'results': {},
+    }
+    try:
+        for size in [int(part) for part in args.sizes.split(',') if part]:
+            suite['results'][str(size)] = run_size(size, args, storage_url)
+    finally:
+        storage.shutdown()
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        suite['comparison'] = {
+            size: compare(result, baseline['results'][size])
+            for size, result in suite['results'].items()
+            if size in baseline.get('results', {})
+        }
+    with open(os.path.join(args.output_dir, 'suite.json'), 'w') as f:
+        json.dump(suite, f, indent=2)
+    print(f"Results written to {os.path.join(args.output_dir, 'suite.json')}")
+
+
+if __name__ == '__main__':
+    main()
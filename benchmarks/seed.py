@@ -0,0 +1,120 @@
+"""
+Seeds a MongoDB server with synthetic users and test reports for benchmarking.
+
+Documents have the same shape the services write (CruiseDB.users as created by
+Backend.py, test_reports.test_report as created by tester.py).
+
+    python benchmarks/seed.py --mongo-uri mongodb://localhost:27017 --users 100000 --reports 100000 --drop
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+from pymongo import MongoClient
+
+# searchTerms are built by the users service's own code, so seeded users are searchable at once
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'user-management'))
+from search import SEARCH_TERMS_FIELD, search_terms  # noqa: E402
+
+BATCH_SIZE = 5000
+
+FIRST_NAMES = ['Amina', 'Ben', 'Carla', 'Dmitri', 'Elena', 'Farid', 'Grace', 'Hiro', 'Ines', 'Jonas',
+               'Karim', 'Lena', 'Mateo', 'Nour', 'Omar', 'Priya', 'Quinn', 'Rosa', 'Samir', 'Tara']
+LAST_NAMES = ['Ahmed', 'Brown', 'Costa', 'Dubois', 'Evans', 'Fischer', 'Garcia', 'Hassan', 'Ivanova',
+              'Jensen', 'Khan', 'Lopez', 'Moreau', 'Nakamura', 'Okafor', 'Petrov', 'Rossi', 'Silva']
+STATUSES = ['open', 'in_progress', 'resolved']
+TESTERS = [f'tester{i}' for i in range(50)]
+
+
+def user_documents(count, rng):
+    now = datetime.utcnow()
+    for i in range(count):
+        first_name = rng.choice(FIRST_NAMES)
+        last_name = rng.choice(LAST_NAMES)
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        user = {
+            'firstName': first_name,
+            'lastName': last_name,
+            'userName': f'{first_name.lower()}.{last_name.lower()}.{i}',
+            'email': f'{first_name.lower()}.{last_name.lower()}.{i}@example.com',
+            'phoneNumber': f'+1555{i:07d}',
+            'gender': rng.choice(['Male', 'Female', 'Other', '']),
+            'status': rng.choice(['active', 'active', 'active', 'inactive']),
+            'dateOfBirth': datetime(1950, 1, 1) + timedelta(days=rng.randint(0, 365 * 55)),
+            'createdAt': created_at,
+            'updatedAt': created_at,
+        }
+        user[SEARCH_TERMS_FIELD] = search_terms(user)
+        yield user
+
+
+def report_documents(count, rng):
+    now = datetime.utcnow()
+    for i in range(count):
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        yield {
+            'description': f'Synthetic report {i}: button misaligned on screen {rng.randint(1, 40)}',
+            'screenshot_url': None,
+            'created_at': created_at,
+            'updated_at': created_at,
+            'status': rng.choice(STATUSES),
+            'tester_name': rng.choice(TESTERS),
+        }
+
+
+def insert_in_batches(collection, documents):
+    batch = []
+    inserted = 0
+    for document in documents:
+        batch.append(document)
+        if len(batch) >= BATCH_SIZE:
+            collection.insert_many(batch, ordered=False)
+            inserted += len(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch, ordered=False)
+        inserted += len(batch)
+    return inserted
+
+
+def seed(mongo_uri, users, reports, drop=False, random_seed=42):
+    """Inserts the requested number of users and reports. Returns timings in seconds."""
+    rng = random.Random(random_seed)
+    client = MongoClient(mongo_uri)
+    try:
+        users_collection = client.CruiseDB.users
+        reports_collection = client.test_reports.test_report
+        if drop:
+            users_collection.drop()
+            reports_collection.drop()
+
+        timings = {}
+        started = time.perf_counter()
+        insert_in_batches(users_collection, user_documents(users, rng))
+        timings['users_seconds'] = round(time.perf_counter() - started, 3)
+
+        started = time.perf_counter()
+        insert_in_batches(reports_collection, report_documents(reports, rng))
+        timings['reports_seconds'] = round(time.perf_counter() - started, 3)
+        return timings
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--mongo-uri', default='mongodb://localhost:27017')
+    parser.add_argument('--users', type=int, default=10000)
+    parser.add_argument('--reports', type=int, default=10000)
+    parser.add_argument('--drop', action='store_true', help='drop both collections first')
+    parser.add_argument('--seed', type=int, default=42, help='random seed for reproducible data')
+    args = parser.parse_args()
+    timings = seed(args.mongo_uri, args.users, args.reports, drop=args.drop, random_seed=args.seed)
+    print(f"Seeded {args.users} users in {timings['users_seconds']}s and {args.reports} reports in {timings['reports_seconds']}s")
+
+
+if __name__ == '__main__':
+    main()
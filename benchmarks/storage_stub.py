@@ -0,0 +1,138 @@
+"""
+Local stand-in for Supabase Storage, so report uploads can be benchmarked offline.
+
+Implements the parts of the Storage REST API that tester.py uses:
+
+    POST/PUT /storage/v1/object/<bucket>/<path>          upload (raw body or multipart form)
+    GET/HEAD /storage/v1/object/public/<bucket>/<path>   public download
+
+Objects are written under --root. An optional --latency-ms delay simulates a remote store.
+Point tester.py at it with SUPABASE_URL=http://127.0.0.1:54321 and any JWT-shaped
+SUPABASE_KEY, e.g. "bench.bench.bench".
+
+    python benchmarks/storage_stub.py --port 54321 --root /tmp/bench-storage
+"""
+import argparse
+import json
+import os
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+UPLOAD_PREFIX = '/storage/v1/object/'
+PUBLIC_PREFIX = '/storage/v1/object/public/'
+
+
+def extract_file(content_type, body):
+    """Returns the file bytes from a multipart/form-data body, or the body itself."""
+    if not content_type.startswith('multipart/form-data'):
+        return body
+    message = BytesParser().parsebytes(b'Content-Type: ' + content_type.encode() + b'\r\n\r\n' + body)
+    for part in message.walk():
+        if part.get_filename() is not None or part.get_param('name', header='content-disposition') == 'file':
+            return part.get_payload(decode=True) or b''
+    return b''
+
+
+class StorageHandler(BaseHTTPRequestHandler):
+    root = '.'
+    latency = 0.0
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _object_path(self, prefix):
+        relative = unquote(self.path.split('?', 1)[0][len(prefix):])
+        full_path = os.path.normpath(os.path.join(self.root, relative))
+        if not full_path.startswith(os.path.abspath(self.root)):
+            return None, relative
+        return full_path, relative
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _upload(self):
+        if self.latency:
+            time.sleep(self.latency)
+        length = int(self.headers.get('Content-Length', 0))
+        body = self.rfile.read(length)
+        full_path, relative = self._object_path(UPLOAD_PREFIX)
+        if full_path is None:
+            self._send_json(400, {'error': 'Invalid path'})
+            return
+        upsert = self.command == 'PUT' or self.headers.get('x-upsert', 'false').lower() == 'true'
+        if os.path.exists(full_path) and not upsert:
+            self._send_json(409, {'statusCode': '409', 'error': 'Duplicate', 'message': 'The resource already exists'})
+            return
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, 'wb') as f:
+            f.write(extract_file(self.headers.get('Content-Type', ''), body))
+        self._send_json(200, {'Key': relative})
+
+    def do_POST(self):
+        self._upload()
+
+    def do_PUT(self):
+        self._upload()
+
+    def _download(self, include_body):
+        if not self.path.startswith(PUBLIC_PREFIX):
+            self._send_json(404, {'error': 'Not found'})
+            return
+        full_path, _ = self._object_path(PUBLIC_PREFIX)
+        if full_path is None or not os.path.isfile(full_path):
+            self._send_json(404, {'error': 'Not found'})
+            return
+        with open(full_path, 'rb') as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/octet-stream')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if include_body:
+            self.wfile.write(data)
+
+    def do_GET(self):
+        self._download(True)
+
+    def do_HEAD(self):
+        self._download(False)
+
+
+def start_storage_stub(host='127.0.0.1', port=54321, root='bench-storage', latency_ms=0):
+    """Starts the stub on a background thread. Returns the server; call shutdown() to stop it."""
+    os.makedirs(root, exist_ok=True)
+    handler = type('ConfiguredStorageHandler', (StorageHandler,), {
+        'root': os.path.abspath(root),
+        'latency': latency_ms / 1000,
+    })
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, name='storage-stub', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=54321)
+    parser.add_argument('--root', default='bench-storage')
+    parser.add_argument('--latency-ms', type=float, default=0)
+    args = parser.parse_args()
+    server = start_storage_stub(args.host, args.port, args.root, args.latency_ms)
+    print(f"Storage stub listening on http://{args.host}:{args.port}, writing to {os.path.abspath(args.root)}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
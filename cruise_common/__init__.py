@@ -0,0 +1,6 @@
+"""
+Framework-independent code shared by the users API (Flask, user-management/) and the
+reports API (FastAPI, test-reports/). Each service keeps a thin adapter module of the same
+name that plugs this core into its framework. The services put the repository root on
+sys.path before importing their adapters.
+"""
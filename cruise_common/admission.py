@@ -0,0 +1,228 @@
+"""
+Admission control for both APIs, so cheap requests stay fast while heavy traffic (list
+pages, exports, searches, dashboards) spikes.
+
+Every endpoint belongs to a route class, and each class has, per worker process:
+
+    concurrency    requests of the class running at once (0 = unlimited)
+    queue          further requests that may wait for a slot; beyond that they are shed
+    queue_timeout  seconds a request waits for a slot before it is shed
+    rate / burst   token bucket per client: `rate` requests per second on average with
+                   bursts of up to `burst` (rate 0 = unlimited)
+
+A client over its rate is rejected with 429 and Retry-After set to when its next token
+is due; a request that finds the queue full, or waits longer than queue_timeout, with 503
+and Retry-After. RouteClass waits on a thread (Flask), AsyncRouteClass on the event loop
+(FastAPI); each service maps endpoints to classes and turns Rejected into a response.
+
+Every setting can be overridden per class with ADMISSION_<CLASS>_CONCURRENCY, _QUEUE,
+_QUEUE_TIMEOUT, _RATE and _BURST, e.g. ADMISSION_LIST_CONCURRENCY=8.
+"""
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+
+from cruise_common.observability import admission_active, admission_rejected, admission_waiting
+
+# Client buckets kept per route class; the least recently seen are dropped beyond this
+MAX_TRACKED_CLIENTS = 10000
+
+
+class Rejected(Exception):
+    def __init__(self, status: int, reason: str, message: str, retry_after: int):
+        super().__init__(message)
+        self.status = status
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+class ConcurrencyLimiter:
+    """A semaphore with a bounded, time-limited wait, for request threads."""
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.waiting = 0
+        self._condition = threading.Condition()
+
+    def acquire(self) -> bool:
+        """Takes a slot, waiting for one if there is room in the queue. Returns False when shed."""
+        with self._condition:
+            if self.active < self.concurrency:
+                self._take()
+                return True
+            if self.waiting >= self.queue or self.queue_timeout <= 0:
+                return False
+            self.waiting += 1
+            admission_waiting.inc(self.name)
+            try:
+                if not self._condition.wait_for(lambda: self.active < self.concurrency, self.queue_timeout):
+                    return False
+                self._take()
+                return True
+            finally:
+                self.waiting -= 1
+                admission_waiting.dec(self.name)
+
+    def _take(self):
+        self.active += 1
+        admission_active.inc(self.name)
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            admission_active.dec(self.name)
+            self._condition.notify()
+
+
+class AsyncConcurrencyLimiter:
+    """
+    A semaphore with a bounded, time-limited FIFO wait. Used from the event loop only:
+    a released slot is handed straight to the oldest waiter.
+    """
+
+    def __init__(self, name: str, concurrency: int, queue: int, queue_timeout: float):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters = deque()
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        """Takes a slot, waiting for one if there is room in the queue. Returns False when shed."""
+        if self.active < self.concurrency and not self._waiters:
+            self.active += 1
+            admission_active.inc(self.name)
+            return True
+        if len(self._waiters) >= self.queue or self.queue_timeout <= 0:
+            return False
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        admission_waiting.inc(self.name)
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+            return True
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the wait timed out
+            if waiter.done():
+                return True
+            self._waiters.remove(waiter)
+            return False
+        except asyncio.CancelledError:
+            if waiter.done():
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            admission_waiting.dec(self.name)
+
+    def release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # The slot passes to the waiter, so active stays the same
+                waiter.set_result(None)
+                return
+        self.active -= 1
+        admission_active.dec(self.name)
+
+
+class TokenBuckets:
+    """One token bucket per client, created full on the client's first request."""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = MAX_TRACKED_CLIENTS):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # client -> (tokens, updated_at)
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> float:
+        """Takes a token. Returns 0 if there was one, otherwise the seconds until the next."""
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at = self._buckets.pop(client, (self.burst, now))
+            tokens = min(self.burst, tokens + (now - updated_at) * self.rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / self.rate
+            self._buckets[client] = (tokens, now)
+            if len(self._buckets) > self.max_clients:
+                self._buckets.popitem(last=False)
+            return wait
+
+
+class RouteClass:
+    """A route class whose requests wait for a slot on their own thread."""
+
+    limiter_class = ConcurrencyLimiter
+
+    def __init__(self, name: str, concurrency: int = 0, queue: int = 0, queue_timeout: float = 1.0,
+                 rate: float = 0.0, burst: int = 0):
+        self.name = name
+        self.limiter = self.limiter_class(name, concurrency, queue, queue_timeout) if concurrency > 0 else None
+        self.buckets = TokenBuckets(rate, burst or math.ceil(rate)) if rate > 0 else None
+
+    @classmethod
+    def from_env(cls, name: str, concurrency: int = 0, queue: int = 0, queue_timeout: float = 1.0,
+                 rate: float = 0.0, burst: int = 0):
+        """A class with the given defaults, each overridable with ADMISSION_<NAME>_<SETTING>."""
+        prefix = f"ADMISSION_{name.upper()}_"
+        return cls(
+            name,
+            concurrency=int(os.getenv(prefix + "CONCURRENCY", str(concurrency))),
+            queue=int(os.getenv(prefix + "QUEUE", str(queue))),
+            queue_timeout=float(os.getenv(prefix + "QUEUE_TIMEOUT", str(queue_timeout))),
+            rate=float(os.getenv(prefix + "RATE", str(rate))),
+            burst=int(os.getenv(prefix + "BURST", str(burst))),
+        )
+
+    def check_rate(self, client: str):
+        """Takes a token from `client`'s bucket or raises Rejected (429)."""
+        if self.buckets is not None:
+            wait = self.buckets.take(client)
+            if wait > 0:
+                admission_rejected.inc(self.name, "rate_limited")
+                raise Rejected(429, "rate_limited", "Too many requests, slow down", math.ceil(wait))
+
+    def overloaded(self) -> Rejected:
+        admission_rejected.inc(self.name, "overloaded")
+        return Rejected(
+            503, "overloaded", "Server busy, try again shortly", max(math.ceil(self.limiter.queue_timeout), 1)
+        )
+
+    def admit(self, client: str):
+        """Admits one request of `client` or raises Rejected. Admitted requests must release()."""
+        self.check_rate(client)
+        if self.limiter is not None and not self.limiter.acquire():
+            raise self.overloaded()
+
+    def release(self):
+        if self.limiter is not None:
+            self.limiter.release()
+
+
+class AsyncRouteClass(RouteClass):
+    """A route class whose requests wait for a slot on the event loop."""
+
+    limiter_class = AsyncConcurrencyLimiter
+
+    async def admit(self, client: str):
+        """Admits one request of `client` or raises Rejected. Admitted requests must release()."""
+        self.check_rate(client)
+        if self.limiter is not None and not await self.limiter.acquire():
+            raise self.overloaded()
@@ -0,0 +1,91 @@
+"""
+Background MongoDB change stream consumer.
+
+Picks up writes made by other processes (other workers, scripts, the Atlas UI) so that
+in-process state such as caches and change feeds can follow them; both APIs run one.
+Change streams need a replica set; against a standalone server the watcher logs once and
+stays inactive.
+"""
+import logging
+import threading
+
+from pymongo.errors import OperationFailure, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Server error codes meaning change streams are not available on this deployment
+CHANGE_STREAMS_UNSUPPORTED = {40573, 40324}
+# The resume token is older than the oplog window
+CHANGE_STREAM_HISTORY_LOST = 286
+
+
+class ChangeStreamWatcher:
+    def __init__(self, get_collection, on_change, on_reset=None, retry_interval=5.0, full_document=None):
+        """
+        get_collection: returns the collection to watch, or None while disconnected.
+        on_change: called with each change event document.
+        on_reset: called when events may have been missed (stream broke or history lost).
+        """
+        self.get_collection = get_collection
+        self.on_change = on_change
+        self.on_reset = on_reset
+        self.retry_interval = retry_interval
+        self.full_document = full_document
+        self.active = False
+        self.resume_token = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="change-stream-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _reset(self):
+        self.active = False
+        if self.on_reset:
+            self.on_reset()
+
+    def _run(self):
+        while not self._stop.is_set():
+            collection = self.get_collection()
+            if collection is None:
+                self._stop.wait(self.retry_interval)
+                continue
+            try:
+                options = {"max_await_time_ms": 1000, "resume_after": self.resume_token}
+                if self.full_document:
+                    options["full_document"] = self.full_document
+                with collection.watch(**options) as stream:
+                    self.active = True
+                    while not self._stop.is_set() and stream.alive:
+                        change = stream.try_next()
+                        self.resume_token = stream.resume_token
+                        if change is not None:
+                            self.on_change(change)
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info(f"Change streams not supported by this deployment, watcher disabled: {e}")
+                    self.active = False
+                    return
+                if e.code == CHANGE_STREAM_HISTORY_LOST:
+                    self.resume_token = None
+                logger.warning(f"Change stream failed, restarting: {e}")
+                self._reset()
+                self._stop.wait(self.retry_interval)
+            except PyMongoError as e:
+                logger.warning(f"Change stream interrupted, restarting: {e}")
+                self._reset()
+                self._stop.wait(self.retry_interval)
+            except Exception:
+                logger.exception("Change stream handler failed")
+                self._reset()
+                self._stop.wait(self.retry_interval)
+        self.active = False
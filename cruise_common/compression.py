@@ -0,0 +1,54 @@
+"""
+Response compression negotiated from Accept-Encoding, for both APIs.
+
+Brotli is used when the client accepts it and the brotli package is installed, gzip
+otherwise. The services decide per response whether compressing is worth it
+(is_compressible) and apply it with their framework's response objects.
+"""
+import gzip
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+COMPRESSIBLE_MEDIA_TYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/html",
+    "text/plain",
+}
+
+
+def choose_encoding(accept_encoding):
+    """Picks 'br', 'gzip' or None from an Accept-Encoding header, honouring q=0."""
+    accepted = {}
+    for part in (accept_encoding or "").split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0:
+        return "gzip"
+    return None
+
+
+def is_compressible(status: int, media_type: str, already_encoded: bool) -> bool:
+    """Whether a complete response may be compressed; the size threshold is checked separately."""
+    return 200 <= status < 300 and not already_encoded and media_type in COMPRESSIBLE_MEDIA_TYPES
+
+
+def compress(body: bytes, encoding: str, gzip_level: int = 6, brotli_quality: int = 4) -> bytes:
+    """Encodes a body with an encoding returned by choose_encoding."""
+    if encoding == "br":
+        return brotli.compress(body, quality=brotli_quality)
+    return gzip.compress(body, compresslevel=gzip_level)
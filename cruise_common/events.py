@@ -0,0 +1,139 @@
+"""
+Server-sent events fan-out shared by the users and reports change feeds.
+
+Publishers (write handlers, upload workers, the change stream watcher) publish one event
+per changed document; every connected client has its own bounded queue. Event ids are
+"<epoch>-<seq>": a reconnecting EventSource sends the last id it saw (Last-Event-ID) and
+gets the missed events replayed from a ring buffer. When that is impossible (the process
+restarted, the gap is older than the buffer, or the client fell too far behind) it
+receives a "reset" event instead and reloads once.
+
+The hub is independent of how a service streams responses: each service subclasses it
+with a subscription_class whose deliver(item) queues an item for one client (a thread
+queue under Flask, an asyncio queue under FastAPI), emptying the queue and queueing
+overflow_item(item) instead when it is full. close() ends every stream when the server
+shuts down (see close_on_shutdown); clients reconnect to another worker.
+"""
+import os
+import signal
+import threading
+from collections import deque
+
+from cruise_common.serialization import dumps
+
+RESET_EVENT = "reset"
+# Queued to a subscriber to end its stream
+CLOSE = None
+
+
+class EventHub:
+    # Set by each service: called as subscription_class(hub, queue_size)
+    subscription_class = None
+
+    def __init__(self, buffer_size: int = 1000, subscriber_queue_size: int = 1000):
+        # A fresh epoch per process, so ids from before a restart are never taken as resumable
+        self.epoch = os.urandom(4).hex()
+        self.subscriber_queue_size = subscriber_queue_size
+        self._seq = 0
+        self._buffer = deque(maxlen=buffer_size)
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self.closed = False
+
+    def _event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def reset_item(self):
+        """A reset carries the current id, so the client resumes from here after reloading."""
+        return (self._event_id(self._seq), RESET_EVENT, {})
+
+    def overflow_item(self, item):
+        """What replaces a full subscriber queue: the client is reset, or its stream ends if that was the item."""
+        return CLOSE if item is CLOSE else self.reset_item()
+
+    def publish(self, event: str, data: dict):
+        with self._lock:
+            self._seq += 1
+            item = (self._event_id(self._seq), event, data)
+            self._buffer.append((self._seq, item))
+            # Delivered under the lock, so every subscriber sees events in sequence order
+            for subscription in self._subscribers:
+                subscription.deliver(item)
+
+    def reset(self):
+        """Tells every client that events may have been missed and it should reload."""
+        with self._lock:
+            item = self.reset_item()
+            self._buffer.clear()
+            for subscription in self._subscribers:
+                subscription.deliver(item)
+
+    def close(self):
+        """Ends every open stream, and any opened afterwards, e.g. when the worker shuts down."""
+        with self._lock:
+            self.closed = True
+            for subscription in self._subscribers:
+                subscription.deliver(CLOSE)
+
+    def subscribe(self, last_event_id: str = None):
+        """Registers a client, queueing the events it missed since last_event_id, if any."""
+        subscription = self.subscription_class(self, self.subscriber_queue_size)
+        with self._lock:
+            if self.closed:
+                subscription.deliver(CLOSE)
+                return subscription
+            backlog = self._events_after(last_event_id)
+            if backlog is None or len(backlog) >= self.subscriber_queue_size:
+                subscription.deliver(self.reset_item())
+            else:
+                for item in backlog:
+                    subscription.deliver(item)
+            self._subscribers.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscribers.discard(subscription)
+
+    def _events_after(self, last_event_id: str):
+        """Buffered events after last_event_id; None when the id cannot be resumed from."""
+        if not last_event_id:
+            return []
+        epoch, _, seq = last_event_id.partition("-")
+        if epoch != self.epoch or not seq.isdigit() or int(seq) > self._seq:
+            return None
+        seq = int(seq)
+        oldest = self._buffer[0][0] if self._buffer else self._seq + 1
+        if seq < oldest - 1:
+            return None
+        return [item for item_seq, item in self._buffer if item_seq > seq]
+
+
+def format_sse(item) -> str:
+    event_id, event, data = item
+    return f"id: {event_id}\nevent: {event}\ndata: {dumps(data)}\n\n"
+
+
+def close_on_shutdown(hub: EventHub, signals=(signal.SIGTERM, signal.SIGINT)):
+    """
+    Closes the hub as soon as the server starts shutting down, so open streams do not hold
+    up the drain of in-flight requests until its timeout. Chains to the handlers the server
+    installed, so call it once they are in place (after the fork under gunicorn, in the
+    lifespan under uvicorn). Does nothing off the main thread, where signal handlers cannot
+    be set (e.g. under a test client); streams then end with the drain timeout instead.
+    """
+    if threading.current_thread() is not threading.main_thread():
+        return
+    for signum in signals:
+        previous = signal.getsignal(signum)
+
+        def handler(received, frame, previous=previous):
+            # Not inline: the interrupted thread may be holding the hub lock
+            threading.Thread(target=hub.close, name="event-hub-close", daemon=True).start()
+            if callable(previous):
+                previous(received, frame)
+            elif previous == signal.SIG_DFL:
+                signal.signal(received, signal.SIG_DFL)
+                signal.raise_signal(received)
+
+        signal.signal(signum, handler)
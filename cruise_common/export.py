@@ -0,0 +1,69 @@
+"""
+Streaming NDJSON/CSV exports for both APIs.
+
+export_chunks turns a MongoDB cursor into text chunks of EXPORT_CHUNK_ROWS rows, so memory
+use does not depend on the size of the collection. The cursor is opened inside the
+generator, after the response headers have gone out: a query that fails to start is
+handled like one failing mid-way, and both end the download early.
+"""
+import csv
+import io
+import logging
+
+from cruise_common.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+# Documents fetched from MongoDB per round trip, and rows per chunk written to the client
+EXPORT_BATCH_SIZE = 1000
+EXPORT_CHUNK_ROWS = 500
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _take(buffer: io.StringIO) -> str:
+    chunk = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return chunk
+
+
+def export_chunks(open_cursor, export_format: str, fieldnames, format_row=None, chunk_rows: int = EXPORT_CHUNK_ROWS):
+    """
+    Yields the export of the documents from open_cursor() in export_format (a key of
+    EXPORT_FORMATS). CSV has the columns `fieldnames`; format_row, if given, maps each
+    document to its row first. The cursor is closed when the export ends or is abandoned.
+    """
+    buffer = io.StringIO()
+    writer = None
+    if export_format == "csv":
+        writer = csv.DictWriter(buffer, fieldnames=list(fieldnames))
+        writer.writeheader()
+        # Send the header straight away so the download starts before the first batch arrives
+        yield _take(buffer)
+
+    cursor = None
+    rows_in_chunk = 0
+    try:
+        cursor = open_cursor()
+        for document in cursor:
+            row = format_row(document) if format_row else document
+            if writer:
+                writer.writerow(row)
+            else:
+                buffer.write(dumps(row))
+                buffer.write("\n")
+            rows_in_chunk += 1
+            if rows_in_chunk >= chunk_rows:
+                yield _take(buffer)
+                rows_in_chunk = 0
+        if rows_in_chunk:
+            yield _take(buffer)
+    except Exception:
+        # Headers are already sent, so the client sees a truncated file
+        logger.exception("Export aborted")
+    finally:
+        if cursor is not None:
+            cursor.close()
@@ -0,0 +1,221 @@
+"""
+Structured logging, Prometheus-style metrics and request profiling for both APIs.
+
+- configure_logging() switches logging to one JSON object per line.
+- render_metrics() gives request latency histograms per route and status, an in-flight
+  gauge, MongoDB command timings collected by MongoCommandTimer, and the running,
+  waiting and shed requests of admission control (see admission.py).
+- With SLOW_REQUEST_MS set, requests slower than that are logged together with a
+  per-command breakdown of the database calls they made.
+
+Each service times its requests with start_request/finish_request from a framework
+adapter and serves render_metrics() at /metrics.
+"""
+import contextvars
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+
+from pymongo import monitoring
+
+# Requests slower than this many milliseconds are logged with their database calls (0 = off)
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "0"))
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+logger = logging.getLogger(__name__)
+
+# Attributes every LogRecord has; anything else on a record came from `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+
+class JSONLogFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, function, message and any extra fields."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "func": record.funcName,
+            "msg": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level=None):
+    """Sends all logging through one stderr handler with the JSON formatter. LOG_LEVEL sets the level."""
+    handler = logging.StreamHandler()
+    handler.setFormatter(JSONLogFormatter())
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+
+
+def _format_labels(labelnames, labels, extra=None):
+    pairs = list(zip(labelnames, labels))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = [0] * (len(self.buckets) + 2)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = {labels: list(series) for labels, series in self._series.items()}
+        for labels, series in sorted(snapshot.items()):
+            for bound, bucket_count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', bound))} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, ('le', '+Inf'))} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series[-1]}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount=1):
+        self.inc(*labels, amount=-amount)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        with self._lock:
+            snapshot = dict(self._values)
+        for labels, value in sorted(snapshot.items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, labels)} {value}")
+        return lines
+
+
+class Counter(Gauge):
+    """Only ever goes up; rendered with the counter type."""
+
+    def render(self):
+        lines = super().render()
+        lines[1] = f"# TYPE {self.name} counter"
+        return lines
+
+
+request_latency = Histogram(
+    "http_request_duration_seconds", "Request latency by route and status.", ("method", "route", "status")
+)
+requests_in_flight = Gauge("http_requests_in_flight", "Requests currently being handled.")
+mongo_command_latency = Histogram(
+    "mongodb_command_duration_seconds", "MongoDB command latency by command and outcome.", ("command", "outcome")
+)
+
+admission_active = Gauge("admission_active_requests", "Admitted requests running, by route class.", ("route_class",))
+admission_waiting = Gauge("admission_waiting_requests", "Requests waiting for a slot, by route class.", ("route_class",))
+admission_rejected = Counter(
+    "admission_rejected_total", "Requests shed by admission control, by route class and reason.", ("route_class", "reason")
+)
+
+METRICS = [request_latency, requests_in_flight, mongo_command_latency, admission_active, admission_waiting, admission_rejected]
+
+
+def render_metrics():
+    """All metrics in the Prometheus text exposition format."""
+    lines = []
+    for metric in METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+# Database calls made by the current request; only collected when slow-request logging is on
+_request_db_calls = contextvars.ContextVar("request_db_calls", default=None)
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    """pymongo listener feeding command timings into the histogram and the current request's profile."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        self._record(event, "success")
+
+    def failed(self, event):
+        self._record(event, "failure")
+
+    def _record(self, event, outcome):
+        seconds = event.duration_micros / 1_000_000
+        mongo_command_latency.observe(seconds, event.command_name, outcome)
+        calls = _request_db_calls.get()
+        if calls is not None:
+            calls.append((event.command_name, seconds))
+
+
+def start_request():
+    """Marks the start of a request. Returns a token for finish_request."""
+    requests_in_flight.inc()
+    calls_token = _request_db_calls.set([]) if SLOW_REQUEST_MS > 0 else None
+    return time.perf_counter(), calls_token
+
+
+def finish_request(token, method, route, status):
+    started_at, calls_token = token
+    elapsed = time.perf_counter() - started_at
+    requests_in_flight.dec()
+    request_latency.observe(elapsed, method, route, str(status))
+    if calls_token is None:
+        return
+    calls = _request_db_calls.get() or []
+    _request_db_calls.reset(calls_token)
+    if elapsed * 1000 < SLOW_REQUEST_MS:
+        return
+    breakdown = {}
+    for command_name, seconds in calls:
+        entry = breakdown.setdefault(command_name, {"count": 0, "ms": 0.0})
+        entry["count"] += 1
+        entry["ms"] = round(entry["ms"] + seconds * 1000, 3)
+    logger.warning(
+        "Slow request",
+        extra={
+            "method": method,
+            "route": route,
+            "status": status,
+            "duration_ms": round(elapsed * 1000, 3),
+            "db_ms": round(sum(seconds for _, seconds in calls) * 1000, 3),
+            "db_calls": breakdown,
+        }
+    )
@@ -0,0 +1,52 @@
+"""
+Keyset (cursor) pagination for both APIs.
+
+A client walks a collection in ascending (order_by, _id) order. Each page ends with an
+opaque cursor naming the last document's sort value and _id, and the next page is the
+index range strictly after it, so deep pages cost the same as the first one.
+"""
+import base64
+import json
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+
+def encode_cursor(order_by: str, last_document: dict) -> str:
+    """Builds an opaque cursor token pointing just past last_document."""
+    value = last_document.get(order_by) if order_by != "_id" else None
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = {"o": order_by, "v": value, "i": str(last_document["_id"])}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str):
+    """Reverses encode_cursor. Returns (order_by, value, last_id); raises ValueError if invalid."""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        order_by = payload["o"]
+        last_id = ObjectId(payload["i"])
+        value = payload.get("v")
+        if value is not None and order_by != "_id":
+            value = datetime.fromisoformat(value)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return order_by, value, last_id
+
+
+def build_keyset_query(order_by: str, value, last_id: ObjectId) -> dict:
+    """Returns the filter selecting documents strictly after (value, last_id) in ascending order."""
+    if order_by == "_id":
+        return {"_id": {"$gt": last_id}}
+    if value is None:
+        # Documents without the field sort first; continue within them, then move on to the rest
+        return {"$or": [
+            {order_by: None, "_id": {"$gt": last_id}},
+            {order_by: {"$exists": True, "$ne": None}},
+        ]}
+    return {"$or": [
+        {order_by: {"$gt": value}},
+        {order_by: value, "_id": {"$gt": last_id}},
+    ]}
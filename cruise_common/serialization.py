@@ -0,0 +1,45 @@
+"""
+JSON serialization for both APIs: orjson when it is installed, the standard library
+otherwise, with the same output either way.
+
+ObjectId becomes its hex string and datetime an ISO-8601 string. Fields with a narrower
+wire format (a user's dateOfBirth is YYYY-MM-DD) are formatted by the API before they
+get here.
+"""
+import json
+from datetime import datetime
+
+from bson.objectid import ObjectId
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+
+def mongo_default(obj):
+    """Fallback for types the JSON libraries do not know."""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+if orjson is not None:
+    # orjson writes datetimes itself, in the same ISO-8601 form as datetime.isoformat()
+    def dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, default=mongo_default, option=orjson.OPT_NON_STR_KEYS)
+
+    def loads(data):
+        return orjson.loads(data)
+else:
+    def dumps_bytes(obj) -> bytes:
+        return json.dumps(obj, default=mongo_default, separators=(",", ":")).encode()
+
+    def loads(data):
+        return json.loads(data)
+
+
+def dumps(obj) -> str:
+    return dumps_bytes(obj).decode()
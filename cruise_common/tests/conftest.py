@@ -0,0 +1,9 @@
+"""
+Tests of the shared core. Run from cruise_common/:
+
+    python -m pytest -q
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
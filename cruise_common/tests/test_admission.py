@@ -0,0 +1,176 @@
+import asyncio
+import threading
+
+import pytest
+
+from cruise_common import admission
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_token_bucket_allows_the_burst_then_reports_the_wait(clock):
+    buckets = admission.TokenBuckets(rate=2, burst=3)
+
+    assert [buckets.take("a") for _ in range(3)] == [0, 0, 0]
+    assert buckets.take("a") == pytest.approx(0.5)
+    # Other clients have buckets of their own
+    assert buckets.take("b") == 0
+
+
+def test_token_bucket_refills_at_the_rate_up_to_the_burst(clock):
+    buckets = admission.TokenBuckets(rate=2, burst=3)
+    for _ in range(3):
+        buckets.take("a")
+
+    clock.now += 0.5
+    assert buckets.take("a") == 0
+    assert buckets.take("a") > 0
+
+    clock.now += 60
+    assert [buckets.take("a") for _ in range(3)] == [0, 0, 0]
+    assert buckets.take("a") > 0
+
+
+def test_token_buckets_forget_the_least_recently_seen_client(clock):
+    buckets = admission.TokenBuckets(rate=1, burst=1, max_clients=2)
+    buckets.take("a")
+    buckets.take("b")
+    buckets.take("a")
+    buckets.take("c")
+
+    # a is still tracked and empty; b was dropped, so it starts again with a full bucket
+    assert buckets.take("a") > 0
+    assert buckets.take("b") == 0
+
+
+def test_limiter_sheds_when_the_queue_is_full():
+    limiter = admission.ConcurrencyLimiter("t", concurrency=1, queue=0, queue_timeout=1)
+
+    assert limiter.acquire() is True
+    assert limiter.acquire() is False
+    limiter.release()
+    assert limiter.acquire() is True
+
+
+def test_limiter_sheds_after_the_queue_timeout():
+    limiter = admission.ConcurrencyLimiter("t", concurrency=1, queue=1, queue_timeout=0.05)
+    limiter.acquire()
+
+    assert limiter.acquire() is False
+    assert limiter.waiting == 0
+
+
+def test_limiter_hands_a_released_slot_to_a_waiting_thread():
+    limiter = admission.ConcurrencyLimiter("t", concurrency=1, queue=1, queue_timeout=5)
+    limiter.acquire()
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(limiter.acquire()))
+    waiter.start()
+    while limiter.waiting == 0:
+        pass
+
+    limiter.release()
+    waiter.join(5)
+
+    assert results == [True]
+    assert limiter.active == 1
+
+
+def test_async_limiter_hands_slots_over_in_arrival_order():
+    async def scenario():
+        limiter = admission.AsyncConcurrencyLimiter("t", concurrency=1, queue=2, queue_timeout=5)
+        order = []
+        await limiter.acquire()
+
+        async def request(name):
+            assert await limiter.acquire()
+            order.append(name)
+            limiter.release()
+
+        first = asyncio.create_task(request("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(request("second"))
+        await asyncio.sleep(0)
+        # The queue is full
+        assert await limiter.acquire() is False
+        limiter.release()
+        await asyncio.gather(first, second)
+        return order, limiter.active
+
+    assert asyncio.run(scenario()) == (["first", "second"], 0)
+
+
+def test_async_limiter_sheds_after_the_queue_timeout_and_on_cancel():
+    async def scenario():
+        limiter = admission.AsyncConcurrencyLimiter("t", concurrency=1, queue=2, queue_timeout=0.05)
+        await limiter.acquire()
+        timed_out = await limiter.acquire()
+
+        cancelled = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await cancelled
+        limiter.release()
+        return timed_out, limiter.waiting, limiter.active
+
+    assert asyncio.run(scenario()) == (False, 0, 0)
+
+
+def test_route_class_rejects_over_rate_with_429(clock):
+    route_class = admission.RouteClass("read", rate=1, burst=1)
+    route_class.admit("a")
+
+    with pytest.raises(admission.Rejected) as rejected:
+        route_class.admit("a")
+
+    assert (rejected.value.status, rejected.value.reason, rejected.value.retry_after) == (429, "rate_limited", 1)
+
+
+def test_route_class_rejects_when_overloaded_with_503():
+    route_class = admission.RouteClass("bulk", concurrency=1, queue=0, queue_timeout=2.5)
+    route_class.admit("a")
+
+    with pytest.raises(admission.Rejected) as rejected:
+        route_class.admit("b")
+
+    assert (rejected.value.status, rejected.value.reason, rejected.value.retry_after) == (503, "overloaded", 3)
+    route_class.release()
+    route_class.admit("b")
+
+
+def test_async_route_class_uses_the_async_limiter():
+    route_class = admission.AsyncRouteClass("list", concurrency=1, queue=0)
+
+    async def scenario():
+        await route_class.admit("a")
+        with pytest.raises(admission.Rejected):
+            await route_class.admit("b")
+        route_class.release()
+
+    asyncio.run(scenario())
+    assert isinstance(route_class.limiter, admission.AsyncConcurrencyLimiter)
+
+
+def test_from_env_overrides_the_defaults(monkeypatch):
+    monkeypatch.setenv("ADMISSION_LIST_CONCURRENCY", "16")
+    monkeypatch.setenv("ADMISSION_LIST_RATE", "0")
+
+    route_class = admission.RouteClass.from_env("list", concurrency=4, queue=4, rate=10, burst=20)
+
+    assert route_class.limiter.concurrency == 16
+    assert route_class.limiter.queue == 4
+    assert route_class.buckets is None
@@ -0,0 +1,41 @@
+import gzip
+
+import pytest
+
+from cruise_common import compression
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0, deflate", None),
+    ("GZIP;q=0.5", "gzip"),
+    ("gzip;q=abc", None),
+    ("", None),
+    (None, None),
+])
+def test_choose_encoding_without_brotli(monkeypatch, header, expected):
+    monkeypatch.setattr(compression, "brotli", None)
+    assert compression.choose_encoding(header) == expected
+
+
+def test_brotli_preferred_when_installed_and_accepted(monkeypatch):
+    monkeypatch.setattr(compression, "brotli", object())
+    assert compression.choose_encoding("gzip, br") == "br"
+    assert compression.choose_encoding("gzip, br;q=0") == "gzip"
+
+
+@pytest.mark.parametrize("status, media_type, encoded, expected", [
+    (200, "application/json", False, True),
+    (206, "text/csv", False, True),
+    (304, "application/json", False, False),
+    (500, "application/json", False, False),
+    (200, "image/png", False, False),
+    (200, "application/json", True, False),
+])
+def test_is_compressible(status, media_type, encoded, expected):
+    assert compression.is_compressible(status, media_type, encoded) is expected
+
+
+def test_gzip_round_trip():
+    body = b'{"data": []}' * 200
+    assert gzip.decompress(compression.compress(body, "gzip")) == body
@@ -0,0 +1,120 @@
+from cruise_common import events
+
+
+class RecordingSubscription:
+    def __init__(self, hub, queue_size):
+        self.hub = hub
+        self.items = []
+
+    def deliver(self, item):
+        self.items.append(item)
+
+
+class Hub(events.EventHub):
+    subscription_class = RecordingSubscription
+
+
+def published(hub, count):
+    for i in range(count):
+        hub.publish("user", {"n": i})
+    return [f"{hub.epoch}-{seq}" for seq in range(1, count + 1)]
+
+
+def event_names(subscription):
+    return [(event, data.get("n")) for _, event, data in subscription.items]
+
+
+def test_resume_replays_the_events_after_the_last_id():
+    hub = Hub(buffer_size=10)
+    ids = published(hub, 5)
+
+    subscription = hub.subscribe(ids[1])
+
+    assert [item[0] for item in subscription.items] == ids[2:]
+    assert event_names(subscription) == [("user", 2), ("user", 3), ("user", 4)]
+
+
+def test_resume_from_the_newest_id_replays_nothing_and_receives_new_events():
+    hub = Hub(buffer_size=10)
+    ids = published(hub, 3)
+
+    subscription = hub.subscribe(ids[-1])
+    hub.publish("user", {"n": 3})
+
+    assert event_names(subscription) == [("user", 3)]
+
+
+def test_first_connection_gets_no_backlog():
+    hub = Hub(buffer_size=10)
+    published(hub, 3)
+
+    assert hub.subscribe().items == []
+
+
+def test_gap_older_than_the_buffer_resets():
+    hub = Hub(buffer_size=3)
+    ids = published(hub, 6)
+
+    subscription = hub.subscribe(ids[1])
+
+    assert subscription.items == [(ids[-1], events.RESET_EVENT, {})]
+
+
+def test_oldest_buffered_id_can_still_be_resumed_from():
+    hub = Hub(buffer_size=3)
+    ids = published(hub, 6)
+
+    # Events 4..6 are buffered, so resuming after 3 misses nothing
+    subscription = hub.subscribe(ids[2])
+
+    assert [item[0] for item in subscription.items] == ids[3:]
+
+
+def test_id_from_another_process_or_the_future_resets():
+    hub = Hub(buffer_size=10)
+    ids = published(hub, 2)
+
+    for last_event_id in ("deadbeef-1", f"{hub.epoch}-99", f"{hub.epoch}-x", "garbage"):
+        subscription = hub.subscribe(last_event_id)
+        assert subscription.items == [(ids[-1], events.RESET_EVENT, {})]
+
+
+def test_backlog_larger_than_the_subscriber_queue_resets():
+    hub = Hub(buffer_size=10, subscriber_queue_size=2)
+    ids = published(hub, 5)
+
+    subscription = hub.subscribe(ids[0])
+
+    assert event_names(subscription) == [(events.RESET_EVENT, None)]
+
+
+def test_reset_clears_the_buffer():
+    hub = Hub(buffer_size=10)
+    ids = published(hub, 3)
+    hub.reset()
+
+    subscription = hub.subscribe(ids[0])
+
+    assert event_names(subscription) == [(events.RESET_EVENT, None)]
+
+
+def test_close_ends_open_and_later_streams():
+    hub = Hub()
+    subscription = hub.subscribe()
+
+    hub.close()
+
+    assert subscription.items == [events.CLOSE]
+    assert hub.subscribe().items == [events.CLOSE]
+
+
+def test_overflow_item():
+    hub = Hub()
+    published(hub, 1)
+
+    assert hub.overflow_item(events.CLOSE) is events.CLOSE
+    assert hub.overflow_item(("x", "user", {}))[1] == events.RESET_EVENT
+
+
+def test_format_sse():
+    assert events.format_sse(("ab-1", "user", {"id": "1"})) == 'id: ab-1\nevent: user\ndata: {"id":"1"}\n\n'
@@ -0,0 +1,72 @@
+import csv
+import io
+import json
+
+from cruise_common.export import export_chunks
+
+
+class FakeCursor:
+    def __init__(self, documents, fail_after=None):
+        self.documents = documents
+        self.fail_after = fail_after
+        self.closed = False
+
+    def __iter__(self):
+        for i, document in enumerate(self.documents):
+            if i == self.fail_after:
+                raise RuntimeError("cursor died")
+            yield document
+
+    def close(self):
+        self.closed = True
+
+
+DOCUMENTS = [{"id": str(i), "name": f"n{i}"} for i in range(5)]
+
+
+def test_ndjson_in_chunks_of_chunk_rows():
+    cursor = FakeCursor(DOCUMENTS)
+
+    chunks = list(export_chunks(lambda: cursor, "ndjson", ["id", "name"], chunk_rows=2))
+
+    assert [chunk.count("\n") for chunk in chunks] == [2, 2, 1]
+    assert [json.loads(line) for line in "".join(chunks).splitlines()] == DOCUMENTS
+    assert cursor.closed
+
+
+def test_csv_header_first_then_formatted_rows():
+    chunks = list(export_chunks(
+        lambda: FakeCursor(DOCUMENTS), "csv", ["id", "name"],
+        format_row=lambda document: {**document, "name": document["name"].upper()},
+    ))
+
+    assert chunks[0] == "id,name\r\n"
+    rows = list(csv.DictReader(io.StringIO("".join(chunks))))
+    assert rows[1] == {"id": "1", "name": "N1"}
+    assert len(rows) == 5
+
+
+def test_query_failing_to_start_ends_the_download():
+    def open_cursor():
+        raise RuntimeError("server selection timed out")
+
+    assert list(export_chunks(open_cursor, "csv", ["id", "name"])) == ["id,name\r\n"]
+
+
+def test_cursor_failing_mid_way_is_truncated_and_closed():
+    cursor = FakeCursor(DOCUMENTS, fail_after=3)
+
+    chunks = list(export_chunks(lambda: cursor, "ndjson", ["id", "name"], chunk_rows=2))
+
+    assert "".join(chunks).count("\n") == 2
+    assert cursor.closed
+
+
+def test_abandoned_download_closes_the_cursor():
+    cursor = FakeCursor(DOCUMENTS)
+    chunks = export_chunks(lambda: cursor, "ndjson", ["id", "name"], chunk_rows=1)
+
+    next(chunks)
+    chunks.close()
+
+    assert cursor.closed
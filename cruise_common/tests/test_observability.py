@@ -0,0 +1,58 @@
+import json
+import logging
+
+from cruise_common import observability
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = observability.Histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "/a")
+    histogram.observe(0.5, "/a")
+    histogram.observe(5.0, "/a")
+
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1.0"} 2',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 3',
+        'latency_seconds_sum{route="/a"} 5.55',
+        'latency_seconds_count{route="/a"} 3',
+    ]
+
+
+def test_counter_renders_with_counter_type_and_escaped_labels():
+    counter = observability.Counter("shed_total", "Shed.", ("reason",))
+    counter.inc('say "no"')
+    counter.inc('say "no"')
+
+    assert counter.render() == [
+        "# HELP shed_total Shed.",
+        "# TYPE shed_total counter",
+        'shed_total{reason="say \\"no\\""} 2',
+    ]
+
+
+def test_slow_request_logged_with_its_database_calls(monkeypatch, caplog):
+    monkeypatch.setattr(observability, "SLOW_REQUEST_MS", 0.001)
+    token = observability.start_request()
+    observability._request_db_calls.get().extend([("find", 0.002), ("find", 0.003), ("count", 0.001)])
+
+    with caplog.at_level(logging.WARNING, logger=observability.__name__):
+        observability.finish_request(token, "GET", "/api/users", 200)
+
+    record = caplog.records[-1]
+    assert record.route == "/api/users"
+    assert record.db_calls == {"find": {"count": 2, "ms": 5.0}, "count": {"count": 1, "ms": 1.0}}
+    assert record.db_ms == 6.0
+
+
+def test_json_log_formatter_keeps_extra_fields():
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "hello %s", ("there",), None)
+    record.route = "/x"
+
+    entry = json.loads(observability.JSONLogFormatter().format(record))
+
+    assert entry["msg"] == "hello there"
+    assert entry["route"] == "/x"
+    assert entry["level"] == "INFO"
@@ -0,0 +1,57 @@
+from datetime import datetime
+
+import mongomock
+import pytest
+from bson.objectid import ObjectId
+
+from cruise_common.pagination import build_keyset_query, decode_cursor, encode_cursor
+
+
+def test_cursor_round_trip_by_id():
+    last_id = ObjectId()
+
+    assert decode_cursor(encode_cursor("_id", {"_id": last_id})) == ("_id", None, last_id)
+
+
+def test_cursor_round_trip_by_datetime_field():
+    last_id = ObjectId()
+    created_at = datetime(2024, 5, 6, 7, 8, 9, 123000)
+
+    token = encode_cursor("created_at", {"_id": last_id, "created_at": created_at})
+
+    assert "=" not in token
+    assert decode_cursor(token) == ("created_at", created_at, last_id)
+
+
+def test_cursor_round_trip_with_missing_sort_value():
+    last_id = ObjectId()
+
+    assert decode_cursor(encode_cursor("updatedAt", {"_id": last_id})) == ("updatedAt", None, last_id)
+
+
+@pytest.mark.parametrize("token", ["", "not-base64!", "e30", encode_cursor("_id", {"_id": "nope"})])
+def test_invalid_cursors_raise_value_error(token):
+    with pytest.raises(ValueError):
+        decode_cursor(token)
+
+
+def test_walking_by_keyset_visits_every_document_once():
+    collection = mongomock.MongoClient().db.items
+    collection.insert_many(
+        [{"n": i, "updated": datetime(2024, 1, 1 + i % 3)} for i in range(10)]
+        + [{"n": 10 + i} for i in range(3)]  # no sort value: these come first
+    )
+    sort = [("updated", 1), ("_id", 1)]
+
+    seen, query = [], {}
+    while True:
+        page = list(collection.find(query).sort(sort).limit(4))
+        seen.extend(document["n"] for document in page)
+        if len(page) < 4:
+            break
+        order_by, value, last_id = decode_cursor(encode_cursor("updated", page[-1]))
+        query = build_keyset_query(order_by, value, last_id)
+
+    assert sorted(seen) == list(range(13))
+    assert len(seen) == 13
+    assert seen[:3] == [10, 11, 12]
@@ -0,0 +1,36 @@
+import json
+from datetime import datetime, timezone
+
+import pytest
+from bson.objectid import ObjectId
+
+from cruise_common import serialization
+
+DOCUMENT = {
+    "_id": ObjectId("65a1b2c3d4e5f60718293a4b"),
+    "created_at": datetime(2024, 1, 2, 3, 4, 5, 678000),
+    "updated_at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+    "tags": ["a", "b"],
+}
+EXPECTED = {
+    "_id": "65a1b2c3d4e5f60718293a4b",
+    "created_at": "2024-01-02T03:04:05.678000",
+    "updated_at": "2024-01-02T03:04:05+00:00",
+    "tags": ["a", "b"],
+}
+
+
+def test_object_ids_and_datetimes_as_strings():
+    assert json.loads(serialization.dumps(DOCUMENT)) == EXPECTED
+
+
+def test_standard_library_fallback_writes_the_same_json():
+    # The fallback branch of dumps_bytes, next to whichever one is active
+    fallback = json.dumps(DOCUMENT, default=serialization.mongo_default, separators=(",", ":")).encode()
+
+    assert serialization.dumps_bytes(DOCUMENT) == fallback
+
+
+def test_unknown_types_are_rejected():
+    with pytest.raises(TypeError):
+        serialization.dumps({"value": object()})
@@ -0,0 +1,80 @@
+"""
+Admission control for the FastAPI app, so cheap requests (a status change, a new report)
+stay fast while the dashboards' full-collection reads and exports spike. Route classes
+(AsyncRouteClass), limiters and token buckets are shared with the users API
+(cruise_common/admission.py); AdmissionMiddleware applies them per endpoint.
+
+Waiting requests cost no thread, but the slots bound how much of the run_db pool the
+heavy classes can occupy.
+"""
+from starlette.routing import Match
+
+from cruise_common.admission import Rejected
+from serialization import dumps_bytes
+
+
+class AdmissionMiddleware:
+    """
+    ASGI middleware admitting each HTTP request by the route class of its endpoint.
+    endpoint_classes maps endpoint function names to names of route_classes; requests to
+    unlisted endpoints are always admitted. A slot is held until the response, streamed
+    or not, has been sent.
+    """
+
+    def __init__(self, app, route_classes, endpoint_classes: dict, trust_forwarded: bool = False):
+        self.app = app
+        self.route_classes = {route_class.name: route_class for route_class in route_classes}
+        self.endpoint_classes = endpoint_classes
+        self.trust_forwarded = trust_forwarded
+
+    def route_class_for(self, scope):
+        # Routing happens after the middlewares, so match the app's routes here
+        for route in scope["app"].router.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                endpoint = child_scope.get("endpoint")
+                return self.route_classes.get(self.endpoint_classes.get(getattr(endpoint, "__name__", None)))
+        return None
+
+    def client_key(self, scope) -> str:
+        """The client's address; with trust_forwarded, the first X-Forwarded-For hop (behind a proxy)."""
+        if self.trust_forwarded:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    first_hop = value.decode("latin-1").split(",", 1)[0].strip()
+                    if first_hop:
+                        return first_hop
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route_class = self.route_class_for(scope)
+        if route_class is None:
+            await self.app(scope, receive, send)
+            return
+        try:
+            await route_class.admit(self.client_key(scope))
+        except Rejected as rejected:
+            await send_rejection(send, rejected)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            route_class.release()
+
+
+async def send_rejection(send, rejected: Rejected):
+    body = dumps_bytes({"detail": str(rejected)})
+    await send({
+        "type": "http.response.start",
+        "status": rejected.status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(rejected.retry_after).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
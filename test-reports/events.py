@@ -0,0 +1,50 @@
+"""
+Server-sent events for the reports change feed, on the shared hub (cruise_common/events.py).
+
+publish() may be called from any thread (run_db workers, the watcher thread); events
+reach the subscribers' asyncio queues through their event loop.
+"""
+import asyncio
+
+from cruise_common import events
+from cruise_common.events import CLOSE, close_on_shutdown, format_sse
+
+
+class Subscription:
+    def __init__(self, hub, queue_size: int):
+        """Create from inside the running event loop (EventHub.subscribe does)."""
+        self.hub = hub
+        self.loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=queue_size)
+
+    def deliver(self, item):
+        """Called with the hub lock held, from any thread."""
+        self.loop.call_soon_threadsafe(self._put, item)
+
+    def _put(self, item):
+        # A subscriber that cannot keep up is reset
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            while not self._queue.empty():
+                self._queue.get_nowait()
+            self._queue.put_nowait(self.hub.overflow_item(item))
+
+    async def stream(self, keepalive: float = 15.0):
+        """Yields SSE-formatted chunks until the hub closes, with a comment line when idle to detect disconnects."""
+        while True:
+            try:
+                item = await asyncio.wait_for(self._queue.get(), keepalive)
+            except asyncio.TimeoutError:
+                yield ": keepalive\n\n"
+                continue
+            if item is CLOSE:
+                return
+            yield format_sse(item)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub(events.EventHub):
+    subscription_class = Subscription
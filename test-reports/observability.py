@@ -0,0 +1,39 @@
+"""
+Request metrics for the FastAPI app: MetricsMiddleware times every request with the
+shared recorder (cruise_common/observability.py); tester.py serves render_metrics() at
+/metrics.
+"""
+from cruise_common.observability import (
+    MongoCommandTimer,
+    configure_logging,
+    finish_request,
+    render_metrics,
+    start_request,
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request by its route template and status."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        token = start_request()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope
+            route = getattr(scope.get("route"), "path", "unmatched")
+            finish_request(token, scope["method"], route, status)
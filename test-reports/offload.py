@@ -0,0 +1,115 @@
+"""
+Runs blocking work (pymongo, the storage client, image processing) on worker threads so
+async handlers never stall the event loop.
+
+Database, storage and image calls get separate capacity limiters: a slow object store
+cannot starve queries, and database concurrency matches the MongoClient pool so threads
+do not queue inside the driver. They are sized from the environment:
+
+    MONGO_MAX_POOL_SIZE        connections per MongoClient, and threads running DB calls (default 50)
+    MONGO_MIN_POOL_SIZE        connections kept open while idle (default 0)
+    MONGO_WAIT_QUEUE_TIMEOUT_MS  how long a DB call waits for a free connection (default 10000)
+    STORAGE_MAX_CONCURRENCY    threads running storage uploads (default 16)
+    IMAGE_WORKERS              threads resizing and encoding screenshots (default: CPU count)
+
+run_db_coalesced lets concurrent identical reads (many dashboards polling the same list)
+share one DB call instead of each taking a thread and a connection.
+"""
+import asyncio
+import functools
+import os
+
+from anyio import CapacityLimiter, to_thread
+
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "50"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+STORAGE_MAX_CONCURRENCY = int(os.getenv("STORAGE_MAX_CONCURRENCY", "16"))
+# Pillow releases the GIL while resizing and encoding, so threads use every core
+IMAGE_WORKERS = int(os.getenv("IMAGE_WORKERS", str(os.cpu_count() or 2)))
+
+
+def mongo_pool_options() -> dict:
+    """Keyword arguments for MongoClient matching the offload limits."""
+    return {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "waitQueueTimeoutMS": MONGO_WAIT_QUEUE_TIMEOUT_MS,
+    }
+
+
+class BlockingPool:
+    """A named, bounded set of worker threads for one kind of blocking call."""
+
+    def __init__(self, name: str, size: int):
+        self.name = name
+        self.size = size
+        self._limiter = None
+
+    @property
+    def limiter(self) -> CapacityLimiter:
+        # Created on first use, inside the running event loop
+        if self._limiter is None:
+            self._limiter = CapacityLimiter(self.size)
+        return self._limiter
+
+    async def run(self, func, *args, **kwargs):
+        """Calls func(*args, **kwargs) on a worker thread and returns its result."""
+        if kwargs:
+            func = functools.partial(func, *args, **kwargs)
+            args = ()
+        return await to_thread.run_sync(func, *args, limiter=self.limiter)
+
+
+db_pool = BlockingPool("db", MONGO_MAX_POOL_SIZE)
+storage_pool = BlockingPool("storage", STORAGE_MAX_CONCURRENCY)
+image_pool = BlockingPool("image", IMAGE_WORKERS)
+
+
+async def run_db(func, *args, **kwargs):
+    return await db_pool.run(func, *args, **kwargs)
+
+
+async def run_storage(func, *args, **kwargs):
+    return await storage_pool.run(func, *args, **kwargs)
+
+
+async def run_image(func, *args, **kwargs):
+    return await image_pool.run(func, *args, **kwargs)
+
+
+class SingleFlight:
+    """
+    Concurrent calls with the same key share one run: the first caller starts it and later
+    ones await its result (or exception). Nothing is kept once it finishes. A caller that
+    is cancelled, e.g. because its client went away, does not cancel the run for the others.
+    """
+
+    def __init__(self):
+        self._runs = {}
+
+    async def run(self, key, func, *args, **kwargs):
+        """Awaits func(*args, **kwargs), or the run already in flight for key."""
+        task = self._runs.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._runs[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+        return await asyncio.shield(task)
+
+    def _finished(self, key, task):
+        self._runs.pop(key, None)
+        # Retrieved here in case every caller was cancelled, so it is not logged as unhandled
+        if not task.cancelled():
+            task.exception()
+
+
+db_reads = SingleFlight()
+
+
+async def run_db_coalesced(key, func, *args, **kwargs):
+    """
+    run_db shared with concurrent calls having the same key. Put the collection version in
+    the key, so a read started after a write never joins one started before it.
+    """
+    return await db_reads.run(key, run_db, func, *args, **kwargs)
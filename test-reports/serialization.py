@@ -0,0 +1,15 @@
+"""
+JSON serialization for the test reports API.
+
+MongoJSONResponse renders with the shared serializers (cruise_common/serialization.py),
+which understand ObjectId and datetime, so handlers can hand it raw MongoDB documents
+without a jsonable_encoder pass. Datetimes are sent as ISO-8601 strings.
+"""
+from fastapi.responses import JSONResponse
+
+from cruise_common.serialization import dumps, dumps_bytes, loads, mongo_default
+
+
+class MongoJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        return dumps_bytes(content)
@@ -1,6 +1,6 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import axios from 'axios';
-import { Table, Button, Modal, Form, Input, Upload, message, Tag, Select, Space } from 'antd';
+import { Table, Button, Modal, Form, Input, Upload, message, Tag, Select, Space, Image } from 'antd';
 import { UploadOutlined } from '@ant-design/icons';
 
 // .env file has REACT_APP_API_URL set, e.g., REACT_APP_API_URL=http://localhost:8000
@@ -8,14 +8,29 @@ const API_BASE_URL = process.env.REACT_APP_API_URL;
 // BUCKET_NAME is handled on the backend, so it's not needed here unless you plan direct client-side Supabase uploads.
 // const BUCKET_NAME = process.env.REACT_APP_BUCKET_NAME; // Removed as it's not directly used here
 
+// Newest reports loaded into the table, which pages through them 10 at a time
+const REPORTS_LIMIT = 200;
+
+// Whether a report belongs in the table under the current filters
+const matchesFilters = (report, filters) =>
+  (!filters.status?.length || filters.status.includes(report.status)) &&
+  (!filters.tester_name || report.tester_name === filters.tester_name);
+
 const TestReportsAdmin = () => {
   const [state, setState] = useState({
     reports: [],
     loading: false,
     submitLoading: false,
-    isModalVisible: false
+    isModalVisible: false,
+    summary: null,
+    selectedRowKeys: [],
+    filters: { status: [], tester_name: '' }
   });
   const [form] = Form.useForm();
+  const eventsRef = useRef(null);
+  // Read by fetchReports, which the live feed's handlers call long after they were created
+  const filtersRef = useRef(state.filters);
+  const summaryTimerRef = useRef(null);
 
   const statusColors = {
     open: 'blue',
@@ -55,11 +70,32 @@ const TestReportsAdmin = () => {
       title: 'Screenshot',
       dataIndex: 'screenshot_url',
       key: 'screenshot_url',
-      render: url => url ? (
-        <a href={url} target="_blank" rel="noopener noreferrer">
-          View Image
-        </a>
-      ) : 'None',
+      render: (url, record) => {
+        // Screenshots upload in the background after the report is saved
+        if (record.screenshot_status === 'pending') return 'Uploading...';
+        if (record.screenshot_status === 'failed') return <Tag color="red">Upload failed</Tag>;
+        // Rows load the small thumbnail; the preview and original load only when opened
+        if (record.thumbnail_url) {
+          return (
+            <Space direction="vertical" size={0}>
+              <Image
+                width={80}
+                src={record.thumbnail_url}
+                preview={{ src: record.preview_url || url }}
+                loading="lazy"
+              />
+              <a href={url} target="_blank" rel="noopener noreferrer">
+                Original
+              </a>
+            </Space>
+          );
+        }
+        return url ? (
+          <a href={url} target="_blank" rel="noopener noreferrer">
+            View Image
+          </a>
+        ) : 'None';
+      },
     },
     {
       title: 'Actions',
@@ -67,7 +103,7 @@ const TestReportsAdmin = () => {
       render: (_, record) => (
         <Space size="middle">
           <Select
-            defaultValue={record.status}
+            value={record.status}
             style={{ width: 120 }}
             onChange={value => updateStatus(record.id, value)} // Changed record._id to record.id
           >
@@ -82,13 +118,67 @@ const TestReportsAdmin = () => {
 
   useEffect(() => {
     fetchReports();
+    fetchSummary();
   }, []);
 
+  // Live change feed: rows are patched from server-sent events instead of refetching the list.
+  // EventSource reconnects by itself and resumes from the last event it received.
+  useEffect(() => {
+    const events = new EventSource(`${API_BASE_URL}/reports/events`);
+    eventsRef.current = events;
+
+    events.addEventListener('report', event => {
+      const change = JSON.parse(event.data);
+      setState(prev => {
+        const others = prev.reports.filter(r => r.id !== change.id);
+        let reports;
+        if (change.op === 'delete' || !matchesFilters(change.report, filtersRef.current)) {
+          reports = others;
+        } else if (change.op === 'insert' && others.length === prev.reports.length) {
+          reports = [change.report, ...prev.reports].slice(0, REPORTS_LIMIT);
+        } else {
+          reports = prev.reports.map(r => r.id === change.id ? change.report : r);
+        }
+        return { ...prev, reports };
+      });
+      // One summary request for a burst of events, e.g. a bulk status change
+      clearTimeout(summaryTimerRef.current);
+      summaryTimerRef.current = setTimeout(fetchSummary, 300);
+    });
+
+    // Events may have been missed (server restart, client too far behind): reload once
+    events.addEventListener('reset', () => {
+      fetchReports();
+      fetchSummary();
+    });
+
+    return () => {
+      clearTimeout(summaryTimerRef.current);
+      events.close();
+    };
+  }, []);
+
+  const liveFeedConnected = () => eventsRef.current?.readyState === EventSource.OPEN;
+
+  // Status counts come from the server instead of being tallied over every report
+  const fetchSummary = async () => {
+    try {
+      const { data } = await axios.get(`${API_BASE_URL}/reports/summary`);
+      setState(prev => ({ ...prev, summary: data }));
+    } catch (error) {
+      console.error("Error fetching report summary:", error);
+    }
+  };
+
+  // The newest reports matching the filters, filtered and cut by the server
   const fetchReports = async () => {
+    const { status, tester_name } = filtersRef.current;
+    const params = { sort: '-created_at', limit: REPORTS_LIMIT };
+    if (status.length) params.status = status.join(',');
+    if (tester_name) params.tester_name = tester_name;
     try {
       setState(prev => ({ ...prev, loading: true }));
-      // Ensure the backend has a GET /reports/ endpoint
-      const { data } = await axios.get(`${API_BASE_URL}/reports`);
+      const { data } = await axios.get(`${API_BASE_URL}/reports`, { params });
       setState(prev => ({ ...prev, reports: data }));
     } catch (error) {
       console.error("Error fetching reports:", error); // Log the full error for debugging
@@ -98,14 +188,25 @@ const TestReportsAdmin = () => {
     }
   };
 
+  const updateFilters = (changes) => {
+    const filters = { ...filtersRef.current, ...changes };
+    filtersRef.current = filters;
+    setState(prev => ({ ...prev, filters, selectedRowKeys: [] }));
+    fetchReports();
+  };
+
   const updateStatus = async (reportId, status) => {
     try {
-      await axios.put(`${API_BASE_URL}/reports/${reportId}/status`, { status });
+      // The API takes the new status as a query parameter, not a JSON body
+      await axios.put(`${API_BASE_URL}/reports/${reportId}/status`, null, { params: { status } });
       setState(prev => ({
         ...prev,
         // Map based on `id` now that backend returns 'id' instead of '_id'
-        reports: prev.reports.map(r => r.id === reportId ? { ...r, status } : r)
+        reports: prev.reports
+          .map(r => r.id === reportId ? { ...r, status } : r)
+          .filter(r => matchesFilters(r, filtersRef.current))
       }));
+      fetchSummary();
       message.success('Status updated');
     } catch (error) {
       console.error("Error updating status:", error); // Log the full error for debugging
@@ -113,6 +214,31 @@ const TestReportsAdmin = () => {
     }
   };
 
+  // One request for every selected row, e.g. closing out a release
+  const updateSelectedStatus = async (status) => {
+    try {
+      const { data } = await axios.put(`${API_BASE_URL}/reports/status`, {
+        status,
+        ids: state.selectedRowKeys
+      });
+      const updatedIds = new Set(
+        data.results.filter(r => r.outcome !== 'not_found' && r.outcome !== 'invalid_id').map(r => r.id)
+      );
+      setState(prev => ({
+        ...prev,
+        selectedRowKeys: [],
+        reports: prev.reports
+          .map(r => updatedIds.has(r.id) ? { ...r, status } : r)
+          .filter(r => matchesFilters(r, filtersRef.current))
+      }));
+      fetchSummary();
+      message.success(`${data.updated} report(s) updated`);
+    } catch (error) {
+      console.error("Error updating statuses:", error);
+      message.error(error.response?.data?.detail || 'Bulk update failed');
+    }
+  };
+
   const handleSubmit = async () => {
     try {
       setState(prev => ({ ...prev, submitLoading: true }));
@@ -136,7 +262,11 @@ const TestReportsAdmin = () => {
         isModalVisible: false,
         submitLoading: false
       }));
-      fetchReports(); // Refresh the list of reports
+      // With the live feed connected the new report arrives as an event
+      if (!liveFeedConnected()) {
+        fetchReports(); // Refresh the list of reports
+        fetchSummary();
+      }
     } catch (error) {
       console.error("Error creating report:", error); // Log the full error for debugging
       message.error(error.response?.data?.detail || 'Failed to create report');
@@ -156,15 +286,60 @@ const TestReportsAdmin = () => {
     <div style={{ padding: '24px' }}>
       <div style={{ marginBottom: '16px', display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
         <h1>Test Reports</h1>
+        {state.summary && (
+          <Space>
+            {Object.entries(state.summary.by_status).map(([status, count]) => (
+              <Tag key={status} color={statusColors[status]}>
+                {status.replace('_', ' ').toUpperCase()}: {count}
+              </Tag>
+            ))}
+          </Space>
+        )}
+        <Select
+          placeholder={`Set status of ${state.selectedRowKeys.length} selected`}
+          value={null}
+          disabled={state.selectedRowKeys.length === 0}
+          style={{ width: 220 }}
+          onChange={updateSelectedStatus}
+        >
+          <Select.Option value="open">Open</Select.Option>
+          <Select.Option value="in_progress">In Progress</Select.Option>
+          <Select.Option value="resolved">Resolved</Select.Option>
+        </Select>
         <Button type="primary" onClick={() => setState(prev => ({ ...prev, isModalVisible: true }))}>
           Create New Report
         </Button>
       </div>
 
+      <Space style={{ marginBottom: '16px' }}>
+        <Select
+          mode="multiple"
+          allowClear
+          placeholder="All statuses"
+          value={state.filters.status}
+          style={{ minWidth: 220 }}
+          onChange={status => updateFilters({ status })}
+        >
+          <Select.Option value="open">Open</Select.Option>
+          <Select.Option value="in_progress">In Progress</Select.Option>
+          <Select.Option value="resolved">Resolved</Select.Option>
+        </Select>
+        <Input.Search
+          allowClear
+          placeholder="Tester name"
+          style={{ width: 220 }}
+          onSearch={value => updateFilters({ tester_name: value.trim() })}
+        />
+      </Space>
+
       <Table
         columns={columns}
         dataSource={state.reports}
         rowKey="id" // IMPORTANT: Changed from "_id" to "id" to match backend response
+        rowSelection={{
+          selectedRowKeys: state.selectedRowKeys,
+          onChange: keys => setState(prev => ({ ...prev, selectedRowKeys: keys }))
+        }}
         loading={state.loading}
         pagination={{ pageSize: 10 }}
       />
@@ -0,0 +1,79 @@
+"""
+Object storage backends for report screenshots.
+
+STORAGE_BACKEND selects one:
+    supabase  (default) Supabase Storage via SUPABASE_URL / SUPABASE_KEY
+    local     files under LOCAL_STORAGE_ROOT, served by this app at /local-storage and
+              linked as LOCAL_STORAGE_URL/<bucket>/<path>; for development and tests
+
+Backends are synchronous; callers run them through offload.run_storage.
+"""
+import os
+import shutil
+
+import supabase
+
+
+class StorageError(Exception):
+    pass
+
+
+class SupabaseStorage:
+    def __init__(self, url: str, key: str):
+        self.url = url
+        self.client = supabase.create_client(url, key)
+
+    def upload_file(self, bucket: str, path: str, source_path: str, content_type: str = None):
+        with open(source_path, "rb") as f:
+            data = f.read()
+        # Keys are content-addressed, so overwriting an existing object is harmless
+        options = {"upsert": "true"}
+        if content_type:
+            options["content-type"] = content_type
+        try:
+            self.client.storage.from_(bucket).upload(path, data, options)
+        except Exception as e:
+            raise StorageError(str(e)) from e
+
+    def public_url(self, bucket: str, path: str) -> str:
+        return f"{self.url}/storage/v1/object/public/{bucket}/{path}"
+
+
+class LocalStorage:
+    """Stand-in bucket on the local filesystem."""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.abspath(root)
+        self.base_url = base_url.rstrip("/")
+        os.makedirs(self.root, exist_ok=True)
+
+    def _target(self, bucket: str, path: str) -> str:
+        target = os.path.normpath(os.path.join(self.root, bucket, path))
+        if not target.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid object path: {bucket}/{path}")
+        return target
+
+    def upload_file(self, bucket: str, path: str, source_path: str, content_type: str = None):
+        target = self._target(bucket, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        try:
+            # Copy then rename, so a reader never sees a half-written object
+            shutil.copyfile(source_path, target + ".part")
+            os.replace(target + ".part", target)
+        except OSError as e:
+            raise StorageError(str(e)) from e
+
+    def public_url(self, bucket: str, path: str) -> str:
+        return f"{self.base_url}/{bucket}/{path}"
+
+
+def create_storage():
+    backend = os.getenv("STORAGE_BACKEND", "supabase").lower()
+    if backend == "local":
+        return LocalStorage(
+            os.getenv("LOCAL_STORAGE_ROOT", "local-storage"),
+            os.getenv("LOCAL_STORAGE_URL", "http://localhost:8000/local-storage"),
+        )
+    if backend == "supabase":
+        return SupabaseStorage(os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_KEY"))
+    raise ValueError(f"Unknown STORAGE_BACKEND {backend!r}; use 'supabase' or 'local'")
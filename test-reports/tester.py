@@ -1,22 +1,106 @@
 # tester.py
-from fastapi import FastAPI, HTTPException, UploadFile, File, Form
+from fastapi import FastAPI, HTTPException, UploadFile, File, Form, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
-from pymongo import MongoClient
-from datetime import datetime
-from typing import Optional
-import supabase
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.staticfiles import StaticFiles
+from contextlib import asynccontextmanager
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import OperationFailure
+from bson.objectid import ObjectId
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from collections import OrderedDict
+from typing import List, Optional
+import asyncio
+import hashlib
+import logging
+import threading
+import uuid
 from pydantic import BaseModel
 import os
 from dotenv import load_dotenv
 import uvicorn
-from fastapi.encoders import jsonable_encoder
+import sys
+# Code shared with the users API lives in cruise_common/ at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from serialization import MongoJSONResponse, dumps
+from compression import CompressionMiddleware
+from admission import AdmissionMiddleware
+import observability
+from observability import MetricsMiddleware, MongoCommandTimer
+from offload import mongo_pool_options, run_db, run_db_coalesced
+from storage import LocalStorage, create_storage
+from cruise_common.admission import AsyncRouteClass
+from cruise_common.change_stream import ChangeStreamWatcher
+from cruise_common.export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, export_chunks
+from cruise_common.pagination import build_keyset_query, decode_cursor, encode_cursor
+from events import EventHub, close_on_shutdown
+from upload_queue import UploadJob, UploadQueue, UploadTooLarge
 
 
 load_dotenv()
+observability.configure_logging()
+logger = logging.getLogger(__name__)
+
+@asynccontextmanager
+async def lifespan(app):
+    # Everything per process is set up here rather than at import, so each worker of a
+    # multi-process server gets its own MongoClient, upload workers and lease owner
+    global upload_owner
+    upload_owner = uuid.uuid4().hex
+    await run_db(connect_database)
+    warm_up_task = asyncio.create_task(warm_up())
+    upload_queue.start()
+    await requeue_pending_uploads()
+    lease_task = asyncio.create_task(maintain_upload_leases())
+    report_change_watcher.start()
+    close_on_shutdown(report_events)
+    yield
+    report_events.close()
+    warm_up_task.cancel()
+    lease_task.cancel()
+    report_change_watcher.stop(timeout=5)
+    await upload_queue.stop()
+    # Uploads cut short here are taken over by another worker right away
+    await run_db(release_upload_leases)
+    client.close()
 
 app = FastAPI(title="Test Reports Admin System",
               description="API for managing test reports with image uploads",
-              version="1.0.0")
+              version="1.0.0",
+              default_response_class=MongoJSONResponse,
+              lifespan=lifespan)
+
+# Admission control (see admission.py): the full-collection reads and bulk jobs get a few
+# slots per worker, so status changes and new reports are not stuck behind them. Added
+# first, so shed requests are still timed and get CORS headers.
+ADMISSION_ROUTE_CLASSES = [
+    AsyncRouteClass.from_env("list", concurrency=8, queue=32, queue_timeout=5, rate=10, burst=20),
+    AsyncRouteClass.from_env("bulk", concurrency=2, queue=2, queue_timeout=5, rate=0.2, burst=2),
+    AsyncRouteClass.from_env("stream", concurrency=100, queue=0, rate=1, burst=5),
+    AsyncRouteClass.from_env("write", rate=20, burst=40),
+]
+ADMISSION_ENDPOINT_CLASSES = {
+    "get_reports": "list",
+    "get_reports_summary": "list",
+    "export_reports": "bulk",
+    "update_status_bulk": "bulk",
+    "report_events_stream": "stream",
+    "create_report": "write",
+    "update_status": "write",
+}
+app.add_middleware(
+    AdmissionMiddleware,
+    route_classes=ADMISSION_ROUTE_CLASSES,
+    endpoint_classes=ADMISSION_ENDPOINT_CLASSES,
+    # Behind a reverse proxy, take the client from X-Forwarded-For (only safe when the proxy sets it)
+    trust_forwarded=os.getenv("ADMISSION_TRUST_FORWARDED", "0") == "1",
+)
+# Responses larger than this many bytes are gzip/brotli compressed when the client accepts it
+app.add_middleware(CompressionMiddleware, minimum_size=int(os.getenv("COMPRESS_MIN_SIZE", "1024")))
+# Request latency metrics; wraps admission control and compression so rejected and
+# compressed responses are timed too. CORSMiddleware, added after it, is the outermost layer
+app.add_middleware(MetricsMiddleware)
 
 # CORS configuration
 app.add_middleware(
@@ -27,74 +111,561 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# MongoDB configuration
+# MongoDB configuration. The client is created by connect_database() when the app starts,
+# never at import, so a pre-forking server cannot share one between workers.
 MONGO_URI = os.getenv("MONGO_URI")
-client = MongoClient(MONGO_URI)
-db = client.test_reports
-collection = db.test_report
-
-# Test the connection
-try:
-    client.admin.command('ping')
-    print("Successfully connected to MongoDB!")
-    db = client.test_reports    # Access your test_reports database
-except Exception as e:
-    print(f"Connection failed: {e}")
-
-# Supabase setup
-supabase_client = supabase.create_client(
-    os.getenv("SUPABASE_URL"),
-    os.getenv("SUPABASE_KEY")
+client = None
+db = None
+collection = None
+# Content-addressed screenshot index: one document per stored blob, with a reference count
+blobs_collection = None
+
+# Indexes backing the sort and filter fields of the reports API: equality filters first,
+# then the sort key with its _id tiebreak, which also serves created_at ranges
+REPORT_INDEXES = [
+    [("created_at", ASCENDING), ("_id", ASCENDING)],
+    [("status", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("tester_name", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("status", ASCENDING), ("tester_name", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+    [("updated_at", DESCENDING)],
+    [("screenshot_blob", ASCENDING)],
+]
+# Sparse, so it only holds the reports whose screenshot upload is still in progress
+PENDING_UPLOAD_INDEX = [("upload_job.spool", ASCENDING)]
+
+def ensure_indexes():
+    """Creates the report indexes; create_index is a no-op when an index already exists."""
+    for keys in REPORT_INDEXES:
+        try:
+            collection.create_index(keys)
+        except OperationFailure as e:
+            logger.warning(f"Could not create index {keys}: {e}")
+    try:
+        collection.create_index(PENDING_UPLOAD_INDEX, sparse=True)
+    except OperationFailure as e:
+        logger.warning(f"Could not create index {PENDING_UPLOAD_INDEX}: {e}")
+
+def connect_database():
+    """Creates this process's MongoClient and checks the connection."""
+    global client, db, collection, blobs_collection
+    # Pool size matches the DB offload threads (MONGO_MAX_POOL_SIZE etc., see offload.py)
+    client = MongoClient(MONGO_URI, event_listeners=[MongoCommandTimer()], **mongo_pool_options())
+    db = client.test_reports
+    collection = db.test_report
+    blobs_collection = db.screenshot_blobs
+    try:
+        client.admin.command('ping')
+        logger.info("Successfully connected to MongoDB!")
+        ensure_indexes()
+    except Exception as e:
+        logger.error(f"Connection failed: {e}")
+
+async def warm_up():
+    """
+    Caches the unfiltered summary, so the first dashboard loads of a new worker are cheap.
+    Started in the background once the worker serves: the $facet reads every report, which
+    can outlast the time the server gives a worker to start. Summaries requested meanwhile
+    join it (same coalescing key as the endpoint).
+    """
+    try:
+        version, _ = await run_db(reports_version)
+        await run_db_coalesced(("summary", version, dumps({})), get_summary, {}, version)
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {e}")
+
+# Screenshot storage: Supabase, or a local directory stand-in (STORAGE_BACKEND=local, see storage.py)
+storage = create_storage()
+if isinstance(storage, LocalStorage):
+    app.mount("/local-storage", StaticFiles(directory=storage.root), name="local-storage")
+
+# Screenshots are spooled to disk and uploaded by background workers after the report is saved
+MAX_SCREENSHOT_BYTES = int(os.getenv("MAX_SCREENSHOT_BYTES", str(10 * 1024 * 1024)))
+
+# Public URLs stored on a ready blob and copied onto every report that references it
+BLOB_URL_FIELDS = ("screenshot_url", "thumbnail_url", "preview_url")
+
+def blob_object_path(digest: str, filename: Optional[str]) -> str:
+    """Storage key derived from the content hash, keeping the original extension."""
+    extension = os.path.splitext(filename or "")[1].lower()
+    return f"test_screenshots/sha256/{digest[:2]}/{digest}{extension}"
+
+def claim_blob(blob_id: str, digest: str, bucket: str, object_path: str, size: int, content_type: Optional[str]):
+    """
+    Adds a reference to the blob, creating its index entry on first sight.
+    Returns (blob, owner): the blob document as it was before this call (None if new), and
+    whether the caller must upload it: the blob is new, or its last upload failed.
+    """
+    blob = blobs_collection.find_one_and_update(
+        {"_id": blob_id},
+        {"$inc": {"refcount": 1},
+         "$setOnInsert": {"sha256": digest, "bucket": bucket, "path": object_path, "size": size,
+                          "content_type": content_type, "status": "pending", "created_at": datetime.utcnow()}},
+        upsert=True,
+        return_document=ReturnDocument.BEFORE
+    )
+    if blob is None:
+        return None, True
+    if blob["status"] == "failed":
+        # Retry the upload with this copy; only one concurrent request wins the claim
+        claimed = blobs_collection.update_one({"_id": blob_id, "status": "failed"}, {"$set": {"status": "pending"}})
+        return blob, claimed.modified_count == 1
+    return blob, False
+
+def release_blob(blob_id: str, owner: bool):
+    """
+    Undoes claim_blob when the report referencing the blob could not be saved. An owner's
+    upload will not happen now: the blob and the reports already waiting on it fail, and
+    the next request with this content takes the upload over.
+    """
+    update = {"$inc": {"refcount": -1}}
+    if owner:
+        update["$set"] = {"status": "failed"}
+    blobs_collection.update_one({"_id": blob_id}, update)
+    if owner:
+        update_waiting_reports(blob_id, {
+            "$set": {"screenshot_status": "failed", "screenshot_error": "Screenshot upload failed",
+                     "updated_at": datetime.utcnow()}
+        })
+
+def finish_screenshot(job: UploadJob, blob_update: dict, report_update: dict):
+    """Applies an upload outcome to the blob and to every report still waiting on it."""
+    report_update = {"$set": {**report_update, "updated_at": datetime.utcnow()}, "$unset": {"upload_job": ""}}
+    if job.blob_id is None:
+        report = collection.find_one_and_update(
+            {"_id": ObjectId(job.report_id)}, report_update, return_document=ReturnDocument.AFTER
+        )
+        if report is not None:
+            publish_report_changes("update", [report])
+        return
+    blobs_collection.update_one({"_id": job.blob_id}, {"$set": blob_update})
+    update_waiting_reports(job.blob_id, report_update)
+
+def update_waiting_reports(blob_id: str, report_update: dict):
+    """Applies report_update to the reports still pending on the blob."""
+    waiting = {"screenshot_blob": blob_id, "screenshot_status": "pending"}
+    if report_change_watcher.active:
+        collection.update_many(waiting, report_update)
+        return
+    # Without the change stream the updated reports are read back for the live feed
+    report_ids = [report["_id"] for report in collection.find(waiting, {"_id": 1})]
+    collection.update_many({**waiting, "_id": {"$in": report_ids}}, report_update)
+    publish_report_changes("update", collection.find({"_id": {"$in": report_ids}}))
+
+def sync_report_with_blob(report: dict):
+    """Copies a finished blob's outcome onto a report inserted as pending, updating `report` too."""
+    blob = blobs_collection.find_one({"_id": report["screenshot_blob"]})
+    if blob is None or blob["status"] == "pending":
+        return
+    if blob["status"] == "ready":
+        update = {field: blob.get(field) for field in BLOB_URL_FIELDS}
+        update["screenshot_status"] = "uploaded"
+    else:
+        update = {"screenshot_status": "failed", "screenshot_error": "Screenshot upload failed"}
+    # A new updated_at moves the list version on, so clients revalidating the pending row get the synced one
+    update["updated_at"] = datetime.utcnow()
+    collection.update_one({"_id": report["_id"], "screenshot_status": "pending"}, {"$set": update})
+    report.update(update)
+
+async def mark_screenshot_uploaded(job: UploadJob, urls: dict):
+    await run_db(finish_screenshot, job, {**urls, "status": "ready"}, {**urls, "screenshot_status": "uploaded"})
+
+async def mark_screenshot_failed(job: UploadJob, error: str):
+    await run_db(finish_screenshot, job, {"status": "failed"}, {"screenshot_status": "failed", "screenshot_error": error})
+
+upload_queue = UploadQueue(
+    storage,
+    spool_dir=os.getenv("UPLOAD_SPOOL_DIR", "upload-spool"),
+    on_uploaded=mark_screenshot_uploaded,
+    on_failed=mark_screenshot_failed,
+    on_abandoned=lambda job: run_db(release_upload_lease, job.report_id),
+    workers=int(os.getenv("UPLOAD_WORKERS", "4")),
+    max_pending=int(os.getenv("UPLOAD_QUEUE_SIZE", "100")),
+    max_attempts=int(os.getenv("UPLOAD_MAX_ATTEMPTS", "5")),
 )
 
+def upload_job_for(report: dict) -> UploadJob:
+    job = report["upload_job"]
+    return UploadJob(
+        report_id=str(report["_id"]),
+        bucket=job["bucket"],
+        object_path=job["path"],
+        spool_path=os.path.join(upload_queue.spool_dir, job["spool"]),
+        content_type=job.get("content_type"),
+        blob_id=job.get("blob"),
+    )
+
+# Pending uploads are leased to the worker process that queued them. Every process renews
+# the leases of the jobs its queue holds a few times per UPLOAD_LEASE_SECONDS and takes over
+# uploads whose lease ran out, so uploads of a crashed or restarted worker, or whose outcome
+# could not be recorded, resume elsewhere and none runs twice.
+UPLOAD_LEASE_SECONDS = float(os.getenv("UPLOAD_LEASE_SECONDS", "60"))
+# Identifies this process's leases, set when the app starts; a restarted process gets a new one
+upload_owner = None
+
+def upload_lease_deadline() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=UPLOAD_LEASE_SECONDS)
+
+def claim_expired_upload():
+    """Leases one pending upload whose owner stopped renewing it. Returns the report or None."""
+    return collection.find_one_and_update(
+        {
+            "upload_job.spool": {"$exists": True},
+            "screenshot_status": "pending",
+            "$or": [
+                {"upload_job.lease_until": {"$lt": datetime.utcnow()}},
+                # Queued before uploads were leased
+                {"upload_job.lease_until": {"$exists": False}},
+            ],
+        },
+        {"$set": {"upload_job.owner": upload_owner, "upload_job.lease_until": upload_lease_deadline()}},
+        projection={"upload_job": 1},
+    )
+
+def renew_upload_leases(report_ids):
+    """Extends this process's leases on the given reports, the uploads its queue still holds."""
+    if not report_ids:
+        return
+    collection.update_many(
+        {
+            "_id": {"$in": [ObjectId(report_id) for report_id in report_ids]},
+            "upload_job.spool": {"$exists": True},
+            "upload_job.owner": upload_owner,
+        },
+        {"$set": {"upload_job.lease_until": upload_lease_deadline()}}
+    )
+
+def release_upload_lease(report_id: str):
+    """Expires this process's lease on one upload its queue gave up, so it is claimed again."""
+    collection.update_one(
+        {"_id": ObjectId(report_id), "upload_job.owner": upload_owner},
+        {"$set": {"upload_job.lease_until": datetime.utcnow()}}
+    )
+
+def release_upload_leases():
+    """Expires this process's leases on shutdown, so other workers take the uploads over at once."""
+    collection.update_many(
+        {"upload_job.spool": {"$exists": True}, "upload_job.owner": upload_owner},
+        {"$set": {"upload_job.lease_until": datetime.utcnow()}}
+    )
+
+async def requeue_pending_uploads():
+    """Takes over uploads whose worker went away; marks them failed if their spool file is gone."""
+    requeued = 0
+    while upload_queue.reserve():
+        try:
+            report = await run_db(claim_expired_upload)
+        except Exception as e:
+            upload_queue.release()
+            logger.warning(f"Could not look for pending screenshot uploads: {e}")
+            return
+        if report is None:
+            upload_queue.release()
+            break
+        job = upload_job_for(report)
+        if os.path.exists(job.spool_path):
+            upload_queue.submit(job)
+            requeued += 1
+        else:
+            upload_queue.release()
+            await mark_screenshot_failed(job, "Spooled screenshot was lost before upload")
+    if requeued:
+        logger.info(f"Requeued {requeued} pending screenshot uploads")
+
+async def maintain_upload_leases():
+    while True:
+        await asyncio.sleep(UPLOAD_LEASE_SECONDS / 3)
+        try:
+            await run_db(renew_upload_leases, list(upload_queue.held))
+        except Exception as e:
+            logger.warning(f"Could not renew screenshot upload leases: {e}")
+        await requeue_pending_uploads()
+
 class TestReport(BaseModel):
+    id: Optional[str] = None
     description: str
     screenshot_url: Optional[str] = None
+    screenshot_status: Optional[str] = None
+    # Downscaled WebP copies for listings; the original stays at screenshot_url
+    thumbnail_url: Optional[str] = None
+    preview_url: Optional[str] = None
     created_at: datetime = datetime.now()
     status: str = "open"
     tester_name: Optional[str] = None
 
+class ReportFilter(BaseModel):
+    status: Optional[str] = None
+    tester_name: Optional[str] = None
+    created_from: Optional[datetime] = None
+    created_to: Optional[datetime] = None
+
+class BulkStatusUpdate(BaseModel):
+    """Target status for the reports named by `ids`, or for every report matching `filter`."""
+    status: str
+    ids: Optional[List[str]] = None
+    filter: Optional[ReportFilter] = None
+
+# Most reports one bulk status change may touch
+BULK_STATUS_MAX_REPORTS = int(os.getenv("BULK_STATUS_MAX_REPORTS", "5000"))
+
+# Filters and sorts accepted by GET /reports. sort is a field name, '-' prefixed for descending.
+REPORT_STATUSES = ["open", "in_progress", "resolved"]
+REPORT_SORT_FIELDS = ["_id", "created_at", "updated_at"]
+
+# /reports/summary results kept per filter combination, valid until the collection changes
+SUMMARY_CACHE_SIZE = int(os.getenv("SUMMARY_CACHE_SIZE", "64"))
+summary_cache = OrderedDict()
+summary_cache_lock = threading.Lock()
+
+# Keyset (cursor) pagination: sort keys a client may walk the collection by
+CURSOR_ORDER_FIELDS = ["_id", "created_at"]
+MAX_PAGE_SIZE = 1000
+# A plain GET /reports returns the newest reports, at most this many unless ?limit= says otherwise
+DEFAULT_REPORT_SORT = "-created_at"
+DEFAULT_REPORT_LIMIT = int(os.getenv("DEFAULT_REPORT_LIMIT", "200"))
+
+# Columns of a report export (see cruise_common/export.py)
+EXPORT_FIELDS = ["id", "description", "screenshot_url", "created_at", "status", "tester_name"]
+
+# Write endpoints accept ?return=minimal|full: 'full' echoes the written report, 'minimal' only its id
+RETURN_PREFERENCES = ("full", "minimal")
+
+def check_return_preference(preference: str) -> str:
+    if preference not in RETURN_PREFERENCES:
+        raise HTTPException(status_code=400, detail="return must be 'minimal' or 'full'")
+    return preference
+
+def format_report(report):
+    """Replaces the MongoDB _id with a string id and drops internal upload bookkeeping."""
+    report["id"] = str(report["_id"])
+    del report["_id"]
+    report.pop("upload_job", None)
+    report.pop("screenshot_blob", None)
+    return report
+
+# Live change feed (GET /reports/events). Events buffered for reconnecting clients,
+# and seconds between keepalive comments on idle connections.
+EVENT_BUFFER_SIZE = int(os.getenv("EVENT_BUFFER_SIZE", "1000"))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv("EVENT_KEEPALIVE_SECONDS", "15"))
+report_events = EventHub(buffer_size=EVENT_BUFFER_SIZE)
+
+def report_event(op: str, report: dict) -> dict:
+    """Payload of a 'report' event: the operation, the report id and the shaped report (None for deletes)."""
+    return {"op": op, "id": str(report["_id"]), "report": None if op == "delete" else format_report(dict(report))}
+
+def publish_report_changes(op: str, reports):
+    """Called by the write paths. While the change stream runs it publishes every write itself."""
+    if not report_change_watcher.active:
+        for report in reports:
+            report_events.publish("report", report_event(op, report))
+
+def handle_report_change(change: dict):
+    """Change stream callback: forwards writes from any process to the live feed."""
+    operation = change.get("operationType")
+    if operation in ("insert", "update", "replace"):
+        # Missing when the report was deleted before the lookup; its delete event follows
+        document = change.get("fullDocument")
+        if document is not None:
+            report_events.publish("report", report_event("insert" if operation == "insert" else "update", document))
+    elif operation == "delete":
+        report_events.publish("report", report_event("delete", change["documentKey"]))
+    elif operation in ("drop", "invalidate"):
+        report_events.reset()
+
+report_change_watcher = ChangeStreamWatcher(
+    lambda: collection,
+    handle_report_change,
+    on_reset=report_events.reset,
+    full_document="updateLookup"
+)
+
+def format_export_row(report: dict) -> dict:
+    """Flattens a report into the export columns with ISO-8601 dates."""
+    created_at = report.get("created_at")
+    return {
+        "id": str(report["_id"]),
+        "description": report.get("description", ""),
+        "screenshot_url": report.get("screenshot_url"),
+        "created_at": created_at.isoformat() if isinstance(created_at, datetime) else created_at,
+        "status": report.get("status", "open"),
+        "tester_name": report.get("tester_name"),
+    }
+
+def to_stored_time(value: datetime) -> datetime:
+    """created_at is stored as naive local time; converts timezone-aware bounds to match."""
+    return value.astimezone().replace(tzinfo=None) if value.tzinfo else value
+
+def build_report_filter(status: Optional[str] = None, tester_name: Optional[str] = None,
+                        created_from: Optional[datetime] = None, created_to: Optional[datetime] = None) -> dict:
+    """MongoDB filter for the list query parameters; status may list several values separated by commas."""
+    query = {}
+    if status:
+        statuses = [value.strip() for value in status.split(",") if value.strip()]
+        invalid = [value for value in statuses if value not in REPORT_STATUSES]
+        if invalid:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Invalid status {', '.join(invalid)}. Must be one of: {', '.join(REPORT_STATUSES)}"
+            )
+        query["status"] = statuses[0] if len(statuses) == 1 else {"$in": statuses}
+    if tester_name is not None:
+        query["tester_name"] = tester_name
+    created_range = {}
+    if created_from is not None:
+        created_range["$gte"] = to_stored_time(created_from)
+    if created_to is not None:
+        created_range["$lt"] = to_stored_time(created_to)
+    if created_range:
+        query["created_at"] = created_range
+    return query
+
+def parse_report_sort(sort: str) -> list:
+    """Turns 'created_at' / '-created_at' into a sort spec with an _id tiebreak in the same direction."""
+    field = sort.lstrip("-")
+    if field not in REPORT_SORT_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"sort must be one of: {', '.join(REPORT_SORT_FIELDS)} (prefix with '-' for descending)"
+        )
+    direction = DESCENDING if sort.startswith("-") else ASCENDING
+    return [(field, direction)] if field == "_id" else [(field, direction), ("_id", direction)]
+
+def reports_version():
+    """
+    Returns (version, last_modified) for the reports collection without reading any reports:
+    the metadata document count plus the newest _id and updated_at (UTC), each an index lookup.
+    """
+    newest = collection.find_one({}, {"_id": 1}, sort=[("_id", DESCENDING)])
+    latest = collection.find_one({"updated_at": {"$ne": None}}, {"updated_at": 1}, sort=[("updated_at", DESCENDING)])
+    last_modified = latest["updated_at"].replace(tzinfo=timezone.utc) if latest else None
+    version = f"{collection.estimated_document_count()}:{newest['_id'] if newest else ''}:{last_modified.isoformat() if last_modified else ''}"
+    return version, last_modified
+
+def make_etag(*parts) -> str:
+    return '"' + hashlib.sha1("|".join(str(part) for part in parts).encode()).hexdigest() + '"'
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    """Evaluates If-None-Match (preferred) or If-Modified-Since against the current validators."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return "*" in candidates or etag in candidates
+    if_modified_since = request.headers.get("if-modified-since")
+    if last_modified and if_modified_since:
+        try:
+            return last_modified.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+def validator_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    """ETag/Last-Modified, plus no-cache so clients revalidate before reusing a cached copy."""
+    # Weak, so the same validator covers compressed and uncompressed bodies
+    headers = {"ETag": "W/" + etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+    return headers
+
 @app.post("/reports", response_model=TestReport)
 @app.post("/reports/", response_model=TestReport)
 async def create_report(
     description: str = Form(...),
     bucket_name: str = Form("test-report-bucket"),
     tester_name: Optional[str] = Form(None),
-    file: Optional[UploadFile] = File(None)
+    file: Optional[UploadFile] = File(None),
+    return_preference: str = Query("full", alias="return")
 ):
-    screenshot_url = None
-    
-    if file:
-        try:
-            file_contents = await file.read()
-            file_path = f"test_screenshots/{datetime.now().timestamp()}_{file.filename}"
-            res = supabase_client.storage.from_(bucket_name).upload(
-                file_path,
-                file_contents
-            )
-            screenshot_url = f"{os.getenv('SUPABASE_URL')}/storage/v1/object/public/{bucket_name}/{file_path}"
-        except Exception as e:
-            print(f"Supabase upload error: {e}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to upload image to {bucket_name}: {str(e)}"
-            )
+    check_return_preference(return_preference)
     report_data = {
         "description": description,
-        "screenshot_url": screenshot_url,
+        "screenshot_url": None,
         "created_at": datetime.now(),
+        "updated_at": datetime.utcnow(),
         "status": "open",
         "tester_name": tester_name
     }
+
+    spool_path = None
+    blob_id = None
+    owner = False
+    if file:
+        if file.size is not None and file.size > MAX_SCREENSHOT_BYTES:
+            raise HTTPException(status_code=413, detail=f"Screenshot exceeds the {MAX_SCREENSHOT_BYTES} byte limit")
+        # Backpressure: refuse before spooling when the upload workers are too far behind
+        if not upload_queue.reserve():
+            raise HTTPException(
+                status_code=503,
+                detail="Too many screenshot uploads in progress, try again later",
+                headers={"Retry-After": str(upload_queue.retry_after_seconds())}
+            )
+        try:
+            spool_path, digest, size = await upload_queue.spool(file, MAX_SCREENSHOT_BYTES)
+        except UploadTooLarge as e:
+            upload_queue.release()
+            raise HTTPException(status_code=413, detail=str(e))
+        except Exception as e:
+            upload_queue.release()
+            logger.exception("Screenshot spooling failed")
+            raise HTTPException(status_code=500, detail=f"Failed to read screenshot: {str(e)}")
+
+        blob_id = f"{bucket_name}:{digest}"
+        try:
+            blob, owner = await run_db(
+                claim_blob, blob_id, digest, bucket_name,
+                blob_object_path(digest, file.filename), size, file.content_type
+            )
+        except Exception as e:
+            upload_queue.discard(spool_path)
+            upload_queue.release()
+            raise HTTPException(status_code=500, detail=f"Failed to create report: {str(e)}")
+        report_data["screenshot_blob"] = blob_id
+        if owner:
+            report_data["screenshot_status"] = "pending"
+            report_data["upload_job"] = {
+                "bucket": bucket_name,
+                "path": blob["path"] if blob else blob_object_path(digest, file.filename),
+                "spool": os.path.basename(spool_path),
+                "content_type": file.content_type,
+                "blob": blob_id,
+                "owner": upload_owner,
+                "lease_until": upload_lease_deadline(),
+            }
+        else:
+            # The same content is already stored, or being stored by another request
+            upload_queue.discard(spool_path)
+            upload_queue.release()
+            spool_path = None
+            if blob["status"] == "ready":
+                report_data.update({field: blob.get(field) for field in BLOB_URL_FIELDS})
+                report_data["screenshot_status"] = "uploaded"
+            else:
+                report_data["screenshot_status"] = "pending"
+
     try:
-        result = collection.insert_one(report_data)
-        report_data["id"] = str(result.inserted_id)
-        return report_data
+        result = await run_db(collection.insert_one, report_data)
     except Exception as e:
+        if blob_id:
+            try:
+                await run_db(release_blob, blob_id, owner)
+            except Exception:
+                logger.exception(f"Could not release screenshot blob {blob_id}")
+        if spool_path:
+            upload_queue.discard(spool_path)
+            upload_queue.release()
         raise HTTPException(
             status_code=500,
             detail=f"Failed to create report: {str(e)}"
         )
+    if spool_path:
+        # The report is saved; the screenshot follows once a worker has uploaded it
+        upload_queue.submit(upload_job_for(report_data))
+    elif report_data.get("screenshot_status") == "pending":
+        # The upload this report waits on may have finished before the insert landed
+        await run_db(sync_report_with_blob, report_data)
+    publish_report_changes("insert", [report_data])
+    if return_preference == "minimal":
+        return MongoJSONResponse({"id": str(result.inserted_id)})
+    # insert_one set _id on report_data, so the response is built from it without a re-read
+    return format_report(report_data)
 
 @app.get("/")
 async def root():
@@ -104,49 +675,350 @@ async def root():
             "docs": "/docs",
             "create_report": "/reports/ (POST)",
             "get_reports": "/reports/ (GET)",
-            "update_status": "/reports/{id}/status (PUT)"
+            "reports_summary": "/reports/summary (GET)",
+            "update_status": "/reports/{id}/status (PUT)",
+            "update_status_bulk": "/reports/status (PUT)",
+            "report_events": "/reports/events (GET, text/event-stream)"
         }
     }
 
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(observability.render_metrics(), media_type="text/plain; version=0.0.4")
+
 @app.put("/reports/{report_id}/status", response_model=TestReport)
 @app.put("/reports/{report_id}/status/", response_model=TestReport)
-async def update_status(report_id: str, status: str):
-    if status not in ["open", "in_progress", "resolved"]:
+async def update_status(
+    report_id: str,
+    status: str,
+    return_preference: str = Query("full", alias="return")
+):
+    check_return_preference(return_preference)
+    if status not in REPORT_STATUSES:
         raise HTTPException(
             status_code=400,
             detail="Invalid status value. Must be 'open', 'in_progress', or 'resolved'"
         )
     try:
-        result = collection.update_one(
-            {"_id": report_id},
-            {"$set": {"status": status}}
+        obj_id = ObjectId(report_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid report ID format")
+    try:
+        # Update and read back the report in a single round trip
+        report = await run_db(
+            collection.find_one_and_update,
+            {"_id": obj_id},
+            {"$set": {"status": status, "updated_at": datetime.utcnow()}},
+            return_document=ReturnDocument.AFTER
         )
-        if result.modified_count == 0:
-            raise HTTPException(status_code=404, detail="Report not found")
-        report = collection.find_one({"_id": report_id})
-        if report:
-            report["id"] = str(report["_id"])
-            del report["_id"]
-        return report
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to update report: {str(e)}"
         )
+    if report is None:
+        raise HTTPException(status_code=404, detail="Report not found")
+    publish_report_changes("update", [report])
+    if return_preference == "minimal":
+        return MongoJSONResponse({"id": str(report["_id"]), "status": report["status"]})
+    return format_report(report)
+
+def bulk_update_status(ids: Optional[List[str]], filters: Optional[dict], status: str) -> dict:
+    """
+    Sets `status` on the reports named by ids (or matching filters) with one update_many.
+    Returns per-id outcomes: updated, unchanged (already in that status), not_found or invalid_id.
+    """
+    outcomes = {}
+    if ids is not None:
+        # Outcomes are keyed by the ids as sent, in request order
+        requested = {}
+        for report_id in ids:
+            outcomes[report_id] = None
+            try:
+                requested[ObjectId(report_id)] = report_id
+            except Exception:
+                outcomes[report_id] = "invalid_id"
+        # One read to tell missing and already-transitioned reports apart from the ones to update
+        current = {report["_id"]: report["status"]
+                   for report in collection.find({"_id": {"$in": list(requested)}}, {"status": 1})}
+        to_update = []
+        for obj_id, report_id in requested.items():
+            if obj_id not in current:
+                outcomes[report_id] = "not_found"
+            elif current[obj_id] == status:
+                outcomes[report_id] = "unchanged"
+            else:
+                to_update.append(obj_id)
+    else:
+        # Resolve the filter to ids first, so the response can name every report it changed.
+        # $and, because the filter may have a status condition of its own.
+        to_update = [report["_id"] for report in collection.find(
+            {"$and": [filters, {"status": {"$ne": status}}]}, {"_id": 1}
+        ).limit(BULK_STATUS_MAX_REPORTS + 1)]
+        if len(to_update) > BULK_STATUS_MAX_REPORTS:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Filter matches more than {BULK_STATUS_MAX_REPORTS} reports; narrow it down"
+            )
+        requested = {obj_id: str(obj_id) for obj_id in to_update}
+
+    updated = 0
+    if to_update:
+        result = collection.update_many(
+            {"_id": {"$in": to_update}, "status": {"$ne": status}},
+            {"$set": {"status": status, "updated_at": datetime.utcnow()}}
+        )
+        updated = result.modified_count
+        if not report_change_watcher.active:
+            publish_report_changes("update", collection.find({"_id": {"$in": to_update}}))
+    for obj_id in to_update:
+        outcomes[requested[obj_id]] = "updated"
+    return {
+        "status": status,
+        "updated": updated,
+        "results": [{"id": report_id, "outcome": outcome} for report_id, outcome in outcomes.items()],
+    }
+
+@app.put("/reports/status")
+@app.put("/reports/status/")
+async def update_status_bulk(
+    update: BulkStatusUpdate,
+    return_preference: str = Query("full", alias="return")
+):
+    """
+    Moves many reports to one status in a single update_many, e.g. closing out a release:
+    {"status": "resolved", "ids": [...]} or {"status": "resolved", "filter": {"status": "in_progress"}}.
+    """
+    check_return_preference(return_preference)
+    if update.status not in REPORT_STATUSES:
+        raise HTTPException(
+            status_code=400,
+            detail="Invalid status value. Must be 'open', 'in_progress', or 'resolved'"
+        )
+    if (update.ids is None) == (update.filter is None):
+        raise HTTPException(status_code=400, detail="Provide either ids or filter")
+    filters = None
+    if update.ids is not None:
+        if len(update.ids) > BULK_STATUS_MAX_REPORTS:
+            raise HTTPException(status_code=400, detail=f"At most {BULK_STATUS_MAX_REPORTS} ids per request")
+    else:
+        filters = build_report_filter(**update.filter.model_dump())
+        if not filters:
+            raise HTTPException(status_code=400, detail="filter must set at least one condition")
+    try:
+        outcome = await run_db(bulk_update_status, update.ids, filters, update.status)
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to update reports: {str(e)}")
+    if return_preference == "minimal":
+        outcome.pop("results")
+    return MongoJSONResponse(outcome)
+
+@app.get("/reports/export")
+@app.get("/reports/export/")
+def export_reports(export_format: str = Query("ndjson", alias="format")):
+    """
+    Streams every report as NDJSON (default) or CSV from a batched cursor.
+    Memory use does not depend on the number of reports.
+    """
+    export_format = export_format.lower()
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        )
+    projection = {field: 1 for field in EXPORT_FIELDS if field != "id"}
+
+    def open_reports_cursor():
+        return collection.find({}, projection).sort("_id", ASCENDING).batch_size(EXPORT_BATCH_SIZE)
+
+    # A plain generator is iterated in the threadpool, so the blocking cursor stays off the event loop
+    return StreamingResponse(
+        export_chunks(open_reports_cursor, export_format, EXPORT_FIELDS, format_export_row),
+        media_type=EXPORT_FORMATS[export_format],
+        headers={"Content-Disposition": f"attachment; filename=reports.{export_format}"}
+    )
+
+def summarize_reports(query: dict) -> dict:
+    """Report counts by status and by tester, computed in one aggregation."""
+    result = next(collection.aggregate([
+        {"$match": query},
+        {"$facet": {
+            "by_status": [{"$group": {"_id": "$status", "count": {"$sum": 1}}}],
+            "by_tester": [{"$group": {"_id": {"tester_name": "$tester_name", "status": "$status"},
+                                      "count": {"$sum": 1}}}],
+        }},
+    ]))
+    by_status = {status: 0 for status in REPORT_STATUSES}
+    for group in result["by_status"]:
+        by_status[group["_id"]] = group["count"]
+    testers = {}
+    for group in result["by_tester"]:
+        tester = testers.setdefault(group["_id"].get("tester_name"), {status: 0 for status in REPORT_STATUSES})
+        tester[group["_id"].get("status")] = group["count"]
+    by_tester = [
+        {"tester_name": name, "total": sum(counts.values()), "by_status": counts}
+        for name, counts in testers.items()
+    ]
+    by_tester.sort(key=lambda tester: (-tester["total"], tester["tester_name"] or ""))
+    return {"total": sum(by_status.values()), "by_status": by_status, "by_tester": by_tester}
+
+def get_summary(query: dict, version: str) -> dict:
+    """summarize_reports, cached per filter until the collection version changes."""
+    key = dumps(query)
+    with summary_cache_lock:
+        cached = summary_cache.get(key)
+        if cached and cached[0] == version:
+            summary_cache.move_to_end(key)
+            return cached[1]
+    summary = summarize_reports(query)
+    with summary_cache_lock:
+        summary_cache[key] = (version, summary)
+        summary_cache.move_to_end(key)
+        while len(summary_cache) > SUMMARY_CACHE_SIZE:
+            summary_cache.popitem(last=False)
+    return summary
+
+@app.get("/reports/summary")
+@app.get("/reports/summary/")
+async def get_reports_summary(
+    request: Request,
+    tester_name: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None
+):
+    """Counts by status and by tester, for triage dashboards."""
+    query = build_report_filter(tester_name=tester_name, created_from=created_from, created_to=created_to)
+    try:
+        version, last_modified = await run_db(reports_version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to summarize reports: {str(e)}")
+    etag = make_etag(version, request.url.path, request.url.query)
+    headers = validator_headers(etag, last_modified)
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    try:
+        summary = await run_db_coalesced(("summary", version, dumps(query)), get_summary, query, version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to summarize reports: {str(e)}")
+    return MongoJSONResponse(summary, headers=headers)
+
+@app.get("/reports/events")
+@app.get("/reports/events/")
+async def report_events_stream(request: Request, last_event_id: Optional[str] = None):
+    """
+    Server-sent events: one 'report' event per created or updated report (status changes,
+    finished screenshot uploads), or 'reset' when the client has to reload. Reconnecting
+    clients send Last-Event-ID (EventSource does so automatically, or pass
+    ?last_event_id=) and receive what they missed.
+    """
+    subscription = report_events.subscribe(request.headers.get("last-event-id") or last_event_id)
+
+    async def stream():
+        try:
+            # Reconnect after 3s if the connection drops
+            yield "retry: 3000\n\n"
+            async for chunk in subscription.stream(keepalive=EVENT_KEEPALIVE_SECONDS):
+                yield chunk
+        finally:
+            subscription.close()
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 @app.get("/reports")
 @app.get("/reports/")
-async def get_reports():
+async def get_reports(
+    request: Request,
+    cursor: Optional[str] = None,
+    page_size: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    order_by: str = "_id",
+    status: Optional[str] = None,
+    tester_name: Optional[str] = None,
+    created_from: Optional[datetime] = None,
+    created_to: Optional[datetime] = None,
+    sort: str = DEFAULT_REPORT_SORT,
+    limit: int = Query(DEFAULT_REPORT_LIMIT, ge=1, le=MAX_PAGE_SIZE)
+):
+    """
+    Lists reports, optionally filtered by status (comma-separated), tester_name and a
+    created_from/created_to range. Without page_size or cursor the result is a plain
+    list in `sort` order (newest first by default), cut at `limit`; with them it is a
+    keyset page in order_by order.
+    """
+    query = build_report_filter(status, tester_name, created_from, created_to)
+    sort_spec = parse_report_sort(sort)
     try:
-        reports = list(collection.find())
-        for report in reports:
-            report["id"] = str(report["_id"])
-            del report["_id"]
-        return jsonable_encoder(reports)
+        version, last_modified = await run_db(reports_version)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch reports: {str(e)}")
+    etag = make_etag(version, request.url.path, request.url.query)
+    headers = validator_headers(etag, last_modified)
+    # Nothing changed since the client's copy: skip the query and the serialization
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+
+    # Clients walking the collection page by page pass page_size and then each next_cursor
+    if cursor is not None or page_size is not None:
+        page = await run_db(get_reports_by_cursor, cursor, page_size or 100, order_by, query)
+        return MongoJSONResponse(page, headers=headers)
+    try:
+        # Tabs polling the same list share one query
+        reports = await run_db_coalesced(
+            ("reports", version, dumps(query), dumps(sort_spec), limit), get_filtered_reports, query, sort_spec, limit
+        )
+        return MongoJSONResponse(reports, headers=headers)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to fetch reports: {str(e)}")
+
+def get_filtered_reports(query: dict, sort: list, limit: int):
+    return [format_report(report) for report in collection.find(query).sort(sort).limit(limit)]
+
+def get_reports_by_cursor(cursor: Optional[str], page_size: int, order_by: str, filters: Optional[dict] = None):
+    """
+    Keyset pagination over reports ordered by _id or (created_at, _id), within `filters`.
+    Each page starts where the previous one ended, so deep pages cost the same as the first.
+    """
+    query = filters or {}
+    if cursor:
+        try:
+            order_by, value, last_id = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        keyset = build_keyset_query(order_by, value, last_id)
+        query = {"$and": [query, keyset]} if query else keyset
+    if order_by not in CURSOR_ORDER_FIELDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"order_by must be one of: {', '.join(CURSOR_ORDER_FIELDS)}"
+        )
+    try:
+        sort = [("_id", ASCENDING)] if order_by == "_id" else [(order_by, ASCENDING), ("_id", ASCENDING)]
+        # Fetch one extra report to learn whether another page exists
+        reports = list(collection.find(query).sort(sort).limit(page_size + 1))
+        has_more = len(reports) > page_size
+        reports = reports[:page_size]
+        next_cursor = encode_cursor(order_by, reports[-1]) if has_more else None
+        return {
+            "data": [format_report(report) for report in reports],
+            "next_cursor": next_cursor
+        }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to fetch reports: {str(e)}")
 
 if __name__ == "__main__":
-    import uvicorn
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    # WEB_CONCURRENCY worker processes, each with its own event loop, MongoClient and upload
+    # workers. On shutdown, in-flight requests get GRACEFUL_TIMEOUT seconds to finish.
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    uvicorn.run(
+        "tester:app" if workers > 1 else app,
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        workers=workers,
+        timeout_graceful_shutdown=int(os.getenv("GRACEFUL_TIMEOUT", "30")),
+    )
\ No newline at end of file
@@ -0,0 +1,40 @@
+"""
+Test setup for the reports API. Run from test-reports/:
+
+    python -m pytest -q
+
+The service directory goes on sys.path, storage and the upload spool point at a scratch
+directory, and the `tester` fixture swaps the MongoDB collections for mongomock ones.
+"""
+import os
+import sys
+import tempfile
+
+import mongomock
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+# cruise_common/, as the service itself does
+sys.path.append(os.path.dirname(SERVICE_DIR))
+
+# Set before tester is imported: it creates the storage backend and spool at import
+_scratch = tempfile.mkdtemp(prefix="test-reports-")
+os.environ["STORAGE_BACKEND"] = "local"
+os.environ["LOCAL_STORAGE_ROOT"] = os.path.join(_scratch, "local-storage")
+os.environ["UPLOAD_SPOOL_DIR"] = os.path.join(_scratch, "upload-spool")
+# Every request comes from the same client; tests of the rate limits set buckets themselves
+for route_class in ("list", "bulk", "stream", "write"):
+    os.environ[f"ADMISSION_{route_class.upper()}_RATE"] = "0"
+
+
+@pytest.fixture
+def tester(monkeypatch):
+    """The tester module with empty mongomock collections."""
+    import tester as module
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(module, "collection", client.test_reports.test_report)
+    monkeypatch.setattr(module, "blobs_collection", client.test_reports.screenshot_blobs)
+    module.summary_cache.clear()
+    return module
@@ -0,0 +1,14 @@
+from fastapi.testclient import TestClient
+
+
+def test_request_finding_the_bulk_class_full_gets_503(tester, monkeypatch):
+    limiter = next(route_class for route_class in tester.ADMISSION_ROUTE_CLASSES if route_class.name == "bulk").limiter
+    # Every slot taken by a running export, and no room to wait
+    monkeypatch.setattr(limiter, "active", limiter.concurrency)
+    monkeypatch.setattr(limiter, "queue", 0)
+
+    response = TestClient(tester.app).put("/reports/status", json={"ids": [], "status": "resolved"})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "5"
+    assert response.json() == {"detail": "Server busy, try again shortly"}
@@ -0,0 +1,64 @@
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from fastapi.testclient import TestClient
+
+
+def insert_reports(tester, statuses):
+    return tester.collection.insert_many([
+        {"description": f"report {i}", "status": status, "tester_name": "ana", "created_at": datetime(2024, 1, i + 1)}
+        for i, status in enumerate(statuses)
+    ]).inserted_ids
+
+
+def status_by_id(tester):
+    return {report["_id"]: report["status"] for report in tester.collection.find()}
+
+
+def test_status_filter_leaves_reports_outside_it_unchanged(tester):
+    ids = insert_reports(tester, ["open", "open", "in_progress", "in_progress", "resolved"])
+
+    outcome = tester.bulk_update_status(None, tester.build_report_filter(status="in_progress"), "resolved")
+
+    assert outcome["updated"] == 2
+    assert sorted(result["id"] for result in outcome["results"]) == sorted(str(i) for i in ids[2:4])
+    statuses = status_by_id(tester)
+    assert [statuses[i] for i in ids] == ["open", "open", "resolved", "resolved", "resolved"]
+
+
+def test_status_filter_naming_the_target_status_only_moves_the_others(tester):
+    ids = insert_reports(tester, ["open", "in_progress", "resolved"])
+
+    outcome = tester.bulk_update_status(None, tester.build_report_filter(status="open,resolved"), "resolved")
+
+    assert outcome["updated"] == 1
+    statuses = status_by_id(tester)
+    assert [statuses[i] for i in ids] == ["resolved", "in_progress", "resolved"]
+
+
+def test_ids_report_an_outcome_each_in_request_order(tester):
+    ids = insert_reports(tester, ["open", "resolved"])
+    missing = str(ObjectId())
+
+    outcome = tester.bulk_update_status([str(ids[1]), "not-an-id", missing, str(ids[0])], None, "resolved")
+
+    assert outcome["updated"] == 1
+    assert outcome["results"] == [
+        {"id": str(ids[1]), "outcome": "unchanged"},
+        {"id": "not-an-id", "outcome": "invalid_id"},
+        {"id": missing, "outcome": "not_found"},
+        {"id": str(ids[0]), "outcome": "updated"},
+    ]
+
+
+def test_bulk_endpoint_with_status_filter(tester):
+    ids = insert_reports(tester, ["open", "open", "in_progress", "in_progress"])
+
+    response = TestClient(tester.app).put(
+        "/reports/status", json={"filter": {"status": "in_progress"}, "status": "resolved"}
+    )
+
+    assert response.status_code == 200
+    assert response.json()["updated"] == 2
+    statuses = status_by_id(tester)
+    assert [statuses[i] for i in ids] == ["open", "open", "resolved", "resolved"]
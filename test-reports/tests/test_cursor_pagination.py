@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+
+def test_cursor_pages_cover_every_report_once_in_creation_order(tester):
+    tester.collection.insert_many([
+        {"description": f"report {i}", "status": "open", "created_at": datetime(2024, 1, 1 + (i * 3) % 5)}
+        for i in range(5)
+    ])
+    client = TestClient(tester.app)
+
+    walked, cursor = [], None
+    while True:
+        params = {"page_size": 2, "order_by": "created_at", **({"cursor": cursor} if cursor else {})}
+        page = client.get("/reports", params=params).json()
+        walked.extend(report["description"] for report in page["data"])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    expected = sorted(tester.collection.find(), key=lambda report: (report["created_at"], report["_id"]))
+    assert walked == [report["description"] for report in expected]
+
+
+def test_tampered_cursor_is_rejected(tester):
+    response = TestClient(tester.app).get("/reports", params={"page_size": 2, "cursor": "not-a-cursor"})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
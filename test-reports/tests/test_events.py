@@ -0,0 +1,26 @@
+import asyncio
+
+import events
+
+
+async def collect(subscription):
+    return [chunk async for chunk in subscription.stream(keepalive=1)]
+
+
+def test_reconnecting_client_receives_what_it_missed():
+    async def scenario():
+        hub = events.EventHub(buffer_size=10)
+        hub.publish("report", {"op": "insert", "id": "1"})
+        last_seen = f"{hub.epoch}-1"
+        hub.publish("report", {"op": "update", "id": "1"})
+
+        subscription = hub.subscribe(last_seen)
+        # Published from another thread, as run_db workers and the watcher do
+        await asyncio.to_thread(hub.publish, "report", {"op": "delete", "id": "1"})
+        await asyncio.to_thread(hub.close)
+        return hub.epoch, await collect(subscription)
+
+    epoch, chunks = asyncio.run(scenario())
+
+    assert [chunk.split("\n")[0] for chunk in chunks] == [f"id: {epoch}-2", f"id: {epoch}-3"]
+    assert '"op":"delete"' in chunks[1]
@@ -0,0 +1,17 @@
+import json
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+
+def test_ndjson_export_streams_every_report(tester):
+    tester.collection.insert_many([
+        {"description": f"report {i}", "status": "open", "created_at": datetime(2024, 1, 1 + i)} for i in range(3)
+    ])
+
+    response = TestClient(tester.app).get("/reports/export")
+
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["description"] for row in rows] == ["report 0", "report 1", "report 2"]
+    assert rows[0]["created_at"] == "2024-01-01T00:00:00"
@@ -0,0 +1,72 @@
+import inspect
+from datetime import datetime, timezone
+
+import pytest
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+
+def insert_reports(tester, count):
+    return tester.collection.insert_many([
+        {"description": f"report {i}", "status": "open", "tester_name": "ana", "created_at": datetime(2024, 1, i + 1)}
+        for i in range(count)
+    ]).inserted_ids
+
+
+def test_build_report_filter_without_parameters_matches_everything(tester):
+    assert tester.build_report_filter() == {}
+
+
+def test_build_report_filter_single_and_several_statuses(tester):
+    assert tester.build_report_filter(status="open") == {"status": "open"}
+    assert tester.build_report_filter(status="open, resolved,") == {"status": {"$in": ["open", "resolved"]}}
+
+
+def test_build_report_filter_rejects_unknown_status(tester):
+    with pytest.raises(HTTPException) as excinfo:
+        tester.build_report_filter(status="open,closed")
+    assert excinfo.value.status_code == 400
+    assert "closed" in excinfo.value.detail
+
+
+def test_build_report_filter_tester_and_created_range(tester):
+    start = datetime(2024, 1, 1)
+    end = datetime(2024, 2, 1, tzinfo=timezone.utc)
+
+    query = tester.build_report_filter(tester_name="ana", created_from=start, created_to=end)
+
+    assert query["tester_name"] == "ana"
+    assert query["created_at"]["$gte"] == start
+    # Aware bounds are compared as the naive local time created_at is stored in
+    stored_end = query["created_at"]["$lt"]
+    assert stored_end.tzinfo is None
+    assert stored_end == end.astimezone().replace(tzinfo=None)
+    assert tester.build_report_filter(created_to=start) == {"created_at": {"$lt": start}}
+
+
+def test_plain_list_is_newest_first(tester):
+    ids = insert_reports(tester, 3)
+
+    response = TestClient(tester.app).get("/reports")
+
+    assert response.status_code == 200
+    assert [report["id"] for report in response.json()] == [str(i) for i in reversed(ids)]
+
+
+def test_plain_list_is_cut_at_the_limit(tester):
+    ids = insert_reports(tester, 5)
+    client = TestClient(tester.app)
+
+    newest = client.get("/reports", params={"limit": 2}).json()
+    oldest = client.get("/reports", params={"limit": 2, "sort": "created_at"}).json()
+
+    assert [report["id"] for report in newest] == [str(ids[4]), str(ids[3])]
+    assert [report["id"] for report in oldest] == [str(ids[0]), str(ids[1])]
+    assert client.get("/reports", params={"limit": tester.MAX_PAGE_SIZE + 1}).status_code == 422
+
+
+def test_plain_list_defaults_to_newest_first_with_a_bounded_limit(tester):
+    parameters = inspect.signature(tester.get_reports).parameters
+
+    assert parameters["sort"].default == "-created_at"
+    assert 1 <= parameters["limit"].default.default <= tester.MAX_PAGE_SIZE
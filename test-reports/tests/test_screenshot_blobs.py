@@ -0,0 +1,98 @@
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+
+DIGEST = "ab" * 32
+BLOB_ID = f"bucket:{DIGEST}"
+
+
+def claim(tester):
+    return tester.claim_blob(BLOB_ID, DIGEST, "bucket", tester.blob_object_path(DIGEST, "shot.PNG"), 10, "image/png")
+
+
+def stored_blob(tester):
+    return tester.blobs_collection.find_one({"_id": BLOB_ID})
+
+
+def test_blob_path_is_content_addressed(tester):
+    assert tester.blob_object_path(DIGEST, "shot.PNG") == f"test_screenshots/sha256/ab/{DIGEST}.png"
+    assert tester.blob_object_path(DIGEST, None) == f"test_screenshots/sha256/ab/{DIGEST}"
+
+
+def test_first_claim_owns_the_upload_and_later_ones_share_it(tester):
+    assert claim(tester) == (None, True)
+    blob, owner = claim(tester)
+
+    assert owner is False
+    assert blob["refcount"] == 1
+    assert stored_blob(tester)["refcount"] == 2
+    assert stored_blob(tester)["status"] == "pending"
+
+
+def test_failed_blob_is_reclaimed_by_one_request(tester):
+    claim(tester)
+    tester.blobs_collection.update_one({"_id": BLOB_ID}, {"$set": {"status": "failed"}})
+
+    _, first_owner = claim(tester)
+    _, second_owner = claim(tester)
+
+    assert (first_owner, second_owner) == (True, False)
+    assert stored_blob(tester)["status"] == "pending"
+    assert stored_blob(tester)["refcount"] == 3
+
+
+def test_release_drops_the_reference(tester):
+    claim(tester)
+    claim(tester)
+
+    tester.release_blob(BLOB_ID, owner=False)
+
+    assert stored_blob(tester)["refcount"] == 1
+    assert stored_blob(tester)["status"] == "pending"
+
+
+def test_released_owner_hands_the_upload_to_the_next_claim(tester):
+    claim(tester)
+
+    tester.release_blob(BLOB_ID, owner=True)
+    assert stored_blob(tester)["refcount"] == 0
+    assert stored_blob(tester)["status"] == "failed"
+
+    _, owner = claim(tester)
+    assert owner is True
+
+
+def insert_waiting_report(tester):
+    report = {"description": "duplicate", "status": "open", "screenshot_blob": BLOB_ID,
+              "screenshot_status": "pending", "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1)}
+    tester.collection.insert_one(report)
+    return report
+
+
+def test_released_owner_fails_the_reports_waiting_on_its_upload(tester):
+    claim(tester)
+    claim(tester)
+    waiting = insert_waiting_report(tester)
+
+    tester.release_blob(BLOB_ID, owner=True)
+
+    stored = tester.collection.find_one({"_id": waiting["_id"]})
+    assert stored["screenshot_status"] == "failed"
+    assert stored["updated_at"] > datetime(2024, 1, 1)
+
+
+def test_list_etag_changes_once_a_duplicate_upload_is_synced(tester):
+    claim(tester)
+    report = insert_waiting_report(tester)
+    client = TestClient(tester.app)
+    pending = client.get("/reports")
+    assert pending.json()[0]["screenshot_status"] == "pending"
+
+    tester.blobs_collection.update_one({"_id": BLOB_ID}, {"$set": {"status": "ready", "screenshot_url": "https://storage.test/a.png"}})
+    tester.sync_report_with_blob(report)
+    revalidated = client.get("/reports", headers={"If-None-Match": pending.headers["etag"]})
+
+    assert revalidated.status_code == 200
+    assert revalidated.headers["etag"] != pending.headers["etag"]
+    assert revalidated.json()[0]["screenshot_status"] == "uploaded"
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from offload import SingleFlight
+
+
+def test_concurrent_identical_reads_share_one_run():
+    calls = []
+
+    async def read():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"total": 3}
+
+    async def main():
+        flight = SingleFlight()
+        results = await asyncio.gather(*(flight.run("summary", read) for _ in range(4)))
+        return flight, results
+
+    flight, results = asyncio.run(main())
+
+    assert results == [{"total": 3}] * 4
+    assert len(calls) == 1
+    assert flight._runs == {}
+
+
+def test_different_keys_run_separately():
+    calls = []
+
+    async def read(key):
+        calls.append(key)
+        return key
+
+    async def main():
+        flight = SingleFlight()
+        return await asyncio.gather(flight.run("a", read, "a"), flight.run("b", read, "b"))
+
+    assert asyncio.run(main()) == ["a", "b"]
+    assert sorted(calls) == ["a", "b"]
+
+
+def test_every_caller_gets_the_exception_and_the_key_is_freed():
+    async def fail():
+        await asyncio.sleep(0)
+        raise ConnectionError("database unavailable")
+
+    async def main():
+        flight = SingleFlight()
+        outcomes = await asyncio.gather(flight.run("summary", fail), flight.run("summary", fail),
+                                        return_exceptions=True)
+        assert flight._runs == {}
+        return outcomes
+
+    outcomes = asyncio.run(main())
+    assert [type(outcome) for outcome in outcomes] == [ConnectionError, ConnectionError]
+
+
+def test_cancelled_caller_does_not_cancel_the_run_for_the_others():
+    async def read():
+        await asyncio.sleep(0.02)
+        return "summary"
+
+    async def main():
+        flight = SingleFlight()
+        first = asyncio.create_task(flight.run("summary", read))
+        second = asyncio.create_task(flight.run("summary", read))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(main()) == "summary"
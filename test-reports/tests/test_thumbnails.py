@@ -0,0 +1,60 @@
+import logging
+import os
+
+import pytest
+
+import thumbnails
+
+Image = pytest.importorskip("PIL.Image")
+
+
+def write_png(tmp_path, size):
+    path = str(tmp_path / "screenshot")
+    Image.new("RGB", size, (200, 30, 30)).save(path, "PNG")
+    return path
+
+
+def test_derivatives_are_webp_within_their_size_limits(tmp_path):
+    source = write_png(tmp_path, (2000, 1000))
+
+    derivatives = {d.field: d for d in thumbnails.generate_derivatives(source)}
+
+    assert set(derivatives) == {"thumbnail_url", "preview_url"}
+    expected = {
+        "thumbnail_url": (".thumb.webp", (thumbnails.THUMBNAIL_MAX_SIZE, thumbnails.THUMBNAIL_MAX_SIZE // 2)),
+        "preview_url": (".preview.webp", (thumbnails.PREVIEW_MAX_SIZE, thumbnails.PREVIEW_MAX_SIZE // 2)),
+    }
+    for field, (suffix, size) in expected.items():
+        derivative = derivatives[field]
+        assert derivative.path == source + suffix
+        assert derivative.content_type == "image/webp"
+        with Image.open(derivative.path) as image:
+            assert image.format == "WEBP"
+            assert image.size == size
+
+
+def test_small_screenshots_are_not_upscaled(tmp_path):
+    source = write_png(tmp_path, (100, 50))
+
+    for derivative in thumbnails.generate_derivatives(source):
+        with Image.open(derivative.path) as image:
+            assert image.size == (100, 50)
+
+
+def test_undecodable_file_gets_no_derivatives(tmp_path):
+    source = str(tmp_path / "screenshot")
+    with open(source, "wb") as f:
+        f.write(b"not an image")
+
+    assert thumbnails.generate_derivatives(source) == []
+    assert os.listdir(tmp_path) == ["screenshot"]
+
+
+def test_missing_pillow_gives_no_derivatives_and_a_warning(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(thumbnails, "Image", None)
+    source = write_png(tmp_path, (2000, 1000))
+
+    assert thumbnails.generate_derivatives(source) == []
+    with caplog.at_level(logging.WARNING, logger="thumbnails"):
+        thumbnails.warn_if_unavailable()
+    assert "Pillow is not installed" in caplog.text
@@ -0,0 +1,56 @@
+import time
+from datetime import datetime, timedelta
+
+
+def insert_pending(tester, owner, lease_until):
+    upload_job = {"bucket": "bucket", "path": "screenshots/a.png", "spool": "a", "owner": owner}
+    if lease_until is not None:
+        upload_job["lease_until"] = lease_until
+    return tester.collection.insert_one({"screenshot_status": "pending", "upload_job": upload_job}).inserted_id
+
+
+def test_only_expired_or_unleased_uploads_are_claimed(tester, monkeypatch):
+    monkeypatch.setattr(tester, "upload_owner", "me")
+    now = datetime.utcnow()
+    live = insert_pending(tester, "other", now + timedelta(seconds=30))
+    expired = insert_pending(tester, "other", now - timedelta(seconds=1))
+    unleased = insert_pending(tester, "old", None)
+
+    claimed = {tester.claim_expired_upload()["_id"], tester.claim_expired_upload()["_id"]}
+
+    assert claimed == {expired, unleased}
+    assert tester.claim_expired_upload() is None
+    for report_id in claimed:
+        upload_job = tester.collection.find_one({"_id": report_id})["upload_job"]
+        assert upload_job["owner"] == "me"
+        assert upload_job["lease_until"] > now
+    assert tester.collection.find_one({"_id": live})["upload_job"]["owner"] == "other"
+
+
+def test_renewal_covers_only_the_uploads_the_queue_holds(tester, monkeypatch):
+    monkeypatch.setattr(tester, "upload_owner", "me")
+    # MongoDB keeps milliseconds
+    soon = (datetime.utcnow() + timedelta(seconds=1)).replace(microsecond=0)
+    held = insert_pending(tester, "me", soon)
+    dropped = insert_pending(tester, "me", soon)
+    foreign = insert_pending(tester, "other", soon)
+
+    tester.renew_upload_leases([str(held), str(foreign)])
+
+    def lease_until(report_id):
+        return tester.collection.find_one({"_id": report_id})["upload_job"]["lease_until"]
+    assert lease_until(held) > soon
+    assert lease_until(dropped) == soon
+    assert lease_until(foreign) == soon
+
+
+def test_released_upload_is_claimed_again(tester, monkeypatch):
+    monkeypatch.setattr(tester, "upload_owner", "me")
+    report_id = insert_pending(tester, "me", datetime.utcnow() + timedelta(seconds=30))
+    assert tester.claim_expired_upload() is None
+
+    tester.release_upload_lease(str(report_id))
+    # The released lease ends now, to the millisecond
+    time.sleep(0.002)
+
+    assert tester.claim_expired_upload()["_id"] == report_id
@@ -0,0 +1,66 @@
+import asyncio
+import os
+
+from upload_queue import UploadJob, UploadQueue
+
+
+class RecordingStorage:
+    def __init__(self):
+        self.uploaded = []
+
+    def upload_file(self, bucket, object_path, local_path, content_type):
+        self.uploaded.append(object_path)
+
+    def public_url(self, bucket, object_path):
+        return f"https://storage.test/{bucket}/{object_path}"
+
+
+def run_job(tmp_path, on_uploaded, abandoned):
+    async def on_failed(job, error):
+        raise AssertionError(f"upload failed: {error}")
+
+    async def on_abandoned(job):
+        abandoned.append(job.report_id)
+
+    queue = UploadQueue(RecordingStorage(), tmp_path / "spool", on_uploaded, on_failed, on_abandoned, workers=1)
+    spool_path = os.path.join(queue.spool_dir, "upload")
+    with open(spool_path, "wb") as f:
+        f.write(b"not an image")
+
+    async def main():
+        queue.start()
+        assert queue.reserve()
+        queue.submit(UploadJob("report-1", "bucket", "screenshots/upload.png", spool_path))
+        assert queue.held == {"report-1"}
+        await queue._queue.join()
+        await queue.stop()
+
+    asyncio.run(main())
+    return queue, spool_path
+
+
+def test_spool_is_deleted_once_the_outcome_is_recorded(tmp_path):
+    recorded, abandoned = [], []
+
+    async def on_uploaded(job, urls):
+        recorded.append(urls["screenshot_url"])
+
+    queue, spool_path = run_job(tmp_path, on_uploaded, abandoned)
+
+    assert recorded == ["https://storage.test/bucket/screenshots/upload.png"]
+    assert abandoned == []
+    assert not os.path.exists(spool_path)
+    assert (queue.pending, queue.held) == (0, set())
+
+
+def test_spool_is_kept_and_the_job_handed_back_when_recording_fails(tmp_path):
+    abandoned = []
+
+    async def on_uploaded(job, urls):
+        raise ConnectionError("database unavailable")
+
+    queue, spool_path = run_job(tmp_path, on_uploaded, abandoned)
+
+    assert abandoned == ["report-1"]
+    assert os.path.exists(spool_path)
+    assert (queue.pending, queue.held) == (0, set())
@@ -0,0 +1,10 @@
+import asyncio
+
+
+def test_warm_up_caches_the_unfiltered_summary(tester):
+    tester.collection.insert_many([{"status": "open", "tester_name": "ana"}, {"status": "resolved", "tester_name": "ana"}])
+
+    asyncio.run(tester.warm_up())
+
+    version, _ = tester.reports_version()
+    assert tester.summary_cache[tester.dumps({})] == (version, tester.summarize_reports({}))
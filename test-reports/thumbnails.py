@@ -0,0 +1,87 @@
+"""
+Downscaled derivatives of report screenshots, so listings never load the originals.
+
+    thumbnail  small WebP for table rows (THUMBNAIL_MAX_SIZE px on the long edge)
+    preview    larger recompressed WebP for the in-page viewer (PREVIEW_MAX_SIZE px)
+
+Pillow is listed in requirements.txt. Should it be missing anyway, or for files it cannot
+decode, no derivatives are made and clients fall back to the original screenshot_url;
+warn_if_unavailable() makes the missing dependency visible at startup.
+"""
+import logging
+import os
+from dataclasses import dataclass
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # see warn_if_unavailable
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_MAX_SIZE = int(os.getenv("THUMBNAIL_MAX_SIZE", "240"))
+THUMBNAIL_QUALITY = int(os.getenv("THUMBNAIL_QUALITY", "70"))
+PREVIEW_MAX_SIZE = int(os.getenv("PREVIEW_MAX_SIZE", "1280"))
+PREVIEW_QUALITY = int(os.getenv("PREVIEW_QUALITY", "80"))
+# Refuse to decode images larger than this many pixels (decompression bombs)
+MAX_IMAGE_PIXELS = int(os.getenv("MAX_IMAGE_PIXELS", str(64 * 1024 * 1024)))
+
+if Image is not None:
+    Image.MAX_IMAGE_PIXELS = MAX_IMAGE_PIXELS
+
+
+@dataclass
+class Derivative:
+    field: str         # report field holding its public URL
+    suffix: str        # appended to the original object path
+    path: str          # local file
+    content_type: str
+
+
+DERIVATIVE_SPECS = [
+    ("thumbnail_url", ".thumb.webp", THUMBNAIL_MAX_SIZE, THUMBNAIL_QUALITY),
+    ("preview_url", ".preview.webp", PREVIEW_MAX_SIZE, PREVIEW_QUALITY),
+]
+
+
+def generate_derivatives(source_path: str) -> list:
+    """
+    Writes a thumbnail and a preview next to source_path and returns them as Derivatives.
+    Returns an empty list when Pillow is missing or the file is not a decodable image.
+    Blocking and CPU-bound; run it through offload.run_image.
+    """
+    if Image is None:
+        return []
+    derivatives = []
+    try:
+        with Image.open(source_path) as original:
+            # JPEG can decode at a reduced scale, which is far cheaper than a full decode
+            original.draft("RGB", (PREVIEW_MAX_SIZE, PREVIEW_MAX_SIZE))
+            image = ImageOps.exif_transpose(original)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            # Largest first, so each step shrinks an already smaller image
+            for field, suffix, max_size, quality in sorted(DERIVATIVE_SPECS, key=lambda spec: -spec[2]):
+                image.thumbnail((max_size, max_size), Image.LANCZOS)
+                path = source_path + suffix
+                image.save(path, "WEBP", quality=quality, method=4)
+                derivatives.append(Derivative(field, suffix, path, "image/webp"))
+    except (OSError, ValueError, Image.DecompressionBombError) as e:
+        logger.warning(f"Could not create derivatives for {source_path}: {e}")
+        for derivative in derivatives:
+            discard(derivative.path)
+        return []
+    return derivatives
+
+
+def warn_if_unavailable():
+    if Image is None:
+        logger.warning("Pillow is not installed: screenshots get no thumbnails or previews, "
+                       "and listings load the full-size originals")
+
+
+def discard(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,206 @@
+"""
+Background screenshot uploads for POST /reports.
+
+The request handler streams the upload into a spool directory, inserts the report with
+screenshot_status "pending" and enqueues a job. A fixed number of worker tasks build the
+downscaled derivatives (thumbnails.py), upload the original and the derivatives to
+storage with exponential backoff and report the outcome through the on_uploaded /
+on_failed callbacks, which patch the report. The spool file is deleted only once the
+outcome is recorded; if the callback fails the job is handed to on_abandoned and its
+spool file kept, so the upload can be taken up again.
+
+Capacity is reserved before the handler spools anything, so a full queue turns new
+uploads away with 503 instead of piling spool files up on disk.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import uuid
+from dataclasses import dataclass, field
+
+import anyio
+
+from offload import run_image, run_storage
+from thumbnails import discard, generate_derivatives, warn_if_unavailable
+
+logger = logging.getLogger(__name__)
+
+SPOOL_CHUNK_SIZE = 1024 * 1024
+
+
+class UploadTooLarge(Exception):
+    pass
+
+
+@dataclass
+class UploadJob:
+    report_id: str
+    bucket: str
+    object_path: str
+    spool_path: str
+    content_type: str = None
+    attempts: int = 0
+    blob_id: str = None
+    derivatives: list = None
+    uploaded: set = field(default_factory=set)
+
+
+class UploadQueue:
+    def __init__(self, storage, spool_dir, on_uploaded, on_failed, on_abandoned=None, workers=4,
+                 max_pending=100, max_attempts=5, backoff_base=1.0, backoff_max=60.0):
+        """
+        storage: backend from storage.create_storage().
+        on_uploaded(job, urls) / on_failed(job, error): async callbacks run by the workers;
+            urls maps report fields (screenshot_url, thumbnail_url, ...) to public URLs.
+        on_abandoned(job): async callback run when on_uploaded / on_failed raised; the
+            job's spool file is left in place for whoever retries it.
+        max_pending: jobs reserved, queued or in progress before reserve() refuses more.
+        """
+        self.storage = storage
+        self.spool_dir = os.path.abspath(spool_dir)
+        self.on_uploaded = on_uploaded
+        self.on_failed = on_failed
+        self.on_abandoned = on_abandoned
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.pending = 0
+        # Report ids of the jobs submitted and not finished yet
+        self.held = set()
+        self._queue = None
+        self._tasks = []
+        os.makedirs(self.spool_dir, exist_ok=True)
+
+    def start(self):
+        """Starts the worker tasks; call from inside the running event loop."""
+        if self._tasks:
+            return
+        warn_if_unavailable()
+        self._queue = asyncio.Queue()
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def reserve(self) -> bool:
+        """Claims a queue slot for an upload about to be spooled. False when the queue is full."""
+        if self.pending >= self.max_pending:
+            return False
+        self.pending += 1
+        return True
+
+    def release(self):
+        """Gives back a reserved slot whose job will not be submitted."""
+        self.pending = max(self.pending - 1, 0)
+
+    def retry_after_seconds(self) -> int:
+        return max(1, int(self.backoff_base * 5))
+
+    async def spool(self, upload_file, max_bytes: int):
+        """
+        Copies an UploadFile into the spool directory in chunks, hashing it on the way.
+        Returns (spool_path, sha256 hex digest, size). Raises UploadTooLarge once more
+        than max_bytes have been read.
+        """
+        spool_path = os.path.join(self.spool_dir, uuid.uuid4().hex)
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            async with await anyio.open_file(spool_path, "wb") as f:
+                while True:
+                    chunk = await upload_file.read(SPOOL_CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise UploadTooLarge(f"Screenshot exceeds the {max_bytes} byte limit")
+                    digest.update(chunk)
+                    await f.write(chunk)
+        except BaseException:
+            self.discard(spool_path)
+            raise
+        return spool_path, digest.hexdigest(), size
+
+    def submit(self, job: UploadJob):
+        """Queues a job for a slot taken with reserve()."""
+        self.held.add(job.report_id)
+        self._queue.put_nowait(job)
+
+    def discard(self, spool_path: str):
+        discard(spool_path)
+
+    def backoff_seconds(self, attempts: int) -> float:
+        """Exponential backoff with full jitter."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempts - 1)))
+
+    async def _worker(self, index: int):
+        while True:
+            job = await self._queue.get()
+            try:
+                await self._process(job)
+            except Exception:
+                logger.exception(f"Upload worker {index} failed on report {job.report_id}")
+            finally:
+                self._queue.task_done()
+
+    async def _process(self, job: UploadJob):
+        if job.derivatives is None:
+            try:
+                job.derivatives = await run_image(generate_derivatives, job.spool_path)
+            except Exception:
+                # Derivatives are an optimisation; the original still gets uploaded
+                logger.exception(f"Derivatives failed for report {job.report_id}")
+                job.derivatives = []
+        files = [("screenshot_url", job.object_path, job.spool_path, job.content_type)]
+        files += [(d.field, job.object_path + d.suffix, d.path, d.content_type) for d in job.derivatives]
+        while True:
+            job.attempts += 1
+            try:
+                # Files uploaded by an earlier attempt are not sent again
+                for report_field, object_path, local_path, content_type in files:
+                    if report_field not in job.uploaded:
+                        await run_storage(self.storage.upload_file, job.bucket, object_path, local_path, content_type)
+                        job.uploaded.add(report_field)
+            except Exception as e:
+                if job.attempts >= self.max_attempts:
+                    logger.error(f"Screenshot upload for report {job.report_id} failed after {job.attempts} attempts: {e}")
+                    await self._finish(job, self.on_failed, str(e))
+                    return
+                delay = self.backoff_seconds(job.attempts)
+                logger.warning(f"Screenshot upload for report {job.report_id} failed (attempt {job.attempts}), retrying in {delay:.1f}s: {e}")
+                await asyncio.sleep(delay)
+                continue
+            urls = {report_field: self.storage.public_url(job.bucket, object_path)
+                    for report_field, object_path, _, _ in files}
+            await self._finish(job, self.on_uploaded, urls)
+            return
+
+    async def _finish(self, job: UploadJob, callback, result):
+        try:
+            await callback(job, result)
+        except Exception:
+            logger.exception(f"Could not record the screenshot outcome of report {job.report_id}; keeping it for a retry")
+            await self._abandon(job)
+        else:
+            self.discard(job.spool_path)
+        finally:
+            # Derivatives are rebuilt from the spool file by a retry
+            for derivative in job.derivatives or ():
+                discard(derivative.path)
+            self.held.discard(job.report_id)
+            self.release()
+
+    async def _abandon(self, job: UploadJob):
+        if self.on_abandoned is None:
+            return
+        try:
+            await self.on_abandoned(job)
+        except Exception:
+            logger.exception(f"Could not hand back the screenshot upload of report {job.report_id}")
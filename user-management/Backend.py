@@ -1,41 +1,131 @@
 import os
-from flask import Flask, request, jsonify, render_template # ensure render_template is imported
-from pymongo import MongoClient
+from flask import Flask, request, jsonify, render_template, Response, stream_with_context, g # ensure render_template is imported
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
 from bson.objectid import ObjectId
 from flask_cors import CORS
 from urllib.parse import quote_plus
-from datetime import datetime
+from datetime import datetime, timezone
 import time
-import json
-from json import JSONEncoder
-
-# Custom JSON encoder to handle ObjectId
-class MongoJSONEncoder(JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        if isinstance(obj, datetime):
-            return obj.strftime('%Y-%m-%d')
-        return super().default(obj)
+import csv
+import hashlib
+import io
+import threading
+import logging
+import sys
+# Code shared with the reports API lives in cruise_common/ at the repository root
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from db_health import CircuitBreaker, DatabaseHealthMonitor
+from cache import SingleFlight, TTLCache
+from cruise_common.change_stream import ChangeStreamWatcher
+from cruise_common.export import EXPORT_BATCH_SIZE, EXPORT_FORMATS, export_chunks
+from cruise_common.pagination import build_keyset_query, decode_cursor, encode_cursor
+from events import EventHub
+from search import (SEARCH_SOURCE_FIELDS, SEARCH_TERMS_FIELD, SearchTermsBackfill, build_search_query,
+                    query_tokens, rank_users, search_terms, search_terms_only_change, updates_search_terms)
+from serialization import MongoJSONProvider
+from compression import compress_response
+import observability
+from observability import MongoCommandTimer
+import admission
+from admission import RouteClass
+
+observability.configure_logging()
+logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
-CORS(app) # Enable CORS for frontend communication
+# Request latency metrics and /metrics; registered first so every request is timed
+observability.init_app(app)
+CORS(app, expose_headers=['ETag', 'Last-Modified']) # Enable CORS for frontend communication
+
+# Configure Flask to use the Mongo-aware JSON provider (Flask 3 ignores app.json_encoder)
+app.json = MongoJSONProvider(app)
+
+# Responses larger than this many bytes are gzip/brotli compressed when the client accepts it
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+
+@app.after_request
+def compress(response):
+    return compress_response(response, request.headers.get('Accept-Encoding'), min_size=COMPRESS_MIN_SIZE)
+
+# Seconds between background database health checks
+DB_HEALTH_CHECK_INTERVAL = float(os.getenv('DB_HEALTH_CHECK_INTERVAL', '5'))
+# Consecutive failed health checks before requests start failing fast
+DB_FAILURE_THRESHOLD = int(os.getenv('DB_FAILURE_THRESHOLD', '2'))
 
-# Configure Flask to use the custom JSON encoder
-app.json_encoder = MongoJSONEncoder
+db_circuit_breaker = CircuitBreaker(
+    failure_threshold=DB_FAILURE_THRESHOLD,
+    retry_after=DB_HEALTH_CHECK_INTERVAL
+)
+
+# Fast start: serve immediately and let the health monitor connect in the background,
+# instead of blocking startup on the connection retry loop
+FAST_START = os.getenv('FAST_START', '0') == '1'
+
+# Debug mode (reloader and debugger) is on by default for development; FLASK_DEBUG=0 turns
+# it off, e.g. so benchmarks run a single process
+DEBUG = os.getenv('FLASK_DEBUG', '1') == '1'
+
+# Endpoints that never touch the database and stay available during an outage
+DB_EXEMPT_ENDPOINTS = {'static', 'serve_onemore_html', 'serve_root_html', 'liveness', 'readiness', 'metrics', 'user_events_stream'}
 
 # Add this after the app = Flask(__name__) line
 @app.before_request
 def check_db_connection():
-    """Middleware to ensure database connection is active before processing requests."""
-    if request.endpoint != 'static':  # Skip check for static files
-        if not db_connection_successful or global_users_collection is None:
-            print("WARNING: Database connection lost. Attempting to reconnect...")
-            if not init_db_connection():
-                return jsonify({
-                    "success": False,
-                    "error": "Database connection unavailable"
-                }), 503  # Service Unavailable
+    """
+    Rejects requests with 503 while the database circuit breaker is open.
+    Reconnecting is left to the background health monitor, so no request thread ever
+    waits on a reconnect.
+    """
+    if request.endpoint in DB_EXEMPT_ENDPOINTS:
+        return None
+    allowed, is_trial = db_circuit_breaker.allow_request()
+    # Not connected yet (fast start) counts as unavailable too
+    if not allowed or not db_connection_successful:
+        response = jsonify({
+            "success": False,
+            "error": "Database connection unavailable"
+        })
+        response.headers['Retry-After'] = str(db_circuit_breaker.retry_after_seconds())
+        return response, 503  # Service Unavailable
+    g.db_trial_request = is_trial
+
+@app.after_request
+def report_db_trial_result(response):
+    """While half-open, the outcome of each trial request closes or re-opens the breaker."""
+    if g.pop('db_trial_request', False):
+        db_circuit_breaker.record_trial_result(response.status_code < 500)
+    return response
+
+# Admission control (see admission.py): full-collection reads, bulk jobs and event streams get
+# a few slots per worker, so single-user reads and writes always find a free thread.
+# Defaults fit 32 request threads: the limited classes hold at most 26 of them.
+ADMISSION_ROUTE_CLASSES = [
+    RouteClass.from_env('list', concurrency=4, queue=4, queue_timeout=2, rate=10, burst=20),
+    RouteClass.from_env('bulk', concurrency=2, queue=0, rate=0.2, burst=2),
+    RouteClass.from_env('search', concurrency=4, queue=4, queue_timeout=1, rate=10, burst=20),
+    RouteClass.from_env('stream', concurrency=8, queue=0, rate=1, burst=5),
+    RouteClass.from_env('read', rate=50, burst=100),
+    RouteClass.from_env('write', rate=20, burst=40),
+]
+ADMISSION_ENDPOINT_CLASSES = {
+    'get_users': 'list',
+    'get_user_count': 'list',
+    'export_users': 'bulk',
+    'bulk_import_users': 'bulk',
+    'search_users': 'search',
+    'user_events_stream': 'stream',
+    'get_user': 'read',
+    'get_users_batch': 'read',
+    'create_user': 'write',
+    'update_user': 'write',
+    'delete_user': 'write',
+}
+# Behind a reverse proxy every request comes from the proxy's address; with this set the
+# client is taken from X-Forwarded-For instead (only safe when the proxy sets that header)
+ADMISSION_TRUST_FORWARDED = os.getenv('ADMISSION_TRUST_FORWARDED', '0') == '1'
+
+admission.init_app(app, ADMISSION_ROUTE_CLASSES, ADMISSION_ENDPOINT_CLASSES, ADMISSION_TRUST_FORWARDED)
 
 # MongoDB Configuration - REPLACE WITH YOUR ACTUAL CREDENTIALS IF DIFFERENT
 # Ensure these match the credentials for your MongoDB Atlas cluster user
@@ -47,74 +137,584 @@ cluster_url = "cluster0.rgfcr8x.mongodb.net" # Your MongoDB Atlas cluster URL
 escaped_username = quote_plus(username)
 escaped_password = quote_plus(password)
 
-# Construct the full MongoDB Atlas connection string
-connection_string = f"mongodb+srv://{escaped_username}:{escaped_password}@{cluster_url}/CruiseDB?retryWrites=true&w=majority"
+# Construct the full MongoDB Atlas connection string. MONGO_URI overrides it, e.g. to point
+# benchmarks at a local server.
+connection_string = os.getenv(
+    'MONGO_URI',
+    f"mongodb+srv://{escaped_username}:{escaped_password}@{cluster_url}/CruiseDB?retryWrites=true&w=majority"
+)
+
+# Connection pool of the MongoClient, one per process (per worker under gunicorn). Size the
+# maximum to the request threads of a worker; minPoolSize connections are opened up front.
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '50'))
+MONGO_MIN_POOL_SIZE = int(os.getenv('MONGO_MIN_POOL_SIZE', '0'))
 
-# Global variable to store the users collection.
-# It will be initialized once on application startup.
+# Global variables to store the client and users collection.
+# They will be initialized once on application startup.
+global_mongo_client = None
 global_users_collection = None
 # Add a flag to indicate if DB connection was successful
 db_connection_successful = False
+# Set once the unique indexes on userName and email exist; until then inserts pre-check for duplicates
+unique_indexes_ready = False
+
+# Fields that must be unique across users, with the error returned on a conflict
+UNIQUE_USER_FIELDS = {
+    'userName': "Username already exists",
+    'email': "Email already exists",
+}
+
+# Non-unique fields the API sorts users by: the table's sortable columns, plus updatedAt
+# for cursor paging. Each index ends with _id to match the tie-breaker used for stable
+# paging. Low-cardinality columns (gender, status) and dateOfBirth are not sortable.
+USER_SORT_INDEX_FIELDS = ['firstName', 'lastName', 'phoneNumber', 'updatedAt']
+# Sort indexes of columns that stopped being sortable, dropped on connect
+OBSOLETE_USER_INDEXES = ['gender_1__id_1', 'dateOfBirth_1__id_1', 'status_1__id_1']
+# Fields a list request may sort by; anything else would sort without an index
+SORTABLE_USER_FIELDS = {'_id', *UNIQUE_USER_FIELDS, *USER_SORT_INDEX_FIELDS}
+
+# Users written before searchTerms existed get it in the background after connecting
+search_terms_backfill = SearchTermsBackfill(
+    batch_size=int(os.getenv('SEARCH_BACKFILL_BATCH_SIZE', '1000')),
+    pause_seconds=float(os.getenv('SEARCH_BACKFILL_PAUSE_SECONDS', '0.5'))
+)
+
+def ensure_indexes(users_collection):
+    """
+    Creates the indexes the API relies on. create_index is a no-op when the index
+    already exists, so this runs on every connection. The search terms backfill it
+    starts runs in one worker process at a time (see SearchTermsBackfill).
+    """
+    global unique_indexes_ready
+
+    try:
+        for field in UNIQUE_USER_FIELDS:
+            users_collection.create_index([(field, ASCENDING)], unique=True)
+        unique_indexes_ready = True
+    except OperationFailure as e:
+        # Typically existing duplicate values; keep serving with pre-insert checks
+        logger.warning(f"Could not create unique user indexes, falling back to duplicate pre-checks: {e}")
+        unique_indexes_ready = False
+
+    for field in USER_SORT_INDEX_FIELDS:
+        try:
+            users_collection.create_index([(field, ASCENDING), ('_id', ASCENDING)])
+        except OperationFailure as e:
+            logger.warning(f"Could not create index on {field}: {e}")
+    try:
+        for name in set(OBSOLETE_USER_INDEXES) & set(users_collection.index_information()):
+            users_collection.drop_index(name)
+    except OperationFailure as e:
+        logger.warning(f"Could not drop obsolete user indexes: {e}")
+
+    # Multikey index behind /api/users/search
+    try:
+        users_collection.create_index([(SEARCH_TERMS_FIELD, ASCENDING)])
+    except OperationFailure as e:
+        logger.warning(f"Could not create index on {SEARCH_TERMS_FIELD}: {e}")
+    search_terms_backfill.start(users_collection)
+
+def duplicate_key_message(error_details):
+    """Maps a duplicate key error (code 11000) to the API's 'already exists' message."""
+    key_pattern = (error_details or {}).get('keyPattern') or (error_details or {}).get('keyValue') or {}
+    for field, message in UNIQUE_USER_FIELDS.items():
+        if field in key_pattern:
+            return message
+    return "User already exists"
 
-def init_db_connection():
+def init_db_connection(max_retries=5, retry_delay=3):
     """
     Establishes and returns a connection to the MongoDB 'users' collection.
     Includes retry logic for more robust connection handling.
-    This function will be called once on app startup.
+    This function will be called once on app startup, and with max_retries=1 by the
+    health monitor when it needs to reconnect.
     """
+    global global_mongo_client
     global global_users_collection
     global db_connection_successful
 
     # If connection already established and flagged as successful, do nothing
     if db_connection_successful and global_users_collection is not None:
-        print("MongoDB connection already established and confirmed, skipping re-initialization.")
+        logger.debug("MongoDB connection already established and confirmed, skipping re-initialization.")
         return True
 
-    max_retries = 5
-    retry_delay = 3
-
     for attempt in range(max_retries):
         try:
-            print(f"Attempting MongoDB connection... (Attempt {attempt + 1}/{max_retries})")
+            logger.info(f"Attempting MongoDB connection... (Attempt {attempt + 1}/{max_retries})")
             # Create a new client instance
             client = MongoClient(
                 connection_string,
                 serverSelectionTimeoutMS=5000,  # 5 second timeout for server selection
                 connectTimeoutMS=10000,  # 10 second timeout for initial connection
                 socketTimeoutMS=10000,  # 10 second timeout for socket operations
+                maxPoolSize=MONGO_MAX_POOL_SIZE,
+                minPoolSize=MONGO_MIN_POOL_SIZE,
+                event_listeners=[MongoCommandTimer()],  # command timings for /metrics
             )
             
             # Test the connection
             client.admin.command('ping')
-            print("MongoDB ping successful.")
+            logger.debug("MongoDB ping successful.")
             
             # Get database and collection
             db = client.CruiseDB
             users_collection = db.users
+            ensure_indexes(users_collection)
             
-            # Verify collection access with a test operation
-            test_count = users_collection.count_documents({})
-            print(f"Successfully connected to MongoDB. Found {test_count} documents in users collection.")
+            # estimated_document_count reads collection metadata instead of scanning it
+            estimated_count = users_collection.estimated_document_count()
+            logger.info(f"Successfully connected to MongoDB. About {estimated_count} documents in users collection.")
             
             # Only set global variables if all tests pass
+            global_mongo_client = client
             global_users_collection = users_collection
             db_connection_successful = True
             
             return True
 
         except Exception as e:
-            print(f"MongoDB connection attempt {attempt + 1} failed: {str(e)}")
+            logger.warning(f"MongoDB connection attempt {attempt + 1} failed: {str(e)}")
             if attempt < max_retries - 1:
-                print(f"Retrying in {retry_delay} seconds...")
+                logger.info(f"Retrying in {retry_delay} seconds...")
                 time.sleep(retry_delay)
             else:
-                print("Failed to establish MongoDB connection after all retries.")
+                logger.error("Failed to establish MongoDB connection after all retries.")
                 global_users_collection = None
                 db_connection_successful = False
                 return False
 
     return False
 
+# Mapping from the field names used by the frontend to the field names stored in MongoDB
+USER_FIELD_MAP = {
+    'id': '_id',
+    'firstName': 'firstName',
+    'lastName': 'lastName',
+    'username': 'userName',
+    'email': 'email',
+    'phone': 'phoneNumber',
+    'gender': 'gender',
+    'dateOfBirth': 'dateOfBirth',
+    'status': 'status',
+}
+
+# Counting the users matching a search stops here; recordsFiltered then says "at least"
+# this many, which keeps broad searches (a single letter) from counting half the collection
+MAX_FILTERED_COUNT = int(os.getenv('MAX_FILTERED_COUNT', '10000'))
+
+# Page size used when a client does not send 'length', and the largest page we will serve
+DEFAULT_PAGE_LENGTH = 10
+MAX_PAGE_LENGTH = 500
+
+def format_date_of_birth(date_of_birth):
+    """Normalizes a stored dateOfBirth (datetime or ISO string) to YYYY-MM-DD."""
+    if isinstance(date_of_birth, datetime):
+        return date_of_birth.strftime('%Y-%m-%d')
+    if isinstance(date_of_birth, str):
+        return date_of_birth.split('T')[0]
+    return ''
+
+def format_user(user):
+    """
+    Converts a MongoDB user document into the shape returned by the API.
+    Used for documents already in memory (write responses); reads shape users in the
+    database with user_shape_stage, which must stay in step with this function.
+    """
+    return {
+        'id': str(user.get('_id', '')),
+        'firstName': user.get('firstName', ''),
+        'lastName': user.get('lastName', ''),
+        'username': user.get('userName', ''),
+        'email': user.get('email', ''),
+        'phone': user.get('phoneNumber', ''),
+        'gender': user.get('gender', ''),
+        'dateOfBirth': format_date_of_birth(user.get('dateOfBirth')),
+        'status': user.get('status', 'active')
+    }
+
+def user_shape_stage(keep=()):
+    """
+    Aggregation $project stage doing the work of format_user inside MongoDB: field
+    renaming, defaults and dateOfBirth formatting. Only the wire fields leave the
+    database, plus any raw fields named in `keep` (e.g. sort keys needed for cursors),
+    which the caller removes before responding.
+    """
+    stage = {
+        '_id': 0,
+        'id': {'$toString': '$_id'},
+        'firstName': {'$ifNull': ['$firstName', '']},
+        'lastName': {'$ifNull': ['$lastName', '']},
+        'username': {'$ifNull': ['$userName', '']},
+        'email': {'$ifNull': ['$email', '']},
+        'phone': {'$ifNull': ['$phoneNumber', '']},
+        'gender': {'$ifNull': ['$gender', '']},
+        'dateOfBirth': {'$switch': {
+            'branches': [
+                {'case': {'$eq': [{'$type': '$dateOfBirth'}, 'date']},
+                 'then': {'$dateToString': {'format': '%Y-%m-%d', 'date': '$dateOfBirth'}}},
+                {'case': {'$eq': [{'$type': '$dateOfBirth'}, 'string']},
+                 'then': {'$arrayElemAt': [{'$split': ['$dateOfBirth', 'T']}, 0]}},
+            ],
+            'default': ''
+        }},
+        'status': {'$ifNull': ['$status', 'active']},
+    }
+    for field in keep:
+        stage[f'_{field}'] = f'${field}'
+    return {'$project': stage}
+
+def shaped_users_pipeline(query, sort=None, skip=0, limit=None, keep=()):
+    """Builds match -> sort -> skip -> limit -> shape, so shaping only runs on the returned page."""
+    pipeline = [{'$match': query}]
+    if sort:
+        pipeline.append({'$sort': dict(sort)})
+    if skip:
+        pipeline.append({'$skip': skip})
+    if limit:
+        pipeline.append({'$limit': limit})
+    pipeline.append(user_shape_stage(keep))
+    return pipeline
+
+def parse_datatables_request(args):
+    """
+    Translates DataTables server-side parameters into a MongoDB query.
+    Returns (draw, query, sort, skip, limit). Raises ValueError on malformed input.
+    """
+    try:
+        draw = int(args.get('draw', 1))
+        skip = max(int(args.get('start', 0)), 0)
+        limit = int(args.get('length', DEFAULT_PAGE_LENGTH))
+    except ValueError:
+        raise ValueError("draw, start and length must be integers")
+
+    # DataTables sends length=-1 for "show all"; never serve more than one capped page
+    if limit <= 0 or limit > MAX_PAGE_LENGTH:
+        limit = MAX_PAGE_LENGTH
+
+    # Same matching as the typeahead: every word must prefix a searchTerms entry, which
+    # the multikey index answers with range scans (case and accents are normalized away)
+    query = {}
+    tokens = query_tokens(args.get('search[value]', ''))
+    if tokens:
+        query = build_search_query(tokens)
+
+    # order[i][column] refers to columns[N][data], which holds the frontend field name
+    sort = []
+    i = 0
+    while f'order[{i}][column]' in args:
+        column_index = args.get(f'order[{i}][column]')
+        column_name = args.get(f'columns[{column_index}][data]', '')
+        db_field = USER_FIELD_MAP.get(column_name)
+        if db_field in SORTABLE_USER_FIELDS:
+            direction = DESCENDING if args.get(f'order[{i}][dir]', 'asc') == 'desc' else ASCENDING
+            sort.append((db_field, direction))
+        i += 1
+
+    # Always finish with a unique key so paging is stable between requests
+    if not any(field == '_id' or field in UNIQUE_USER_FIELDS for field, _ in sort):
+        sort.append(('_id', ASCENDING))
+
+    return draw, query, sort, skip, limit
+
+# Keyset (cursor) pagination: sort keys a client may walk the collection by
+CURSOR_ORDER_FIELDS = ['_id', 'updatedAt']
+DEFAULT_CURSOR_PAGE_SIZE = 100
+MAX_CURSOR_PAGE_SIZE = 1000
+
+# Bulk import limits. A JSON body is parsed whole, so its size is capped before parsing;
+# CSV rows are counted while reading.
+BULK_IMPORT_MAX_ROWS = 50000
+BULK_IMPORT_MAX_JSON_BYTES = int(os.getenv('BULK_IMPORT_MAX_JSON_BYTES', str(16 * 1024 * 1024)))
+BULK_INSERT_BATCH_SIZE = 1000
+# Fields accepted in a bulk CSV upload, using the frontend names
+BULK_CSV_FIELDS = ['firstName', 'lastName', 'username', 'email', 'phone', 'gender', 'dateOfBirth', 'status']
+
+def build_user_document(new_user_data):
+    """
+    Validates incoming user data (frontend field names) and builds the MongoDB document.
+    Returns (user_document, None) on success or (None, error_message) when validation fails.
+    """
+    if not isinstance(new_user_data, dict):
+        return None, "User data must be an object"
+
+    # Validate required fields
+    required_fields = ['firstName', 'lastName', 'username', 'email']
+    missing_fields = [field for field in required_fields if not new_user_data.get(field)]
+    if missing_fields:
+        return None, f"Missing required fields: {', '.join(missing_fields)}"
+
+    cleaned = {}
+    for field in BULK_CSV_FIELDS:
+        value = new_user_data.get(field)
+        if value is None:
+            value = ''
+        if not isinstance(value, str):
+            return None, f"Field {field} must be a string"
+        cleaned[field] = value.strip()
+
+    now = datetime.utcnow()
+    # Create user document with proper field mapping
+    user_document = {
+        'firstName': cleaned['firstName'],
+        'lastName': cleaned['lastName'],
+        'userName': cleaned['username'],  # Map username to userName
+        'email': cleaned['email'],
+        'phoneNumber': cleaned['phone'],  # Map phone to phoneNumber
+        'gender': cleaned['gender'],
+        'status': cleaned['status'] or 'active',
+        'createdAt': now,
+        'updatedAt': now
+    }
+
+    # Handle date of birth if provided
+    if cleaned['dateOfBirth']:
+        try:
+            # Store as datetime object
+            user_document['dateOfBirth'] = datetime.strptime(cleaned['dateOfBirth'], '%Y-%m-%d')
+        except ValueError:
+            return None, "Invalid dateOfBirth format. Use YYYY-MM-DD format."
+
+    user_document[SEARCH_TERMS_FIELD] = search_terms(user_document)
+    return user_document, None
+
+class WriteConflict(Exception):
+    """A conditional write kept losing to concurrent writes."""
+
+# Attempts at a user update whose search fields were changed by another write in between
+SEARCH_TERMS_UPDATE_ATTEMPTS = 3
+
+def update_user_document(obj_id, user_updates):
+    """
+    Applies user_updates and returns the updated user, or None if there is no such user.
+    When they touch a searched field, the new searchTerms go in the same $set, computed
+    from the stored user; the update is conditional on the other searched fields being
+    unchanged and retried if they were. Raises WriteConflict when every attempt lost.
+    """
+    if not updates_search_terms(user_updates):
+        return global_users_collection.find_one_and_update(
+            {'_id': obj_id}, {'$set': user_updates}, return_document=ReturnDocument.AFTER
+        )
+    for _ in range(SEARCH_TERMS_UPDATE_ATTEMPTS):
+        current = global_users_collection.find_one({'_id': obj_id}, {field: 1 for field in SEARCH_SOURCE_FIELDS})
+        if current is None:
+            return None
+        query = {'_id': obj_id}
+        query.update({field: current.get(field) for field in SEARCH_SOURCE_FIELDS if field not in user_updates})
+        terms = search_terms({**current, **user_updates})
+        updated_user = global_users_collection.find_one_and_update(
+            query, {'$set': {**user_updates, SEARCH_TERMS_FIELD: terms}}, return_document=ReturnDocument.AFTER
+        )
+        if updated_user is not None:
+            return updated_user
+    raise WriteConflict("User was modified by another request; retry the update")
+
+def refresh_search_terms(user):
+    """
+    Recomputes searchTerms after a partial update or an outside write, writing only when
+    they changed. Skipped if the user was updated again meanwhile; that write refreshes them.
+    """
+    terms = search_terms(user)
+    if terms != user.get(SEARCH_TERMS_FIELD):
+        global_users_collection.update_one(
+            {'_id': user['_id'], 'updatedAt': user.get('updatedAt')},
+            {'$set': {SEARCH_TERMS_FIELD: terms}}
+        )
+        user[SEARCH_TERMS_FIELD] = terms
+
+# Write endpoints accept ?return=minimal|full: 'full' echoes the written user, 'minimal' only its id
+RETURN_PREFERENCES = ('full', 'minimal')
+
+def get_return_preference():
+    """Reads ?return= from the request. Returns None when the value is not recognised."""
+    preference = request.args.get('return', 'full').lower()
+    return preference if preference in RETURN_PREFERENCES else None
+
+def write_response(message, user, preference, status_code=200):
+    """Builds the JSON response for a write endpoint from the document it wrote."""
+    response_data = {"success": True, "message": message}
+    if preference == 'minimal':
+        response_data["id"] = str(user['_id'])
+    else:
+        response_data["user"] = format_user(user)
+    return jsonify(response_data), status_code
+
+def probe_database():
+    """Health check run by the monitor thread: ping the server, or reconnect if we never connected."""
+    if global_mongo_client is None or not db_connection_successful:
+        return init_db_connection(max_retries=1)
+    global_mongo_client.admin.command('ping')
+    return True
+
+db_health_monitor = DatabaseHealthMonitor(probe_database, db_circuit_breaker, interval=DB_HEALTH_CHECK_INTERVAL)
+
+# Cached user count and hot list pages. Local writes adjust or invalidate them at once;
+# the change stream watcher invalidates them for writes made by anyone else.
+USER_CACHE_TTL = float(os.getenv('USER_CACHE_TTL', '30'))
+USER_LIST_CACHE_SIZE = int(os.getenv('USER_LIST_CACHE_SIZE', '256'))
+# Only pages near the top of the grid are worth keeping
+USER_LIST_CACHE_MAX_OFFSET = int(os.getenv('USER_LIST_CACHE_MAX_OFFSET', '1000'))
+
+user_count_cache = TTLCache(maxsize=1, ttl=USER_CACHE_TTL)
+user_list_cache = TTLCache(maxsize=USER_LIST_CACHE_SIZE, ttl=USER_CACHE_TTL)
+# Concurrent identical reads share one query. Keys carry the cache generation, which every
+# write moves forward, so a read started after a write never joins one started before it.
+user_reads = SingleFlight()
+
+def is_fresh_request():
+    """?fresh=1 bypasses the caches (and refreshes them with the result)."""
+    return request.args.get('fresh', '').lower() in ('1', 'true')
+
+def get_total_user_count(fresh=False):
+    """Exact number of users, served from memory while the cached value is live."""
+    if not fresh:
+        cached_count = user_count_cache.get('total')
+        if cached_count is not None:
+            return cached_count
+    generation = user_count_cache.generation
+
+    def count_users():
+        total_count = global_users_collection.count_documents({})
+        user_count_cache.set('total', total_count, generation)
+        return total_count
+    return user_reads.do(('count', generation), count_users)
+
+# The collection version behind the ETags, kept between change events while the change
+# stream watcher is running (it then sees every write)
+users_version_cache = TTLCache(maxsize=1, ttl=USER_CACHE_TTL)
+
+def users_changed(count_delta=0):
+    """Called after every local write: shift the cached count and drop cached pages."""
+    user_count_cache.adjust('total', lambda count: count + count_delta)
+    user_list_cache.clear()
+    users_version_cache.clear()
+
+def invalidate_user_caches():
+    user_count_cache.clear()
+    user_list_cache.clear()
+    users_version_cache.clear()
+
+# Live change feed (GET /api/users/events). Events buffered for reconnecting clients,
+# and seconds between keepalive comments on idle connections.
+EVENT_BUFFER_SIZE = int(os.getenv('EVENT_BUFFER_SIZE', '1000'))
+EVENT_KEEPALIVE_SECONDS = float(os.getenv('EVENT_KEEPALIVE_SECONDS', '15'))
+user_events = EventHub(buffer_size=EVENT_BUFFER_SIZE)
+
+def user_event(op, user):
+    """Payload of a 'user' event: the operation, the user id and the shaped row (None for deletes)."""
+    return {'op': op, 'id': str(user['_id']), 'user': None if op == 'delete' else format_user(user)}
+
+def publish_user_change(op, user):
+    """Called by the write handlers. While the change stream runs it publishes every write itself."""
+    if not user_change_watcher.active:
+        user_events.publish('user', user_event(op, user))
+
+def handle_user_change(change):
+    """Change stream callback. Our own writes arrive here too; clearing is idempotent."""
+    # Backfilled or refreshed search terms change nothing a client sees; searches that
+    # would now match them catch up when the cached results expire
+    if search_terms_only_change(change):
+        return
+    operation = change.get('operationType')
+    if operation in ('insert', 'delete', 'replace', 'drop', 'invalidate'):
+        user_count_cache.clear()
+    user_list_cache.clear()
+    users_version_cache.clear()
+
+    if operation in ('insert', 'update', 'replace'):
+        # Missing when the user was deleted before the lookup; its delete event follows
+        document = change.get('fullDocument')
+        if document is not None:
+            user_events.publish('user', user_event('insert' if operation == 'insert' else 'update', document))
+            # Users written by other tools get their search terms here; ours already match
+            try:
+                refresh_search_terms(document)
+            except Exception:
+                logger.exception(f"Could not refresh search terms of user {document.get('_id')}")
+    elif operation == 'delete':
+        user_events.publish('user', user_event('delete', change['documentKey']))
+    elif operation in ('drop', 'invalidate'):
+        user_events.reset()
+
+def reset_user_state():
+    """The change stream may have missed events: drop caches, the version included."""
+    invalidate_user_caches()
+    user_events.reset()
+
+user_change_watcher = ChangeStreamWatcher(
+    lambda: global_users_collection,
+    handle_user_change,
+    on_reset=reset_user_state,
+    full_document='updateLookup'
+)
+
+def users_collection_version():
+    """
+    Returns (version, last_modified) for the users collection without reading the users.
+    Both are derived from the data, the cached count plus the newest _id and updatedAt
+    (single index lookups), so every worker process computes the same validators. While
+    the change stream watcher is active the result is kept until the next change event.
+    """
+    if not user_change_watcher.active:
+        return read_users_version()
+    cached = users_version_cache.get('version')
+    if cached is not None:
+        return cached
+    generation = users_version_cache.generation
+    version = read_users_version()
+    users_version_cache.set('version', version, generation)
+    return version
+
+def read_users_version():
+    newest = global_users_collection.find_one({}, {'_id': 1}, sort=[('_id', DESCENDING)])
+    latest = global_users_collection.find_one({}, {'updatedAt': 1}, sort=[('updatedAt', DESCENDING)])
+    last_modified = latest.get('updatedAt') if latest else None
+    if isinstance(last_modified, datetime):
+        last_modified = last_modified.replace(tzinfo=timezone.utc)
+    else:
+        last_modified = None
+    version = f"{get_total_user_count()}:{newest['_id'] if newest else ''}:{last_modified.isoformat() if last_modified else ''}"
+    return version, last_modified
+
+def make_etag(*parts):
+    return hashlib.sha1('|'.join(str(part) for part in parts).encode()).hexdigest()
+
+def is_not_modified(etag, last_modified):
+    """Evaluates If-None-Match (preferred) or If-Modified-Since against the current validators."""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if last_modified and request.if_modified_since:
+        return last_modified.replace(microsecond=0) <= request.if_modified_since
+    return False
+
+def add_validators(response, etag, last_modified):
+    """Attaches ETag/Last-Modified and asks clients to revalidate before reusing a cached copy."""
+    # Weak, so the same validator covers compressed and uncompressed bodies
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def not_modified_response(etag, last_modified):
+    return add_validators(Response(status=304), etag, last_modified)
+
+# Query parameters that change on every request without changing the page: DataTables'
+# draw counter (echoed back in the body) and jQuery's cache buster
+LIST_ETAG_IGNORED_ARGS = ('fresh', 'draw', '_')
+
+def list_etag(version):
+    """ETag of a list request at the given collection version."""
+    query_string = '&'.join(
+        f"{key}={value}" for key, value in sorted(request.args.items(multi=True))
+        if key not in LIST_ETAG_IGNORED_ARGS
+    )
+    return make_etag(version, request.path, query_string)
+
+def list_validators():
+    """Validators for a list request: the current collection version plus the query string."""
+    version, last_modified = users_collection_version()
+    return list_etag(version), last_modified
+
 # --- NEW: Route to serve the frontend HTML (correctly indented) ---
 @app.route('/onemore.html')
 def serve_onemore_html():
@@ -127,25 +727,41 @@ def serve_root_html():
 # --- END NEW ROUTES ---
 
 
+@app.route('/healthz', methods=['GET'])
+def liveness():
+    """Liveness probe: the process is up and serving requests."""
+    return jsonify({"status": "ok"}), 200
+
+@app.route('/readyz', methods=['GET'])
+def readiness():
+    """Readiness probe: connected to MongoDB and the circuit breaker is closed."""
+    ready = db_connection_successful and db_circuit_breaker.state == CircuitBreaker.CLOSED
+    return jsonify({
+        "status": "ready" if ready else "not_ready",
+        "database": "connected" if db_connection_successful else "disconnected",
+        "circuit": db_circuit_breaker.state
+    }), 200 if ready else 503
+
+
 @app.route('/api/users/count', methods=['GET'])
 def get_user_count():
     """Returns the total number of users in the collection."""
     # Check the flag for clearer status
     if not db_connection_successful or global_users_collection is None:
-        print("ERROR (get_user_count): Database connection not active.")
+        logger.error("Database connection not active.")
         return jsonify({
             "success": False,
             "error": "Database connection not established"
         }), 500
 
     try:
-        user_count = global_users_collection.count_documents({})
+        user_count = get_total_user_count(fresh=is_fresh_request())
         return jsonify({
             "success": True,
             "count": user_count
         }), 200
     except Exception as e:
-        print(f"ERROR (get_user_count): Exception during user count fetch: {e}")
+        logger.exception("Unexpected error")
         return jsonify({
             "success": False,
             "error": str(e)
@@ -155,11 +771,12 @@ def get_user_count():
 @app.route('/api/users', methods=['GET'])
 def get_users():
     """
-    Fetches all user documents from the 'users' collection and returns them as JSON.
-    Returns in the format expected by DataTables.
+    Fetches one page of user documents from the 'users' collection and returns them as JSON.
+    Implements the DataTables server-side processing protocol: paging (start/length),
+    sorting (order[...]) and searching (search[value]) are all done in MongoDB.
     """
     if not db_connection_successful or global_users_collection is None:
-        print("ERROR (get_users): Database connection not active.")
+        logger.error("Database connection not active.")
         return jsonify({
             "draw": 1,
             "recordsTotal": 0,
@@ -168,56 +785,73 @@ def get_users():
             "error": "Database connection not established"
         }), 500
 
+    # Clients walking the whole collection page by cursor instead of by offset
+    if 'cursor' in request.args or 'page_size' in request.args:
+        return get_users_by_cursor()
+
+    # Batch lookup of known users: ?ids=a,b,c (or repeated ids=)
+    if 'ids' in request.args:
+        user_ids = [part.strip() for value in request.args.getlist('ids') for part in value.split(',') if part.strip()]
+        return batch_get_response(user_ids)
+
     try:
-        print("DEBUG (get_users): Attempting to fetch users...")
-        # Get total count for recordsTotal
-        total_count = global_users_collection.count_documents({})
-        print(f"DEBUG (get_users): Total count in collection: {total_count}")
+        try:
+            draw, query, sort, skip, limit = parse_datatables_request(request.args)
+        except ValueError as e:
+            return jsonify({
+                "draw": 1,
+                "recordsTotal": 0,
+                "recordsFiltered": 0,
+                "data": [],
+                "error": str(e)
+            }), 400
+
+        fresh = is_fresh_request()
+        cache_key = (repr(query), tuple(sort), skip, limit)
+        cacheable = skip < USER_LIST_CACHE_MAX_OFFSET
+        cached_page = user_list_cache.get(cache_key) if cacheable and not fresh else None
+        if cached_page is None:
+            # Read before the page, so a concurrent write can only leave the version older
+            # than the body, and the next revalidation then fetches the page again
+            version, last_modified = users_collection_version()
+            etag = list_etag(version)
+            if not fresh and is_not_modified(etag, last_modified):
+                return not_modified_response(etag, last_modified)
+            generation = user_list_cache.generation
+
+            def load_page():
+                total_count = get_total_user_count(fresh)
+                # The filtered count is only needed when a search is active
+                filtered_count = (global_users_collection.count_documents(query, limit=MAX_FILTERED_COUNT)
+                                  if query else None)
+                users_list = list(global_users_collection.aggregate(
+                    shaped_users_pipeline(query, sort=sort, skip=skip, limit=limit)
+                ))
+                page = (version, last_modified, total_count, filtered_count, users_list)
+                if cacheable:
+                    user_list_cache.set(cache_key, page, generation)
+                return page
+            cached_page = user_reads.do(('page', cache_key, generation, version), load_page)
+
+        # The validators describe the version this page was built from, not the live one:
+        # without a change stream a cached page can be older than the collection
+        version, last_modified, total_count, filtered_count, users_list = cached_page
+        etag = list_etag(version)
+        if not fresh and is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        if filtered_count is None:
+            filtered_count = total_count
 
-        # Fetch all users
-        users_cursor = global_users_collection.find({})
-        users_list = []
-        
-        for user in users_cursor:
-            # Convert MongoDB ObjectId to string
-            user_id = str(user.get('_id', ''))
-            
-            # Handle date formatting
-            date_of_birth = user.get('dateOfBirth')
-            if isinstance(date_of_birth, datetime):
-                date_of_birth = date_of_birth.strftime('%Y-%m-%d')
-            elif isinstance(date_of_birth, str):
-                date_of_birth = date_of_birth.split('T')[0]
-            else:
-                date_of_birth = ''
-
-            formatted_user = {
-                'id': user_id,
-                'firstName': user.get('firstName', ''),
-                'lastName': user.get('lastName', ''),
-                'username': user.get('userName', ''),
-                'email': user.get('email', ''),
-                'phone': user.get('phoneNumber', ''),
-                'gender': user.get('gender', ''),
-                'dateOfBirth': date_of_birth,
-                'status': user.get('status', 'active')
-            }
-            users_list.append(formatted_user)
-
-        print(f"DEBUG (get_users): Successfully retrieved {len(users_list)} users")
-        
         response_data = {
-            "draw": int(request.args.get('draw', 1)),
+            "draw": draw,
             "recordsTotal": total_count,
-            "recordsFiltered": len(users_list),
+            "recordsFiltered": filtered_count,
             "data": users_list
         }
-        
-        print(f"DEBUG (get_users): Sending response with {len(users_list)} users")
-        return jsonify(response_data), 200
+        return add_validators(jsonify(response_data), etag, last_modified), 200
 
     except Exception as e:
-        print(f"ERROR (get_users): {str(e)}")
+        logger.exception("Unexpected error")
         return jsonify({
             "draw": 1,
             "recordsTotal": 0,
@@ -226,119 +860,421 @@ def get_users():
             "error": str(e)
         }), 500
 
+def get_users_by_cursor():
+    """
+    Keyset pagination for GET /api/users?page_size=N[&cursor=...][&order_by=_id|updatedAt].
+    Each page is an index range scan starting after the previous page, so deep pages
+    cost the same as the first one. Returns next_cursor=None on the last page.
+    """
+    try:
+        page_size = int(request.args.get('page_size', DEFAULT_CURSOR_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"success": False, "error": "page_size must be an integer"}), 400
+    page_size = min(max(page_size, 1), MAX_CURSOR_PAGE_SIZE)
+
+    order_by = request.args.get('order_by', '_id')
+    query = {}
+    cursor_token = request.args.get('cursor')
+    if cursor_token:
+        try:
+            order_by, value, last_id = decode_cursor(cursor_token)
+        except ValueError as e:
+            return jsonify({"success": False, "error": str(e)}), 400
+        query = build_keyset_query(order_by, value, last_id)
+
+    if order_by not in CURSOR_ORDER_FIELDS:
+        return jsonify({
+            "success": False,
+            "error": f"order_by must be one of: {', '.join(CURSOR_ORDER_FIELDS)}"
+        }), 400
+
+    try:
+        etag, last_modified = list_validators()
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
+
+        sort = [('_id', ASCENDING)] if order_by == '_id' else [(order_by, ASCENDING), ('_id', ASCENDING)]
+        # Fetch one extra document to learn whether another page exists
+        users_list = list(global_users_collection.aggregate(
+            shaped_users_pipeline(query, sort=sort, limit=page_size + 1, keep=('_id', order_by))
+        ))
+        has_more = len(users_list) > page_size
+        users_list = users_list[:page_size]
+        next_cursor = None
+        if has_more:
+            last_user = users_list[-1]
+            next_cursor = encode_cursor(order_by, {'_id': last_user['__id'], order_by: last_user.get(f'_{order_by}')})
+        for user in users_list:
+            user.pop('__id', None)
+            user.pop(f'_{order_by}', None)
+
+        return add_validators(jsonify({
+            "success": True,
+            "data": users_list,
+            "next_cursor": next_cursor
+        }), etag, last_modified), 200
+
+    except Exception as e:
+        logger.exception("Unexpected error")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# Typeahead search: matches returned by default and at most, and the number of index
+# matches ranked to pick them
+DEFAULT_SEARCH_LIMIT = 10
+MAX_SEARCH_LIMIT = 50
+SEARCH_CANDIDATE_LIMIT = int(os.getenv('SEARCH_CANDIDATE_LIMIT', '200'))
+
+@app.route('/api/users/search', methods=['GET'])
+def search_users():
+    """
+    Typeahead search: /api/users/search?q=jo+smi[&limit=10]. Every word of q must start a
+    word of the user's first or last name, username or email, or the digits of the phone.
+    Returns the best matches first, shaped like GET /api/users/<id>.
+    """
+    if not db_connection_successful or global_users_collection is None:
+        logger.error("Database connection not active.")
+        return jsonify({
+            "success": False,
+            "error": "Database connection not established"
+        }), 500
+
+    try:
+        limit = int(request.args.get('limit', DEFAULT_SEARCH_LIMIT))
+    except ValueError:
+        return jsonify({"success": False, "error": "limit must be an integer"}), 400
+    limit = min(max(limit, 1), MAX_SEARCH_LIMIT)
+
+    tokens = query_tokens(request.args.get('q', ''))
+    if not tokens:
+        return jsonify({"success": True, "data": []}), 200
+
+    try:
+        # Keystrokes repeat the same prefixes, so results share the hot list page cache
+        cache_key = ('search', tuple(tokens), limit)
+        results = None if is_fresh_request() else user_list_cache.get(cache_key)
+        if results is None:
+            generation = user_list_cache.generation
+
+            def search():
+                candidates = list(global_users_collection.aggregate(
+                    shaped_users_pipeline(build_search_query(tokens), limit=SEARCH_CANDIDATE_LIMIT)
+                ))
+                results = rank_users(candidates, tokens, limit)
+                user_list_cache.set(cache_key, results, generation)
+                return results
+            results = user_reads.do((cache_key, generation), search)
+        return jsonify({"success": True, "data": results}), 200
+
+    except Exception as e:
+        logger.exception("Unexpected error")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@app.route('/api/users/events', methods=['GET'])
+def user_events_stream():
+    """
+    Server-sent events: one 'user' event per created, updated or deleted user, or 'reset'
+    when the client has to reload. Reconnecting clients send Last-Event-ID (EventSource
+    does so automatically, or pass ?last_event_id=) and receive what they missed.
+    """
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    subscription = user_events.subscribe(last_event_id)
+
+    def generate():
+        try:
+            # Reconnect after 3s if the connection drops
+            yield 'retry: 3000\n\n'
+            yield from subscription.stream(keepalive=EVENT_KEEPALIVE_SECONDS)
+        finally:
+            subscription.close()
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/api/users/export', methods=['GET'])
+def export_users():
+    """
+    Streams every user as NDJSON (default) or CSV: /api/users/export?format=ndjson|csv.
+    Rows are read from a batched cursor and written as they arrive, so memory use does
+    not depend on the size of the collection.
+    """
+    if not db_connection_successful or global_users_collection is None:
+        logger.error("Database connection not active.")
+        return jsonify({
+            "success": False,
+            "error": "Database connection not established"
+        }), 500
+
+    export_format = request.args.get('format', 'ndjson').lower()
+    if export_format not in EXPORT_FORMATS:
+        return jsonify({
+            "success": False,
+            "error": f"format must be one of: {', '.join(EXPORT_FORMATS)}"
+        }), 400
+
+    def open_users_cursor():
+        return global_users_collection.aggregate(
+            shaped_users_pipeline({}, sort=[('_id', ASCENDING)]),
+            batchSize=EXPORT_BATCH_SIZE
+        )
+
+    return Response(
+        stream_with_context(export_chunks(open_users_cursor, export_format, USER_FIELD_MAP)),
+        mimetype=EXPORT_FORMATS[export_format],
+        headers={'Content-Disposition': f'attachment; filename=users.{export_format}'}
+    )
+
 @app.route('/api/users', methods=['POST'])
 def create_user():
     """Creates a new user document in the 'users' collection."""
     if not db_connection_successful or global_users_collection is None:
-        print("ERROR (create_user): Database connection not active.")
+        logger.error("Database connection not active.")
         return jsonify({
             "success": False,
             "error": "Database connection not established"
         }), 500
 
     try:
-        print("DEBUG (create_user): Received POST request to create user")
+        preference = get_return_preference()
+        if preference is None:
+            return jsonify({"success": False, "error": "return must be 'minimal' or 'full'"}), 400
+
         new_user_data = request.get_json()
         
         if not new_user_data:
-            print("ERROR (create_user): No data provided in request")
+            logger.info("No data provided in request")
             return jsonify({"success": False, "error": "No data provided"}), 400
 
-        print(f"DEBUG (create_user): Received data: {new_user_data}")
-
-        # Validate required fields
-        required_fields = ['firstName', 'lastName', 'username', 'email']
-        missing_fields = [field for field in required_fields if not new_user_data.get(field)]
-        if missing_fields:
-            error_msg = f"Missing required fields: {', '.join(missing_fields)}"
-            print(f"ERROR (create_user): {error_msg}")
+        user_document, error_msg = build_user_document(new_user_data)
+        if error_msg:
+            logger.info(error_msg)
             return jsonify({"success": False, "error": error_msg}), 400
 
-        # Create user document with proper field mapping
-        user_document = {
-            'firstName': new_user_data['firstName'].strip(),
-            'lastName': new_user_data['lastName'].strip(),
-            'userName': new_user_data['username'].strip(),  # Map username to userName
-            'email': new_user_data['email'].strip(),
-            'phoneNumber': new_user_data.get('phone', '').strip(),  # Map phone to phoneNumber
-            'gender': new_user_data.get('gender', '').strip(),
-            'status': new_user_data.get('status', 'active').strip(),
-            'createdAt': datetime.utcnow(),
-            'updatedAt': datetime.utcnow()
-        }
-
-        # Handle date of birth if provided
-        if 'dateOfBirth' in new_user_data and new_user_data['dateOfBirth']:
-            try:
-                # Store as datetime object
-                user_document['dateOfBirth'] = datetime.strptime(new_user_data['dateOfBirth'].strip(), '%Y-%m-%d')
-            except ValueError as e:
-                print(f"ERROR (create_user): Invalid date format: {e}")
-                return jsonify({
-                    "success": False,
-                    "error": "Invalid dateOfBirth format. Use YYYY-MM-DD format."
-                }), 400
-
-        print(f"DEBUG (create_user): Attempting to insert document: {user_document}")
         
-        # Check if username already exists
-        existing_user = global_users_collection.find_one({'userName': user_document['userName']})
-        if existing_user:
-            print(f"ERROR (create_user): Username {user_document['userName']} already exists")
-            return jsonify({
-                "success": False,
-                "error": "Username already exists"
-            }), 409
+        # Without the unique indexes, fall back to checking for duplicates before inserting
+        if not unique_indexes_ready:
+            for field, message in UNIQUE_USER_FIELDS.items():
+                if global_users_collection.find_one({field: user_document[field]}, {'_id': 1}):
+                    logger.info(message)
+                    return jsonify({"success": False, "error": message}), 409
 
-        # Check if email already exists
-        existing_user = global_users_collection.find_one({'email': user_document['email']})
-        if existing_user:
-            print(f"ERROR (create_user): Email {user_document['email']} already exists")
-            return jsonify({
-                "success": False,
-                "error": "Email already exists"
-            }), 409
-
-        result = global_users_collection.insert_one(user_document)
+        try:
+            result = global_users_collection.insert_one(user_document)
+        except DuplicateKeyError as e:
+            message = duplicate_key_message(e.details)
+            logger.info(message)
+            return jsonify({"success": False, "error": message}), 409
         
         if result and result.inserted_id:
-            print(f"DEBUG (create_user): Successfully created user with ID: {result.inserted_id}")
-            
-            # Get the complete user document from the database
-            created_user = global_users_collection.find_one({'_id': result.inserted_id})
-            if not created_user:
-                return jsonify({
-                    "success": False,
-                    "error": "User created but could not be retrieved"
-                }), 500
-
-            # Format the response data
-            response_data = {
-                'id': str(created_user['_id']),
-                'firstName': created_user['firstName'],
-                'lastName': created_user['lastName'],
-                'username': created_user['userName'],
-                'email': created_user['email'],
-                'phone': created_user.get('phoneNumber', ''),
-                'gender': created_user.get('gender', ''),
-                'status': created_user.get('status', 'active'),
-                'dateOfBirth': created_user['dateOfBirth'].strftime('%Y-%m-%d') if created_user.get('dateOfBirth') else ''
-            }
-            
-            return jsonify({
-                "success": True,
-                "message": "User created successfully",
-                "user": response_data
-            }), 201
+            logger.debug(f"Created user {result.inserted_id}")
+            users_changed(count_delta=1)
+            publish_user_change('insert', user_document)
+            # insert_one set _id on the document we built, so there is nothing to re-read
+            return write_response("User created successfully", user_document, preference, 201)
         else:
-            print("ERROR (create_user): Failed to create user - no inserted_id returned")
+            logger.error("Failed to create user - no inserted_id returned")
             return jsonify({
                 "success": False,
                 "error": "Failed to create user"
             }), 500
 
     except Exception as e:
-        print(f"ERROR (create_user): Exception during user creation: {str(e)}")
+        logger.exception("Unexpected error")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+class ImportRejected(Exception):
+    """The whole bulk import is refused; carries the response status."""
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+def too_many_rows():
+    return ImportRejected(f"Too many rows: at most {BULK_IMPORT_MAX_ROWS} users per import", 413)
+
+def read_import_rows():
+    """The rows of a bulk import request, stopping as soon as there are too many."""
+    upload = request.files.get('file')
+    if upload:
+        rows = []
+        try:
+            for row in csv.DictReader(io.TextIOWrapper(upload.stream, encoding='utf-8-sig')):
+                if len(rows) == BULK_IMPORT_MAX_ROWS:
+                    raise too_many_rows()
+                rows.append(row)
+        except (UnicodeDecodeError, csv.Error) as e:
+            raise ImportRejected(f"Invalid CSV file: {e}")
+        return rows
+
+    if (request.content_length or 0) > BULK_IMPORT_MAX_JSON_BYTES:
+        raise too_many_rows()
+    body = request.stream.read(BULK_IMPORT_MAX_JSON_BYTES + 1)
+    if len(body) > BULK_IMPORT_MAX_JSON_BYTES:
+        raise too_many_rows()
+    try:
+        payload = app.json.loads(body) if body else None
+    except ValueError:
+        payload = None
+    rows = payload.get('users') if isinstance(payload, dict) else payload
+    if not isinstance(rows, list):
+        raise ImportRejected("Provide a JSON array of users or a CSV file")
+    if len(rows) > BULK_IMPORT_MAX_ROWS:
+        raise too_many_rows()
+    return rows
+
+def inserted_ids(ids):
+    """Which of the given _ids exist, after an insert whose outcome is unknown."""
+    return {doc['_id'] for doc in global_users_collection.find({'_id': {'$in': ids}}, {'_id': 1})}
+
+def insert_import_batch(batch, results):
+    """
+    Inserts a batch of (row index, user document) pairs, recording each row's outcome in
+    results. Conflicts and per-document errors become row results; anything failing the
+    batch as a whole is raised.
+    """
+    # The unique indexes report conflicts from insert_many itself; without them,
+    # run one query per batch to find users that already exist
+    existing_values = {field: set() for field in UNIQUE_USER_FIELDS}
+    if not unique_indexes_ready:
+        for existing in global_users_collection.find(
+            {'$or': [
+                {field: {'$in': [doc[field] for _, doc in batch]}} for field in UNIQUE_USER_FIELDS
+            ]},
+            {field: 1 for field in UNIQUE_USER_FIELDS}
+        ):
+            for field in UNIQUE_USER_FIELDS:
+                existing_values[field].add(existing.get(field))
+
+    to_insert = []
+    for index, doc in batch:
+        conflict = next((message for field, message in UNIQUE_USER_FIELDS.items()
+                         if doc[field] in existing_values[field]), None)
+        if conflict:
+            results[index] = {"row": index + 1, "status": "duplicate", "error": conflict}
+        else:
+            to_insert.append((index, doc))
+    if not to_insert:
+        return
+
+    failed_positions = {}
+    try:
+        global_users_collection.insert_many([doc for _, doc in to_insert], ordered=False)
+    except BulkWriteError as e:
+        for write_error in e.details.get('writeErrors', []):
+            failed_positions[write_error['index']] = write_error
+
+    # insert_many assigns _id on the documents before sending them
+    for position, (index, doc) in enumerate(to_insert):
+        write_error = failed_positions.get(position)
+        if write_error is None:
+            results[index] = {"row": index + 1, "status": "created", "id": str(doc['_id'])}
+            publish_user_change('insert', doc)
+        elif write_error.get('code') == 11000:
+            results[index] = {"row": index + 1, "status": "duplicate", "error": duplicate_key_message(write_error)}
+        else:
+            results[index] = {"row": index + 1, "status": "failed", "error": write_error.get('errmsg', 'Insert failed')}
+
+@app.route('/api/users/bulk', methods=['POST'])
+def bulk_import_users():
+    """
+    Imports many users in one request, from a JSON array (or {"users": [...]}) or a CSV
+    upload in the 'file' form field. Every row is validated with the same rules as
+    create_user before anything is written, then valid rows are inserted in unordered
+    batches. The response reports the outcome of each row (1-based 'row' numbers). A
+    batch failing as a whole (e.g. the database went away) stops the import; its rows
+    and the remaining ones are reported failed, unless they turn out to be inserted.
+    """
+    if not db_connection_successful or global_users_collection is None:
+        logger.error("Database connection not active.")
+        return jsonify({
+            "success": False,
+            "error": "Database connection not established"
+        }), 500
+
+    try:
+        try:
+            rows = read_import_rows()
+        except ImportRejected as e:
+            return jsonify({"success": False, "error": str(e)}), e.status
+        if not rows:
+            return jsonify({"success": False, "error": "No data provided"}), 400
+
+        results = [None] * len(rows)
+        pending = []  # (row index, user document) pairs that passed validation
+        seen_usernames = {}
+        seen_emails = {}
+
+        # Validate everything up front, including duplicates within the upload itself
+        for index, row in enumerate(rows):
+            user_document, error_msg = build_user_document(row)
+            if error_msg:
+                results[index] = {"row": index + 1, "status": "invalid", "error": error_msg}
+                continue
+            if user_document['userName'] in seen_usernames:
+                results[index] = {
+                    "row": index + 1,
+                    "status": "duplicate",
+                    "error": f"Username repeats row {seen_usernames[user_document['userName']] + 1}"
+                }
+                continue
+            if user_document['email'] in seen_emails:
+                results[index] = {
+                    "row": index + 1,
+                    "status": "duplicate",
+                    "error": f"Email repeats row {seen_emails[user_document['email']] + 1}"
+                }
+                continue
+            seen_usernames[user_document['userName']] = index
+            seen_emails[user_document['email']] = index
+            pending.append((index, user_document))
+
+        try:
+            for batch_start in range(0, len(pending), BULK_INSERT_BATCH_SIZE):
+                batch = pending[batch_start:batch_start + BULK_INSERT_BATCH_SIZE]
+                try:
+                    insert_import_batch(batch, results)
+                except Exception as e:
+                    logger.exception(f"Bulk import stopped at row {batch[0][0] + 1}")
+                    try:
+                        landed = inserted_ids([doc['_id'] for _, doc in batch if '_id' in doc])
+                    except Exception:
+                        landed = set()
+                    for index, doc in pending[batch_start:]:
+                        if results[index] is not None:
+                            continue
+                        if doc.get('_id') in landed:
+                            results[index] = {"row": index + 1, "status": "created", "id": str(doc['_id'])}
+                            publish_user_change('insert', doc)
+                        else:
+                            results[index] = {"row": index + 1, "status": "failed", "error": f"Import stopped: {e}"}
+                    break
+        finally:
+            # Rows inserted before anything went wrong are visible to readers from now on
+            inserted = sum(1 for result in results if result is not None and result['status'] == 'created')
+            if inserted:
+                users_changed(count_delta=inserted)
+        logger.info(f"Imported {inserted} of {len(rows)} users")
+        return jsonify({
+            "success": inserted == len(rows),
+            "total": len(rows),
+            "inserted": inserted,
+            "failed": len(rows) - inserted,
+            "results": results
+        }), 200
+
+    except Exception as e:
+        logger.exception("Unexpected error")
         return jsonify({
             "success": False,
             "error": str(e)
@@ -349,7 +1285,7 @@ def update_user(user_id):
     """Updates an existing user document in the 'users' collection."""
     # Check the flag for clearer status
     if not db_connection_successful or global_users_collection is None:
-        print("ERROR (update_user): Database connection not active.")
+        logger.error("Database connection not active.")
         return jsonify({
             "success": False,
             "error": "Database connection not established"
@@ -362,6 +1298,10 @@ def update_user(user_id):
         except Exception:
             return jsonify({"success": False, "error": "Invalid user ID format"}), 400
 
+        preference = get_return_preference()
+        if preference is None:
+            return jsonify({"success": False, "error": "return must be 'minimal' or 'full'"}), 400
+
         user_updates = request.get_json()
         if not user_updates:
             return jsonify({"success": False, "error": "No update data provided"}), 400
@@ -369,6 +1309,7 @@ def update_user(user_id):
         # Prevent _id or id from being updated, as they are immutable or not intended for update
         user_updates.pop('_id', None)
         user_updates.pop('id', None)
+        user_updates.pop(SEARCH_TERMS_FIELD, None)
 
         # Map frontend field names to database field names before updating
         if 'username' in user_updates:
@@ -392,30 +1333,31 @@ def update_user(user_id):
 
         user_updates['updatedAt'] = datetime.utcnow() # Update timestamp for modification
 
-        # Perform the update operation
-        result = global_users_collection.update_one(
-            {'_id': obj_id}, # Query by MongoDB's ObjectId
-            {'$set': user_updates} # Use $set to update specific fields
-        )
+        # Perform the update, searchTerms included, and get the updated document back
+        try:
+            updated_user = update_user_document(obj_id, user_updates)
+        except DuplicateKeyError as e:
+            return jsonify({
+                "success": False,
+                "error": duplicate_key_message(e.details)
+            }), 409
+        except WriteConflict as e:
+            return jsonify({
+                "success": False,
+                "error": str(e)
+            }), 409
 
-        if result.matched_count == 0:
+        if updated_user is None:
             return jsonify({
                 "success": False,
                 "error": "User not found"
             }), 404
-        elif result.modified_count == 0:
-            return jsonify({
-                "success": True,
-                "message": "No changes made to user" # Case where data sent is identical to existing
-            }), 200
-        else:
-            return jsonify({
-                "success": True,
-                "message": "User updated successfully"
-            }), 200
+        users_changed()
+        publish_user_change('update', updated_user)
+        return write_response("User updated successfully", updated_user, preference)
 
     except Exception as e:
-        print(f"ERROR (update_user): Exception during user update: {e}")
+        logger.exception("Unexpected error")
         return jsonify({
             "success": False,
             "error": str(e)
@@ -426,7 +1368,7 @@ def delete_user(user_id):
     """Deletes a user document from the 'users' collection."""
     # Check the flag for clearer status
     if not db_connection_successful or global_users_collection is None:
-        print("ERROR (delete_user): Database connection not active.")
+        logger.error("Database connection not active.")
         return jsonify({
             "success": False,
             "error": "Database connection not established"
@@ -439,22 +1381,24 @@ def delete_user(user_id):
         except Exception:
             return jsonify({"success": False, "error": "Invalid user ID format"}), 400
 
-        # Perform the delete operation
-        result = global_users_collection.delete_one({'_id': obj_id})
+        preference = get_return_preference()
+        if preference is None:
+            return jsonify({"success": False, "error": "return must be 'minimal' or 'full'"}), 400
+
+        # Perform the delete operation, getting the removed document back
+        deleted_user = global_users_collection.find_one_and_delete({'_id': obj_id})
 
-        if result.deleted_count == 0:
+        if deleted_user is None:
             return jsonify({
                 "success": False,
                 "error": "User not found"
             }), 404
-        else:
-            return jsonify({
-                "success": True,
-                "message": "User deleted successfully"
-            }), 200
+        users_changed(count_delta=-1)
+        publish_user_change('delete', deleted_user)
+        return write_response("User deleted successfully", deleted_user, preference)
 
     except Exception as e:
-        print(f"ERROR (delete_user): Exception during user deletion: {e}")
+        logger.exception("Unexpected error")
         return jsonify({
             "success": False,
             "error": str(e)
@@ -464,7 +1408,7 @@ def delete_user(user_id):
 def get_user(user_id):
     """Fetches a single user document from the 'users' collection."""
     if not db_connection_successful or global_users_collection is None:
-        print("ERROR (get_user): Database connection not active.")
+        logger.error("Database connection not active.")
         return jsonify({
             "success": False,
             "error": "Database connection not established"
@@ -477,8 +1421,11 @@ def get_user(user_id):
         except Exception:
             return jsonify({"success": False, "error": "Invalid user ID format"}), 400
 
-        # Find the user
-        user = global_users_collection.find_one({'_id': obj_id})
+        # Find the user, already shaped by the database
+        user = user_reads.do(('user', obj_id, user_list_cache.generation), lambda: next(
+            global_users_collection.aggregate(shaped_users_pipeline({'_id': obj_id}, limit=1, keep=('updatedAt',))),
+            None
+        ))
         
         if not user:
             return jsonify({
@@ -486,42 +1433,152 @@ def get_user(user_id):
                 "error": "User not found"
             }), 404
 
-        # Format the user data
-        formatted_user = {
-            'id': str(user['_id']),
-            'firstName': user.get('firstName', ''),
-            'lastName': user.get('lastName', ''),
-            'username': user.get('userName', ''),
-            'email': user.get('email', ''),
-            'phone': user.get('phoneNumber', ''),
-            'gender': user.get('gender', ''),
-            'status': user.get('status', 'active')
-        }
+        # A user's version is its updatedAt; answer revalidations before serializing anything.
+        # Copied first: concurrent requests for the same user share the document.
+        user = dict(user)
+        updated_at = user.pop('_updatedAt', None)
+        last_modified = updated_at.replace(tzinfo=timezone.utc) if isinstance(updated_at, datetime) else None
+        etag = make_etag(obj_id, updated_at.isoformat() if last_modified else '')
+        if is_not_modified(etag, last_modified):
+            return not_modified_response(etag, last_modified)
 
-        # Handle date formatting
-        date_of_birth = user.get('dateOfBirth')
-        if isinstance(date_of_birth, datetime):
-            formatted_user['dateOfBirth'] = date_of_birth.strftime('%Y-%m-%d')
-        elif isinstance(date_of_birth, str):
-            formatted_user['dateOfBirth'] = date_of_birth.split('T')[0]
-        else:
-            formatted_user['dateOfBirth'] = ''
+        return add_validators(jsonify(user), etag, last_modified), 200
 
-        return jsonify(formatted_user), 200
+    except Exception as e:
+        logger.exception("Unexpected error")
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+# Ids accepted by one batch lookup (GET /api/users?ids=... or POST /api/users/batch)
+MAX_BATCH_IDS = int(os.getenv('MAX_BATCH_IDS', '1000'))
+
+def find_users_by_ids(user_ids):
+    """
+    Shaped users for a list of ids, fetched with one $in query and returned in the order
+    asked for: one entry per id, None where no user has it. Returns (users, missing ids);
+    ids that are not valid ObjectIds count as missing.
+    """
+    object_ids = {}
+    for user_id in user_ids:
+        if user_id not in object_ids:
+            object_ids[user_id] = ObjectId(user_id) if ObjectId.is_valid(user_id) else None
+    wanted = list(dict.fromkeys(obj_id for obj_id in object_ids.values() if obj_id is not None))
+
+    found = {}
+    if wanted:
+        shaped = user_reads.do(('batch', tuple(wanted), user_list_cache.generation), lambda: list(
+            global_users_collection.aggregate(shaped_users_pipeline({'_id': {'$in': wanted}}))
+        ))
+        found = {user['id']: user for user in shaped}
 
+    users = [found.get(str(object_ids[user_id])) if object_ids[user_id] is not None else None
+             for user_id in user_ids]
+    missing = list(dict.fromkeys(user_id for user_id, user in zip(user_ids, users) if user is None))
+    return users, missing
+
+def batch_get_response(user_ids):
+    if len(user_ids) > MAX_BATCH_IDS:
+        return jsonify({
+            "success": False,
+            "error": f"Too many ids: at most {MAX_BATCH_IDS} per request"
+        }), 400
+    try:
+        users, missing = find_users_by_ids(user_ids)
+        return jsonify({"success": True, "data": users, "missing": missing}), 200
     except Exception as e:
-        print(f"ERROR (get_user): Exception during user fetch: {str(e)}")
+        logger.exception("Unexpected error")
         return jsonify({
             "success": False,
             "error": str(e)
         }), 500
 
+@app.route('/api/users/batch', methods=['POST'])
+def get_users_batch():
+    """
+    Fetches many users by id in one round trip: POST {"ids": [...]}. Returns data with one
+    entry per id in the same order (null for ids with no user) and the missing ids.
+    Same as GET /api/users?ids=..., for lists too long for a URL.
+    """
+    if not db_connection_successful or global_users_collection is None:
+        logger.error("Database connection not active.")
+        return jsonify({
+            "success": False,
+            "error": "Database connection not established"
+        }), 500
+
+    payload = request.get_json(silent=True)
+    user_ids = payload.get('ids') if isinstance(payload, dict) else None
+    if not isinstance(user_ids, list) or not all(isinstance(user_id, str) for user_id in user_ids):
+        return jsonify({"success": False, "error": "Provide ids as a JSON array of strings"}), 400
+    return batch_get_response(user_ids)
+
+def warm_up():
+    """
+    Fills the user count cache, so the first requests of a new process skip the count.
+    Runs in a background thread: count_documents reads the whole _id index, which on a
+    large collection can outlast the time gunicorn gives a worker to boot. Requests
+    counting meanwhile join it (user_reads).
+    """
+    try:
+        get_total_user_count(fresh=True)
+    except Exception as e:
+        logger.warning(f"Warm-up failed: {e}")
+
+def start_services(connect=True, max_retries=5):
+    """
+    Starts the health monitor and change stream watcher, first connecting to MongoDB when
+    `connect` is set (otherwise the monitor connects in the background), then warms up
+    in the background.
+    Runs once per process: from __main__ for the development server, and in every worker
+    after the fork under gunicorn (gunicorn.conf.py). Returns False if the connection failed.
+    """
+    connected = True
+    if connect:
+        connected = init_db_connection(max_retries=max_retries)
+        if connected:
+            threading.Thread(target=warm_up, name='warm-up', daemon=True).start()
+    db_health_monitor.start()
+    user_change_watcher.start()
+    return connected
+
+def stop_services():
+    """Ends open event streams, stops the background threads and closes the MongoClient."""
+    user_events.close()
+    user_change_watcher.stop(timeout=5)
+    db_health_monitor.stop(timeout=5)
+    if global_mongo_client is not None:
+        global_mongo_client.close()
+
+def reinitialize_after_fork():
+    """
+    A forked child must not use its parent's MongoClient (pymongo clients are not fork-safe)
+    or share its event epoch, which would make event ids from different workers collide.
+    Nothing else survives the fork: the parent never starts background threads or serves
+    requests before forking.
+    """
+    global global_mongo_client, global_users_collection, db_connection_successful
+    global_mongo_client = None
+    global_users_collection = None
+    db_connection_successful = False
+    user_events.epoch = os.urandom(4).hex()
+
+os.register_at_fork(after_in_child=reinitialize_after_fork)
+
 if __name__ == '__main__':
-    # Initialize the database connection once when the Flask app is run
-    print("Initializing MongoDB connection...")
-    if init_db_connection():
-        print("MongoDB connection confirmed. Starting Flask application.")
-        app.run(debug=True, host='127.0.0.1', port=5001)
+    # Development server. In production run gunicorn -c gunicorn.conf.py Backend:app
+    if FAST_START:
+        # Start serving right away; the monitor's first check connects in the background
+        logger.info("Fast start: serving immediately, connecting to MongoDB in the background.")
+        start_services(connect=False)
+        app.run(debug=DEBUG, host='127.0.0.1', port=5001)
     else:
-        print("Failed to establish MongoDB connection. Application will not start.")
-        exit(1) 
\ No newline at end of file
+        # Initialize the database connection once when the Flask app is run
+        logger.info("Initializing MongoDB connection...")
+        if start_services():
+            logger.info("MongoDB connection confirmed. Starting Flask application.")
+            app.run(debug=DEBUG, host='127.0.0.1', port=5001)
+        else:
+            logger.critical("Failed to establish MongoDB connection. Application will not start.")
+            exit(1)
@@ -0,0 +1,53 @@
+"""
+Admission control for the Flask app, so cheap single-user requests stay fast while list,
+export and search traffic spikes. Route classes, limiters and token buckets are shared
+with the reports API (cruise_common/admission.py); init_app applies them per endpoint.
+
+Under gunicorn's gthread worker a waiting request still holds a thread, so the slots
+plus queue places of the limited classes must stay below GUNICORN_THREADS; the rest of
+the threads are then always free for the unlimited cheap classes.
+"""
+from flask import g, jsonify, request
+
+from cruise_common.admission import Rejected, RouteClass
+
+
+def client_key(trust_forwarded=False):
+    """The client's address; with trust_forwarded, the first X-Forwarded-For hop (behind a proxy)."""
+    if trust_forwarded:
+        forwarded = request.headers.get('X-Forwarded-For', '')
+        first_hop = forwarded.split(',', 1)[0].strip()
+        if first_hop:
+            return first_hop
+    return request.remote_addr or 'unknown'
+
+
+def init_app(app, route_classes, endpoint_classes, trust_forwarded=False):
+    """
+    Registers admission control on a Flask app. endpoint_classes maps endpoint names to
+    names in route_classes; unlisted endpoints are always admitted.
+    """
+    classes = {route_class.name: route_class for route_class in route_classes}
+
+    @app.before_request
+    def admit_request():
+        route_class = classes.get(endpoint_classes.get(request.endpoint))
+        if route_class is None:
+            return None
+        try:
+            route_class.admit(client_key(trust_forwarded))
+        except Rejected as rejected:
+            response = jsonify({
+                "success": False,
+                "error": str(rejected)
+            })
+            response.headers['Retry-After'] = str(rejected.retry_after)
+            return response, rejected.status
+        g.admitted_route_class = route_class
+
+    @app.teardown_request
+    def release_admission(exc):
+        # Streamed responses (export, events) keep their slot until the stream ends
+        route_class = g.pop('admitted_route_class', None)
+        if route_class is not None:
+            route_class.release()
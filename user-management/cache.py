@@ -0,0 +1,121 @@
+"""
+Small in-process caches for hot read paths.
+
+TTLCache is a thread-safe LRU map whose entries also expire after a fixed time-to-live.
+Each cache carries a generation number that moves forward on every invalidation or
+adjustment. A reader records the generation before it queries the database and passes
+it to set(). If a write happened in the meantime, the stale result is dropped instead
+of being cached.
+
+SingleFlight covers the moment a cache entry is missing: concurrent identical reads (many
+tabs loading the list at once, or all of them after an invalidation) share one database
+query instead of each running their own.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_MISSING = object()
+
+
+class TTLCache:
+    def __init__(self, maxsize=128, ttl=30.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation=None):
+        """Stores value unless the cache was invalidated after `generation` was read."""
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return False
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+            return True
+
+    def adjust(self, key, update):
+        """Applies update(value) to a live entry in place, e.g. to bump a cached count."""
+        with self._lock:
+            self.generation += 1
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return
+            self._data[key] = (update(value), expires_at)
+
+    def pop(self, key):
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    While a call for a key is running, other callers with the same key wait for it and get
+    its result (or its exception) instead of running their own. Nothing is kept after the
+    call returns. Put the cache generation in the key, so a reader that starts after a
+    write never gets a result read before it.
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def __len__(self):
+        return len(self._calls)
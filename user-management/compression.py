@@ -0,0 +1,31 @@
+"""
+Response compression negotiated from Accept-Encoding (see cruise_common/compression.py).
+
+compress_response applies it to a Flask response. Small bodies, streamed responses and
+already-encoded responses pass through untouched.
+"""
+from cruise_common.compression import choose_encoding, compress, is_compressible
+
+
+def compress_response(response, accept_encoding, min_size=1024, gzip_level=6, brotli_quality=4):
+    """Compresses a Flask response in place when it is worth it. Returns the response."""
+    response.vary.add('Accept-Encoding')
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or not is_compressible(response.status_code, response.mimetype, 'Content-Encoding' in response.headers)
+    ):
+        return response
+
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+    body = response.get_data()
+    if len(body) < min_size:
+        return response
+
+    compressed = compress(body, encoding, gzip_level=gzip_level, brotli_quality=brotli_quality)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    response.headers['Content-Length'] = str(len(compressed))
+    return response
@@ -0,0 +1,146 @@
+"""
+Background database health monitoring and a circuit breaker for request handling.
+
+Request threads never wait on a reconnect: they ask the breaker whether the database is
+usable and fail fast when it is not. A single monitor thread pings (or reconnects) on an
+interval and drives the breaker between its states:
+
+    closed     -> requests flow normally
+    open       -> requests are rejected immediately with a Retry-After hint
+    half_open  -> the database answered a probe again; a few trial requests are let through
+"""
+import logging
+import math
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=2, half_open_max_calls=2, close_after_probes=2, retry_after=5):
+        """
+        failure_threshold: consecutive failed probes before the breaker opens.
+        half_open_max_calls: trial requests allowed at once while half-open.
+        close_after_probes: successful probes in half-open state that close the breaker
+            even if no trial request came in.
+        retry_after: seconds suggested to rejected clients.
+        """
+        self.failure_threshold = failure_threshold
+        self.half_open_max_calls = half_open_max_calls
+        self.close_after_probes = close_after_probes
+        self.retry_after = retry_after
+        self._state = self.CLOSED
+        self._failures = 0
+        self._half_open_probes = 0
+        self._trial_calls = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        return self._state
+
+    def allow_request(self):
+        """Returns (allowed, is_trial). Trial requests must report back via record_trial_result."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True, False
+            if self._state == self.HALF_OPEN and self._trial_calls < self.half_open_max_calls:
+                self._trial_calls += 1
+                return True, True
+            return False, False
+
+    def record_trial_result(self, succeeded):
+        """Closes the breaker after a good trial request, re-opens it after a bad one."""
+        with self._lock:
+            self._trial_calls = max(self._trial_calls - 1, 0)
+            if self._state != self.HALF_OPEN:
+                return
+            if succeeded:
+                self._close()
+            else:
+                self._open()
+
+    def probe_succeeded(self):
+        with self._lock:
+            self._failures = 0
+            if self._state == self.OPEN:
+                logger.info("Database probe succeeded, circuit breaker half-open.")
+                self._state = self.HALF_OPEN
+                self._half_open_probes = 0
+                self._trial_calls = 0
+            elif self._state == self.HALF_OPEN:
+                self._half_open_probes += 1
+                if self._half_open_probes >= self.close_after_probes:
+                    self._close()
+
+    def probe_failed(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or (
+                self._state == self.CLOSED and self._failures >= self.failure_threshold
+            ):
+                self._open()
+
+    def retry_after_seconds(self):
+        return max(1, math.ceil(self.retry_after))
+
+    def _open(self):
+        if self._state != self.OPEN:
+            logger.warning("Database unavailable, circuit breaker open.")
+        self._state = self.OPEN
+        self._trial_calls = 0
+
+    def _close(self):
+        if self._state != self.CLOSED:
+            logger.info("Database healthy again, circuit breaker closed.")
+        self._state = self.CLOSED
+        self._failures = 0
+        self._trial_calls = 0
+
+
+class DatabaseHealthMonitor:
+    """Runs check() every `interval` seconds on a daemon thread and reports to the breaker."""
+
+    def __init__(self, check, breaker, interval=5.0):
+        """check: callable returning True when the database is reachable. It may block."""
+        self.check = check
+        self.breaker = breaker
+        self.interval = interval
+        self.last_check = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='db-health-monitor', daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def check_now(self):
+        try:
+            healthy = bool(self.check())
+        except Exception as e:
+            logger.warning(f"Database health check raised: {e}")
+            healthy = False
+        self.last_check = time.monotonic()
+        if healthy:
+            self.breaker.probe_succeeded()
+        else:
+            self.breaker.probe_failed()
+        return healthy
+
+    def _run(self):
+        self.check_now()
+        while not self._stop.wait(self.interval):
+            self.check_now()
@@ -0,0 +1,47 @@
+"""
+Server-sent events for the users change feed, on the shared hub (cruise_common/events.py).
+
+Each client's stream runs on a request thread, so its subscription is a thread-safe
+queue the stream blocks on.
+"""
+import queue
+
+from cruise_common import events
+from cruise_common.events import CLOSE, close_on_shutdown, format_sse
+
+
+class Subscription:
+    def __init__(self, hub, queue_size):
+        self.hub = hub
+        self._queue = queue.Queue(maxsize=queue_size)
+
+    def deliver(self, item):
+        """Called with the hub lock held. A subscriber that cannot keep up is reset."""
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            while True:
+                try:
+                    self._queue.get_nowait()
+                except queue.Empty:
+                    break
+            self._queue.put_nowait(self.hub.overflow_item(item))
+
+    def stream(self, keepalive=15.0):
+        """Yields SSE-formatted chunks until the hub closes, with a comment line when idle to detect disconnects."""
+        while True:
+            try:
+                item = self._queue.get(timeout=keepalive)
+            except queue.Empty:
+                yield ': keepalive\n\n'
+                continue
+            if item is CLOSE:
+                return
+            yield format_sse(item)
+
+    def close(self):
+        self.hub.unsubscribe(self)
+
+
+class EventHub(events.EventHub):
+    subscription_class = Subscription
@@ -0,0 +1,54 @@
+"""
+Gunicorn settings for serving the users API in production:
+
+    cd user-management && gunicorn -c gunicorn.conf.py Backend:app
+
+Each worker process imports the app after the fork and opens its own MongoClient before
+it accepts requests (post_worker_init), so no connection pool is shared between processes.
+Cache warm-up continues in the background while the worker serves. On SIGTERM workers
+stop accepting connections, close open event streams and give in-flight requests
+GUNICORN_GRACEFUL_TIMEOUT seconds to finish.
+
+    GUNICORN_BIND              address to listen on (default 0.0.0.0:5001)
+    WEB_CONCURRENCY            worker processes (default: one per CPU)
+    GUNICORN_THREADS           request threads per worker (default 32); every open
+                               /api/users/events stream holds one, and admission control
+                               (see admission.py) leaves at least 6 to cheap requests
+    GUNICORN_TIMEOUT           seconds a stuck worker gets before it is restarted (default 30)
+    GUNICORN_GRACEFUL_TIMEOUT  seconds in-flight requests get on shutdown (default 30)
+    GUNICORN_MAX_REQUESTS      recycle a worker after this many requests, 0 for never (default 0)
+    MONGO_MAX_POOL_SIZE / MONGO_MIN_POOL_SIZE
+                               connection pool of each worker's MongoClient (see Backend.py)
+"""
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5001')
+workers = int(os.getenv('WEB_CONCURRENCY', str(os.cpu_count() or 2)))
+# Requests mostly wait on MongoDB with the GIL released, so a worker's threads overlap
+worker_class = 'gthread'
+threads = int(os.getenv('GUNICORN_THREADS', '32'))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = max_requests // 10
+# Workers import the app themselves, after the fork
+preload_app = False
+
+
+def post_worker_init(worker):
+    """Connects this worker to MongoDB before it takes its first request; warm-up follows in the background."""
+    import Backend
+    from events import close_on_shutdown
+
+    # One connection attempt: the arbiter restarts workers that take longer than `timeout`
+    # to boot, and the health monitor keeps retrying in the background anyway
+    if not Backend.start_services(connect=not Backend.FAST_START, max_retries=1):
+        worker.log.warning("MongoDB unreachable, worker serving 503s until the health monitor reconnects")
+    close_on_shutdown(Backend.user_events)
+
+
+def worker_exit(server, worker):
+    import Backend
+
+    Backend.stop_services()
@@ -0,0 +1,38 @@
+"""
+Request metrics for the Flask app: init_app times every request with the shared recorder
+(cruise_common/observability.py) and serves render_metrics() at /metrics.
+"""
+from flask import Response, g, request
+
+from cruise_common.observability import (
+    MongoCommandTimer,
+    configure_logging,
+    finish_request,
+    render_metrics,
+    start_request,
+)
+
+
+def init_app(app):
+    """Registers the request hooks and the /metrics endpoint on a Flask app."""
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_token = start_request()
+
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        token = g.pop('metrics_token', None)
+        if token is None:
+            return
+        status = 500 if exc is not None else g.pop('metrics_status', 500)
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        finish_request(token, request.method, route, status)
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics():
+        return Response(render_metrics(), mimetype='text/plain; version=0.0.4')
@@ -0,0 +1,247 @@
+"""
+Typeahead search over users.
+
+Every user document carries a searchTerms array: the normalized (lower-cased, accents
+stripped) words of its names, username and email, the whole values themselves, and the
+digits and digit groups of its phone number. A multikey index on that array turns
+"starts with" into an index range scan, so a query costs the same on a million users as
+on a thousand.
+
+A query matches users having, for every query token, some term starting with it; the
+candidates are then ranked in process (exact word matches first, names before email
+and phone).
+"""
+import logging
+import os
+import re
+import socket
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
+
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+logger = logging.getLogger(__name__)
+
+SEARCH_TERMS_FIELD = 'searchTerms'
+# Longer values are indexed by their first MAX_TERM_LENGTH characters
+MAX_TERM_LENGTH = 64
+# Extra query tokens beyond this are ignored
+MAX_QUERY_TOKENS = 5
+
+# Shaped (wire) field, raw field, ranking weight
+SEARCH_FIELDS = [
+    ('firstName', 'firstName', 5),
+    ('lastName', 'lastName', 4),
+    ('username', 'userName', 3),
+    ('email', 'email', 2),
+    ('phone', 'phoneNumber', 1),
+]
+PHONE_FIELDS = {'phone'}
+# Raw fields searchTerms are computed from
+SEARCH_SOURCE_FIELDS = [raw_field for _, raw_field, _ in SEARCH_FIELDS]
+
+_WORD_SPLIT = re.compile(r'[^0-9a-z]+')
+_DIGIT_GROUPS = re.compile(r'[0-9]{2,}')
+_PHONE_QUERY = re.compile(r'^[0-9+()\-.]*[0-9][0-9+()\-.]*$')
+
+
+def normalize(text):
+    """Lower-cases and strips accents, so 'José' and 'jose' index the same."""
+    decomposed = unicodedata.normalize('NFKD', str(text))
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).casefold()
+
+
+def _digits(text):
+    return ''.join(c for c in str(text) if c.isdigit())
+
+
+def field_terms(field, value):
+    """
+    Terms for one shaped field: the whole value plus its words. Phones give their digits
+    and their digit groups as written, so '555 010' finds '+1 (555) 010-2000'.
+    """
+    if not value:
+        return set()
+    if field in PHONE_FIELDS:
+        digits = _digits(value)
+        if not digits:
+            return set()
+        return {term[:MAX_TERM_LENGTH] for term in [digits, *_DIGIT_GROUPS.findall(str(value))]}
+    text = normalize(value).strip()
+    terms = {text}
+    if field == 'email':
+        # The local part matters more than the domain shared by many users
+        terms.add(text.split('@', 1)[0])
+    terms.update(word for word in _WORD_SPLIT.split(text) if word)
+    return {term[:MAX_TERM_LENGTH] for term in terms if term}
+
+
+def search_terms(user):
+    """The searchTerms array for a raw user document."""
+    terms = set()
+    for field, raw_field, _ in SEARCH_FIELDS:
+        terms |= field_terms(field, user.get(raw_field))
+    return sorted(terms)
+
+
+def updates_search_terms(updates):
+    """True when a $set of raw fields changes any field searchTerms are computed from."""
+    return any(field in updates for field in SEARCH_SOURCE_FIELDS)
+
+
+def search_terms_only_change(change):
+    """
+    True for change stream update events that only set searchTerms, as the backfill and
+    refresh_search_terms do. Shaped users don't carry the field, so nothing visible changed.
+    """
+    if change.get('operationType') != 'update':
+        return False
+    description = change.get('updateDescription') or {}
+    updated = description.get('updatedFields') or {}
+    return (bool(updated) and set(updated) == {SEARCH_TERMS_FIELD}
+            and not description.get('removedFields') and not description.get('truncatedArrays'))
+
+
+def query_tokens(q):
+    """Splits a search box value into normalized tokens; phone-like tokens keep only digits."""
+    tokens = []
+    for token in normalize(q).split():
+        if _PHONE_QUERY.match(token):
+            token = _digits(token)
+        token = token[:MAX_TERM_LENGTH]
+        if token and token not in tokens:
+            tokens.append(token)
+    return tokens[:MAX_QUERY_TOKENS]
+
+
+def build_search_query(tokens):
+    """Every token must prefix some term. Anchored, case-sensitive regexes become index bounds."""
+    clauses = [{SEARCH_TERMS_FIELD: {'$regex': '^' + re.escape(token)}} for token in tokens]
+    return clauses[0] if len(clauses) == 1 else {'$and': clauses}
+
+
+def score_user(user, tokens):
+    """Relevance of a shaped user: per token, its best match over the fields."""
+    field_values = {field: field_terms(field, user.get(field)) for field, _, _ in SEARCH_FIELDS}
+    score = 0
+    for token in tokens:
+        best = 0
+        for field, _, weight in SEARCH_FIELDS:
+            for term in field_values[field]:
+                if term == token:
+                    best = max(best, weight * 3)
+                elif term.startswith(token):
+                    best = max(best, weight * 2 if len(token) * 2 >= len(term) else weight)
+        score += best
+    return score
+
+
+def rank_users(users, tokens, limit):
+    """Best matches first; ties go to shorter, then alphabetically earlier names."""
+    def sort_key(user):
+        name = f"{user.get('firstName', '')} {user.get('lastName', '')}"
+        return (-score_user(user, tokens), len(name), normalize(name), user.get('id', ''))
+    return sorted(users, key=sort_key)[:limit]
+
+
+class SearchTermsBackfill:
+    """
+    Fills in searchTerms for users written before the field existed (or by other tools)
+    in a background thread, one batch at a time with pause_seconds between batches, so a
+    large backfill doesn't compete with live traffic. start() is a no-op while a run is
+    active, so it can be called on every connect.
+
+    Every worker process calls start(), but only one runs the backfill at a time: the run
+    holds a lease on a lock document (lock_collection, in the users' database), renewed
+    after every batch. The others retry once per lease period, so the backfill resumes if
+    its holder dies, and find nothing left to do once it has finished.
+    """
+
+    LOCK_ID = 'search-terms-backfill'
+
+    def __init__(self, batch_size=1000, pause_seconds=0.5, lease_seconds=60, lock_collection='maintenanceLocks'):
+        self.batch_size = batch_size
+        self.pause_seconds = pause_seconds
+        self.lease_seconds = lease_seconds
+        self.lock_collection = lock_collection
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self, collection):
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._run_when_leased, args=(collection,), name='search-terms-backfill', daemon=True
+            )
+            self._thread.start()
+
+    def acquire(self, locks, owner):
+        """Takes or renews the lease. False while another process holds it."""
+        now = datetime.utcnow()
+        try:
+            return locks.find_one_and_update(
+                {'_id': self.LOCK_ID, '$or': [{'leaseUntil': {'$lt': now}}, {'owner': owner}]},
+                {'$set': {'owner': owner, 'leaseUntil': now + timedelta(seconds=self.lease_seconds)}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            ) is not None
+        except DuplicateKeyError:
+            # The lock document exists and is held by someone else
+            return False
+
+    def release(self, locks, owner):
+        locks.delete_one({'_id': self.LOCK_ID, 'owner': owner})
+
+    def _run_when_leased(self, collection):
+        locks = collection.database[self.lock_collection]
+        # Per process: workers forked from one parent must not share it
+        owner = f"{socket.gethostname()}:{os.getpid()}:{os.urandom(4).hex()}"
+        try:
+            while not self.acquire(locks, owner):
+                time.sleep(self.lease_seconds)
+        except Exception:
+            logger.exception("Search terms backfill could not take its lock")
+            return
+        try:
+            self._run(collection, lambda: self.acquire(locks, owner))
+        finally:
+            try:
+                self.release(locks, owner)
+            except Exception:
+                logger.warning("Could not release the search terms backfill lock; it expires on its own")
+
+    def _run(self, collection, renew_lease=lambda: True):
+        updated = 0
+        last_id = None
+        projection = {raw_field: 1 for raw_field in SEARCH_SOURCE_FIELDS}
+        try:
+            while True:
+                query = {SEARCH_TERMS_FIELD: {'$exists': False}}
+                if last_id is not None:
+                    query['_id'] = {'$gt': last_id}
+                batch = list(collection.find(query, projection).sort('_id', 1).limit(self.batch_size))
+                if not batch:
+                    break
+                # Guarded on the field still being missing, so concurrent writes win
+                collection.bulk_write([
+                    UpdateOne({'_id': user['_id'], SEARCH_TERMS_FIELD: {'$exists': False}},
+                              {'$set': {SEARCH_TERMS_FIELD: search_terms(user)}})
+                    for user in batch
+                ], ordered=False)
+                updated += len(batch)
+                last_id = batch[-1]['_id']
+                if len(batch) < self.batch_size:
+                    break
+                if not renew_lease():
+                    logger.warning(f"Search terms backfill lost its lock after {updated} users")
+                    return
+                time.sleep(self.pause_seconds)
+        except Exception:
+            logger.exception(f"Search terms backfill stopped after {updated} users")
+            return
+        if updated:
+            logger.info(f"Backfilled search terms for {updated} users")
@@ -0,0 +1,25 @@
+"""
+JSON serialization for the user management API.
+
+MongoJSONProvider plugs the shared serializers (cruise_common/serialization.py) into
+Flask 3 (app.json): orjson when it is installed, ObjectId as its hex string and datetime
+as ISO-8601, the same contract as the reports API.
+"""
+from flask.json.provider import DefaultJSONProvider
+
+from cruise_common.serialization import dumps, dumps_bytes, loads, mongo_default
+
+
+class MongoJSONProvider(DefaultJSONProvider):
+    default = staticmethod(mongo_default)
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        # Build the body as bytes directly instead of str -> bytes
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
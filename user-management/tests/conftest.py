@@ -0,0 +1,48 @@
+"""
+Test setup for the users API. Run from user-management/:
+
+    python -m pytest -q
+
+The service directory goes on sys.path, and the `backend` fixture points the module at an
+empty mongomock collection, as if start_services() had connected. mongomock has no $type
+expression, so the shape stage passes dateOfBirth through unformatted.
+"""
+import os
+import sys
+
+import mongomock
+import pytest
+
+SERVICE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, SERVICE_DIR)
+# cruise_common/, as the service itself does
+sys.path.append(os.path.dirname(SERVICE_DIR))
+
+# Every request comes from the same client; tests of the rate limits set buckets themselves
+for route_class in ('list', 'bulk', 'search', 'stream', 'read', 'write'):
+    os.environ[f'ADMISSION_{route_class.upper()}_RATE'] = '0'
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    """The Backend module connected to an empty mongomock users collection."""
+    import Backend as module
+
+    client = mongomock.MongoClient()
+    monkeypatch.setattr(module, 'global_mongo_client', client)
+    monkeypatch.setattr(module, 'global_users_collection', client.CruiseDB.users)
+    monkeypatch.setattr(module, 'db_connection_successful', True)
+    shape_stage = module.user_shape_stage
+
+    def mongomock_shape_stage(keep=()):
+        stage = shape_stage(keep)
+        stage['$project']['dateOfBirth'] = {'$ifNull': ['$dateOfBirth', '']}
+        return stage
+    monkeypatch.setattr(module, 'user_shape_stage', mongomock_shape_stage)
+    module.invalidate_user_caches()
+    return module
+
+
+@pytest.fixture
+def client(backend):
+    return backend.app.test_client()
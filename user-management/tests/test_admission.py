@@ -0,0 +1,25 @@
+from cruise_common.admission import TokenBuckets
+
+
+def route_class(backend, name):
+    return next(route_class for route_class in backend.ADMISSION_ROUTE_CLASSES if route_class.name == name)
+
+
+def test_requests_over_the_client_rate_get_429(backend, client, monkeypatch):
+    monkeypatch.setattr(route_class(backend, 'list'), 'buckets', TokenBuckets(rate=1, burst=1))
+
+    first = client.get('/api/users/count')
+    second = client.get('/api/users/count')
+
+    assert first.status_code == 200
+    assert second.status_code == 429
+    assert second.headers['Retry-After'] == '1'
+    assert second.get_json() == {'success': False, 'error': 'Too many requests, slow down'}
+
+
+def test_admitted_requests_give_their_slot_back(backend, client):
+    limiter = route_class(backend, 'list').limiter
+
+    for _ in range(limiter.concurrency + 1):
+        assert client.get('/api/users/count').status_code == 200
+    assert limiter.active == 0
@@ -0,0 +1,64 @@
+from bson.objectid import ObjectId
+
+
+def insert_users(backend, count):
+    ids = backend.global_users_collection.insert_many([
+        {'firstName': f'First{i}', 'lastName': f'Last{i}', 'userName': f'user{i}', 'email': f'user{i}@example.com'}
+        for i in range(count)
+    ]).inserted_ids
+    return [str(user_id) for user_id in ids]
+
+
+def test_users_come_back_in_the_order_asked_for(backend, client):
+    ids = insert_users(backend, 3)
+    wanted = [ids[2], ids[0], ids[1]]
+
+    body = client.post('/api/users/batch', json={'ids': wanted}).get_json()
+
+    assert body['success'] is True
+    assert [user['id'] for user in body['data']] == wanted
+    assert body['data'][0]['username'] == 'user2'
+    assert body['missing'] == []
+
+
+def test_duplicate_ids_get_an_entry_each_from_one_lookup(backend, client):
+    ids = insert_users(backend, 2)
+
+    body = client.post('/api/users/batch', json={'ids': [ids[1], ids[0], ids[1]]}).get_json()
+
+    assert [user['id'] for user in body['data']] == [ids[1], ids[0], ids[1]]
+
+
+def test_invalid_and_unknown_ids_are_null_and_reported_missing(backend, client):
+    ids = insert_users(backend, 1)
+    unknown = str(ObjectId())
+
+    body = client.post('/api/users/batch', json={'ids': ['not-an-id', ids[0], unknown, 'not-an-id']}).get_json()
+
+    assert [user and user['id'] for user in body['data']] == [None, ids[0], None, None]
+    assert body['missing'] == ['not-an-id', unknown]
+
+
+def test_get_with_ids_matches_the_post(backend, client):
+    ids = insert_users(backend, 3)
+
+    body = client.get('/api/users', query_string={'ids': f'{ids[1]},{ids[0]}'}).get_json()
+
+    assert [user['id'] for user in body['data']] == [ids[1], ids[0]]
+
+
+def test_too_many_ids_are_rejected(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'MAX_BATCH_IDS', 2)
+    ids = [str(ObjectId()) for _ in range(3)]
+
+    response = client.post('/api/users/batch', json={'ids': ids})
+
+    assert response.status_code == 400
+    assert 'at most 2' in response.get_json()['error']
+    assert client.post('/api/users/batch', json={'ids': ids[:2]}).status_code == 200
+
+
+def test_ids_must_be_a_list_of_strings(backend, client):
+    assert client.post('/api/users/batch', json={'ids': 'abc'}).status_code == 400
+    assert client.post('/api/users/batch', json={'ids': [1, 2]}).status_code == 400
+    assert client.post('/api/users/batch', json=['abc']).status_code == 400
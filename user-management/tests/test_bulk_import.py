@@ -0,0 +1,142 @@
+import io
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+
+def user(i, **fields):
+    return {'firstName': f'First{i}', 'lastName': f'Last{i}', 'username': f'user{i}',
+            'email': f'user{i}@example.com', **fields}
+
+
+def statuses(response):
+    return [result['status'] for result in response.get_json()['results']]
+
+
+def test_json_array_and_users_object_are_imported(backend, client):
+    first = client.post('/api/users/bulk', json=[user(1), user(2)])
+    second = client.post('/api/users/bulk', json={'users': [user(3)]})
+
+    assert first.status_code == 200
+    assert first.get_json()['inserted'] == 2
+    assert statuses(second) == ['created']
+    assert backend.global_users_collection.count_documents({}) == 3
+    stored = backend.global_users_collection.find_one({'userName': 'user3'})
+    assert str(stored['_id']) == second.get_json()['results'][0]['id']
+
+
+def test_csv_upload_is_imported_and_invalid_rows_reported(backend, client):
+    csv_file = io.BytesIO(
+        '﻿firstName,lastName,username,email\n'
+        'Ana,Silva,ana,ana@example.com\n'
+        'Bia,,bia,bia@example.com\n'.encode('utf-8')
+    )
+
+    response = client.post('/api/users/bulk', data={'file': (csv_file, 'users.csv')})
+
+    body = response.get_json()
+    assert statuses(response) == ['created', 'invalid']
+    assert 'lastName' in body['results'][1]['error']
+    assert (body['inserted'], body['failed'], body['success']) == (1, 1, False)
+
+
+def test_duplicates_within_the_upload_are_reported_against_the_first_row(backend, client):
+    response = client.post('/api/users/bulk', json=[
+        user(1), user(2, username='user1'), user(3, email='user1@example.com')
+    ])
+
+    results = response.get_json()['results']
+    assert statuses(response) == ['created', 'duplicate', 'duplicate']
+    assert results[1]['error'] == 'Username repeats row 1'
+    assert results[2]['error'] == 'Email repeats row 1'
+
+
+def test_existing_users_are_duplicates_without_unique_indexes(backend, client):
+    client.post('/api/users/bulk', json=[user(1)])
+
+    response = client.post('/api/users/bulk', json=[user(2, email='user1@example.com'), user(3)])
+
+    assert statuses(response) == ['duplicate', 'created']
+    assert response.get_json()['results'][0]['error'] == 'Email already exists'
+
+
+def test_duplicate_key_errors_map_to_row_results(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'unique_indexes_ready', True)
+    collection = backend.global_users_collection
+    insert_many = collection.insert_many
+
+    def insert_with_conflict(documents, ordered=True):
+        insert_many(documents[1:], ordered=ordered)
+        raise BulkWriteError({'writeErrors': [
+            {'index': 0, 'code': 11000, 'keyPattern': {'userName': 1}, 'errmsg': 'E11000 duplicate key'}
+        ]})
+    monkeypatch.setattr(collection, 'insert_many', insert_with_conflict)
+
+    response = client.post('/api/users/bulk', json=[user(1), user(2)])
+
+    results = response.get_json()['results']
+    assert statuses(response) == ['duplicate', 'created']
+    assert results[0]['error'] == 'Username already exists'
+
+
+def test_batch_failing_as_a_whole_stops_the_import_and_keeps_caches_right(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'BULK_INSERT_BATCH_SIZE', 1)
+    collection = backend.global_users_collection
+    insert_many = collection.insert_many
+    calls = []
+
+    def insert_then_lose_connection(documents, ordered=True):
+        calls.append(len(documents))
+        if len(calls) > 1:
+            raise AutoReconnect('connection reset')
+        return insert_many(documents, ordered=ordered)
+    monkeypatch.setattr(collection, 'insert_many', insert_then_lose_connection)
+    assert backend.get_total_user_count() == 0
+
+    response = client.post('/api/users/bulk', json=[user(1), user(2), user(3)])
+
+    assert response.status_code == 200
+    assert statuses(response) == ['created', 'failed', 'failed']
+    assert 'connection reset' in response.get_json()['results'][1]['error']
+    assert calls == [1, 1]
+    assert backend.get_total_user_count() == 1
+
+
+def test_rows_of_a_failed_batch_that_landed_are_reported_created(backend, client, monkeypatch):
+    collection = backend.global_users_collection
+    insert_many = collection.insert_many
+
+    def insert_then_time_out(documents, ordered=True):
+        insert_many(documents, ordered=ordered)
+        raise AutoReconnect('timed out waiting for the reply')
+    monkeypatch.setattr(collection, 'insert_many', insert_then_time_out)
+
+    response = client.post('/api/users/bulk', json=[user(1), user(2)])
+
+    assert statuses(response) == ['created', 'created']
+    assert backend.get_total_user_count() == 2
+
+
+def test_row_limit_is_checked_while_reading_csv(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'BULK_IMPORT_MAX_ROWS', 2)
+    rows = ''.join(f'First{i},Last{i},user{i},user{i}@example.com\n' for i in range(3))
+    csv_file = io.BytesIO(('firstName,lastName,username,email\n' + rows).encode())
+
+    response = client.post('/api/users/bulk', data={'file': (csv_file, 'users.csv')})
+
+    assert response.status_code == 413
+    assert backend.global_users_collection.count_documents({}) == 0
+
+
+def test_json_over_the_row_or_size_limit_is_refused(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'BULK_IMPORT_MAX_ROWS', 2)
+    assert client.post('/api/users/bulk', json=[user(i) for i in range(3)]).status_code == 413
+
+    monkeypatch.setattr(backend, 'BULK_IMPORT_MAX_JSON_BYTES', 100)
+    assert client.post('/api/users/bulk', json=[user(1), user(2)]).status_code == 413
+    assert backend.global_users_collection.count_documents({}) == 0
+
+
+def test_body_that_is_not_a_list_of_users_is_rejected(backend, client):
+    assert client.post('/api/users/bulk', json={'user': user(1)}).status_code == 400
+    assert client.post('/api/users/bulk', data='not json', content_type='application/json').status_code == 400
+    assert client.post('/api/users/bulk', json=[]).status_code == 400
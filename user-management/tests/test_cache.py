@@ -0,0 +1,118 @@
+import threading
+import time
+
+import pytest
+
+import cache
+from cache import TTLCache
+
+
+def test_result_read_before_an_invalidation_is_not_cached():
+    users = TTLCache()
+    generation = users.generation
+    users.clear()
+
+    assert users.set('page', ['stale'], generation) is False
+    assert users.get('page') is None
+    assert users.set('page', ['fresh'], users.generation) is True
+    assert users.get('page') == ['fresh']
+
+
+def test_pop_and_adjust_move_the_generation_on():
+    counts = TTLCache()
+    counts.set('total', 10)
+    generation = counts.generation
+
+    counts.adjust('total', lambda total: total + 1)
+    assert counts.get('total') == 11
+    assert counts.set('total', 10, generation) is False
+
+    generation = counts.generation
+    counts.pop('total')
+    assert counts.get('total') is None
+    assert counts.set('total', 11, generation) is False
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(cache.time, 'monotonic', lambda: now[0])
+    users = TTLCache(ttl=30)
+    users.set('page', ['a'])
+
+    now[0] += 29
+    assert users.get('page') == ['a']
+    now[0] += 2
+    assert users.get('page', 'missing') == 'missing'
+    assert len(users) == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    users = TTLCache(maxsize=2)
+    users.set('a', 1)
+    users.set('b', 2)
+    users.get('a')
+
+    users.set('c', 3)
+
+    assert (users.get('a'), users.get('b'), users.get('c')) == (1, None, 3)
+
+
+class CountingEvent(threading.Event):
+    """An Event that counts the threads that waited on it."""
+
+    def __init__(self):
+        super().__init__()
+        self.waiters = 0
+
+    def wait(self, timeout=None):
+        self.waiters += 1
+        return super().wait(timeout)
+
+
+class CountingCall(cache._Call):
+    def __init__(self):
+        super().__init__()
+        self.done = CountingEvent()
+
+
+def test_concurrent_identical_reads_share_one_call(monkeypatch):
+    flight = cache.SingleFlight()
+    calls = []
+    started, release = threading.Event(), threading.Event()
+    monkeypatch.setattr(cache, '_Call', CountingCall)
+
+    def read():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return ['users']
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do('page', read))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    call = flight._calls['page']
+    deadline = time.monotonic() + 5
+    while call.done.waiters < 3 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == [['users']] * 4
+    assert len(calls) == 1
+    assert len(flight) == 0
+
+
+def test_waiters_get_the_leaders_exception_and_the_key_is_freed():
+    flight = cache.SingleFlight()
+
+    def fail():
+        raise ConnectionError('database unavailable')
+
+    with pytest.raises(ConnectionError):
+        flight.do('page', fail)
+    assert len(flight) == 0
+    assert flight.do('page', lambda: 'retried') == 'retried'
@@ -0,0 +1,34 @@
+from datetime import datetime
+
+
+def walk(client, **params):
+    pages, cursor = [], None
+    while True:
+        query = dict(params, **({'cursor': cursor} if cursor else {}))
+        body = client.get('/api/users', query_string=query).get_json()
+        pages.append([user['username'] for user in body['data']])
+        cursor = body['next_cursor']
+        if cursor is None:
+            return pages
+
+
+def test_cursor_pages_cover_every_user_once_in_order(backend, client):
+    backend.global_users_collection.insert_many([
+        {'userName': f'user{i}', 'email': f'user{i}@example.com', 'updatedAt': datetime(2024, 1, 1 + (i * 7) % 5)}
+        for i in range(7)
+    ])
+
+    by_id = walk(client, page_size=3)
+    by_update = walk(client, page_size=3, order_by='updatedAt')
+
+    assert by_id == [['user0', 'user1', 'user2'], ['user3', 'user4', 'user5'], ['user6']]
+    walked = [name for page in by_update for name in page]
+    expected = sorted(backend.global_users_collection.find(), key=lambda user: (user['updatedAt'], user['_id']))
+    assert walked == [user['userName'] for user in expected]
+
+
+def test_tampered_cursor_is_rejected(client):
+    response = client.get('/api/users', query_string={'page_size': 3, 'cursor': 'not-a-cursor'})
+
+    assert response.status_code == 400
+    assert response.get_json() == {'success': False, 'error': 'Invalid cursor'}
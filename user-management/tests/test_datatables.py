@@ -0,0 +1,86 @@
+import pytest
+from pymongo import ASCENDING, DESCENDING
+from werkzeug.datastructures import MultiDict
+
+import search
+
+COLUMNS = ['id', 'firstName', 'lastName', 'username', 'email', 'phone', 'gender', 'dateOfBirth', 'status']
+
+
+def datatables_args(order=(), **params):
+    args = {f'columns[{i}][data]': name for i, name in enumerate(COLUMNS)}
+    for i, (column, direction) in enumerate(order):
+        args[f'order[{i}][column]'] = str(COLUMNS.index(column))
+        args[f'order[{i}][dir]'] = direction
+    args.update(params)
+    return MultiDict(args)
+
+
+def insert_users(backend, names):
+    users = []
+    for i, (first, last) in enumerate(names):
+        user = {'firstName': first, 'lastName': last, 'userName': f'user{i}', 'email': f'user{i}@example.com'}
+        user[search.SEARCH_TERMS_FIELD] = search.search_terms(user)
+        users.append(user)
+    backend.global_users_collection.insert_many(users)
+
+
+def test_paging_parameters_are_bounded(backend):
+    draw, _, _, skip, limit = backend.parse_datatables_request(datatables_args(draw='4', start='20', length='25'))
+    assert (draw, skip, limit) == (4, 20, 25)
+
+    _, _, _, skip, limit = backend.parse_datatables_request(datatables_args(start='-5', length='-1'))
+    assert (skip, limit) == (0, backend.MAX_PAGE_LENGTH)
+
+    _, _, _, _, limit = backend.parse_datatables_request(datatables_args())
+    assert limit == backend.DEFAULT_PAGE_LENGTH
+
+    with pytest.raises(ValueError):
+        backend.parse_datatables_request(datatables_args(start='ten'))
+
+
+def test_sort_columns_map_to_stored_fields_with_an_id_tiebreak(backend):
+    _, _, sort, _, _ = backend.parse_datatables_request(
+        datatables_args(order=[('phone', 'desc'), ('username', 'asc')])
+    )
+    assert sort == [('phoneNumber', DESCENDING), ('userName', ASCENDING)]
+
+    _, _, sort, _, _ = backend.parse_datatables_request(datatables_args(order=[('lastName', 'desc')]))
+    assert sort == [('lastName', DESCENDING), ('_id', ASCENDING)]
+
+    # Columns without a sort index are ignored, and so are unknown ones; the tiebreak
+    # alone keeps the order stable
+    _, _, sort, _, _ = backend.parse_datatables_request(datatables_args(order=[('gender', 'asc')]))
+    assert sort == [('_id', ASCENDING)]
+    args = datatables_args()
+    args['order[0][column]'] = '99'
+    _, _, sort, _, _ = backend.parse_datatables_request(args)
+    assert sort == [('_id', ASCENDING)]
+
+
+def test_search_uses_the_search_terms_index(backend):
+    _, query, _, _, _ = backend.parse_datatables_request(datatables_args(**{'search[value]': '  José Sil '}))
+
+    assert query == search.build_search_query(['jose', 'sil'])
+    assert backend.parse_datatables_request(datatables_args(**{'search[value]': '  '}))[1] == {}
+
+
+def test_records_filtered_counts_the_search_matches(backend, client):
+    insert_users(backend, [('Ana', 'Silva'), ('Anabel', 'Souza'), ('Bruno', 'Ana'), ('Carla', 'Dias')])
+
+    response = client.get('/api/users', query_string=datatables_args(
+        order=[('firstName', 'asc')], start='1', length='1', **{'search[value]': 'ANA'}
+    ))
+
+    body = response.get_json()
+    assert (body['recordsTotal'], body['recordsFiltered']) == (4, 3)
+    assert [user['firstName'] for user in body['data']] == ['Anabel']
+
+
+def test_records_filtered_stops_counting_at_the_limit(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'MAX_FILTERED_COUNT', 2)
+    insert_users(backend, [('Ana', 'Silva'), ('Anabel', 'Souza'), ('Bruno', 'Ana')])
+
+    body = client.get('/api/users', query_string=datatables_args(**{'search[value]': 'ana'})).get_json()
+
+    assert (body['recordsTotal'], body['recordsFiltered']) == (3, 2)
@@ -0,0 +1,80 @@
+from db_health import CircuitBreaker, DatabaseHealthMonitor
+
+
+def open_breaker(**kwargs):
+    breaker = CircuitBreaker(failure_threshold=2, **kwargs)
+    breaker.probe_failed()
+    breaker.probe_failed()
+    return breaker
+
+
+def test_breaker_opens_after_consecutive_failed_probes():
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.probe_failed()
+    breaker.probe_succeeded()
+    breaker.probe_failed()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() == (True, False)
+
+    breaker.probe_failed()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.allow_request() == (False, False)
+
+
+def test_half_open_breaker_lets_a_bounded_number_of_trials_through():
+    breaker = open_breaker(half_open_max_calls=2)
+    breaker.probe_succeeded()
+
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert [breaker.allow_request() for _ in range(3)] == [(True, True), (True, True), (False, False)]
+
+
+def test_trial_results_close_or_reopen_the_breaker():
+    breaker = open_breaker()
+    breaker.probe_succeeded()
+    breaker.allow_request()
+    breaker.record_trial_result(False)
+    assert breaker.state == CircuitBreaker.OPEN
+
+    breaker.probe_succeeded()
+    breaker.allow_request()
+    breaker.record_trial_result(True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.allow_request() == (True, False)
+
+
+def test_successful_probes_close_a_half_open_breaker_without_traffic():
+    breaker = open_breaker(close_after_probes=2)
+    breaker.probe_succeeded()
+    breaker.probe_succeeded()
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+
+    breaker.probe_succeeded()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_failed_probe_reopens_a_half_open_breaker():
+    breaker = open_breaker()
+    breaker.probe_succeeded()
+
+    breaker.probe_failed()
+
+    assert breaker.state == CircuitBreaker.OPEN
+
+
+def test_monitor_counts_a_raising_check_as_a_failed_probe():
+    breaker = CircuitBreaker(failure_threshold=1)
+
+    def check():
+        raise ConnectionError("no route to host")
+    monitor = DatabaseHealthMonitor(check, breaker)
+
+    assert monitor.check_now() is False
+    assert breaker.state == CircuitBreaker.OPEN
+    assert monitor.last_check is not None
+
+    monitor.check = lambda: True
+    assert monitor.check_now() is True
+    assert breaker.state == CircuitBreaker.HALF_OPEN
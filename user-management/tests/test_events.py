@@ -0,0 +1,28 @@
+import events
+
+
+def test_reconnecting_client_receives_what_it_missed():
+    hub = events.EventHub(buffer_size=10)
+    hub.publish('user', {'op': 'insert', 'id': '1'})
+    last_seen = f'{hub.epoch}-1'
+    hub.publish('user', {'op': 'update', 'id': '1'})
+    hub.publish('user', {'op': 'delete', 'id': '1'})
+
+    subscription = hub.subscribe(last_seen)
+    hub.close()
+    chunks = list(subscription.stream(keepalive=1))
+
+    assert [chunk.split('\n')[0] for chunk in chunks] == [f'id: {hub.epoch}-2', f'id: {hub.epoch}-3']
+    assert '"op":"update"' in chunks[0]
+
+
+def test_slow_client_is_reset_instead_of_queueing_without_bound():
+    hub = events.EventHub(buffer_size=10, subscriber_queue_size=2)
+    subscription = hub.subscribe()
+    for i in range(5):
+        hub.publish('user', {'n': i})
+    hub.close()
+
+    chunks = list(subscription.stream(keepalive=1))
+
+    assert [chunk.split('\n')[1] for chunk in chunks] == ['event: reset']
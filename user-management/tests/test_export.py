@@ -0,0 +1,25 @@
+import csv
+import io
+
+
+def test_csv_export_streams_every_user(backend, client):
+    backend.global_users_collection.insert_many([
+        {'firstName': f'First{i}', 'userName': f'user{i}', 'email': f'user{i}@example.com'} for i in range(3)
+    ])
+
+    response = client.get('/api/users/export', query_string={'format': 'csv'})
+
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.get_data(as_text=True))))
+    assert [row['username'] for row in rows] == ['user0', 'user1', 'user2']
+
+
+def test_failing_export_query_ends_the_download_instead_of_escaping(backend, client, monkeypatch):
+    def failing_aggregate(*args, **kwargs):
+        raise RuntimeError('server selection timed out')
+    monkeypatch.setattr(backend.global_users_collection, 'aggregate', failing_aggregate)
+
+    response = client.get('/api/users/export', query_string={'format': 'csv'})
+
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).splitlines() == [','.join(backend.USER_FIELD_MAP)]
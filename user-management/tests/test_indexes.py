@@ -0,0 +1,58 @@
+from pymongo.errors import DuplicateKeyError
+
+
+def index_names(backend):
+    return set(backend.global_users_collection.index_information())
+
+
+def test_sort_indexes_cover_the_sortable_columns_only(backend, monkeypatch):
+    monkeypatch.setattr(backend.search_terms_backfill, 'start', lambda collection: None)
+    collection = backend.global_users_collection
+    collection.create_index([('gender', 1), ('_id', 1)])
+    collection.create_index([('status', 1), ('_id', 1)])
+
+    backend.ensure_indexes(collection)
+
+    names = index_names(backend)
+    assert {f'{field}_1__id_1' for field in backend.USER_SORT_INDEX_FIELDS} <= names
+    assert {'userName_1', 'email_1', 'searchTerms_1'} <= names
+    assert not names & set(backend.OBSOLETE_USER_INDEXES)
+    assert backend.unique_indexes_ready
+
+
+def test_duplicate_key_message_names_the_conflicting_field(backend):
+    assert backend.duplicate_key_message({'keyPattern': {'email': 1}}) == 'Email already exists'
+    assert backend.duplicate_key_message({'keyValue': {'userName': 'ana'}}) == 'Username already exists'
+    assert backend.duplicate_key_message(None) == 'User already exists'
+
+
+def duplicate_key_error(field, value):
+    return DuplicateKeyError('E11000 duplicate key error', 11000,
+                             {'code': 11000, 'keyPattern': {field: 1}, 'keyValue': {field: value}})
+
+
+def test_create_conflict_is_a_409_with_the_field_message(backend, client, monkeypatch):
+    monkeypatch.setattr(backend, 'unique_indexes_ready', True)
+
+    def insert_one(document):
+        raise duplicate_key_error('email', document['email'])
+    monkeypatch.setattr(backend.global_users_collection, 'insert_one', insert_one)
+
+    response = client.post('/api/users', json={'firstName': 'Ana', 'lastName': 'Silva',
+                                                'username': 'ana', 'email': 'ana@example.com'})
+
+    assert response.status_code == 409
+    assert response.get_json()['error'] == 'Email already exists'
+
+
+def test_update_conflict_is_a_409_with_the_field_message(backend, client, monkeypatch):
+    user_id = backend.global_users_collection.insert_one({'firstName': 'Ana', 'userName': 'ana'}).inserted_id
+
+    def find_one_and_update(*args, **kwargs):
+        raise duplicate_key_error('userName', 'bia')
+    monkeypatch.setattr(backend.global_users_collection, 'find_one_and_update', find_one_and_update)
+
+    response = client.put(f'/api/users/{user_id}', json={'status': 'inactive'})
+
+    assert response.status_code == 409
+    assert response.get_json()['error'] == 'Username already exists'
@@ -0,0 +1,103 @@
+from datetime import datetime
+
+
+def insert_users(backend, count, start=0):
+    backend.global_users_collection.insert_many([
+        {'firstName': f'First{i}', 'lastName': f'Last{i}', 'userName': f'user{i}',
+         'email': f'user{i}@example.com', 'updatedAt': datetime(2024, 1, 1, 0, i)}
+        for i in range(start, start + count)
+    ])
+
+
+def datatables_args(draw, cache_buster):
+    return {'draw': draw, 'start': 0, 'length': 10, '_': cache_buster}
+
+
+def test_draw_and_cache_buster_do_not_change_the_etag(backend, client):
+    insert_users(backend, 3)
+
+    first = client.get('/api/users', query_string=datatables_args(1, 1700000000001))
+    second = client.get('/api/users', query_string=datatables_args(2, 1700000000002),
+                        headers={'If-None-Match': first.headers['ETag']})
+
+    assert first.status_code == 200
+    assert second.status_code == 304
+    assert second.headers['ETag'] == first.headers['ETag']
+
+
+def test_response_echoes_the_draw_of_the_request(backend, client):
+    insert_users(backend, 3)
+
+    client.get('/api/users', query_string=datatables_args(1, 1))
+    cached = client.get('/api/users', query_string=datatables_args(7, 2))
+
+    assert cached.status_code == 200
+    assert cached.get_json()['draw'] == 7
+
+
+def test_cached_page_keeps_the_etag_of_the_version_it_was_built_from(backend, client):
+    insert_users(backend, 3)
+    first = client.get('/api/users', query_string=datatables_args(1, 1))
+
+    # A write the process does not see (another process, no change stream running)
+    insert_users(backend, 1, start=3)
+    cached = client.get('/api/users', query_string=datatables_args(2, 2))
+
+    assert cached.get_json()['recordsTotal'] == 3
+    assert cached.headers['ETag'] == first.headers['ETag']
+
+    # Once the cached page is gone, the new version brings a new ETag and the new body
+    backend.invalidate_user_caches()
+    reloaded = client.get('/api/users', query_string=datatables_args(3, 3),
+                          headers={'If-None-Match': first.headers['ETag']})
+
+    assert reloaded.status_code == 200
+    assert reloaded.get_json()['recordsTotal'] == 4
+    assert reloaded.headers['ETag'] != first.headers['ETag']
+
+
+def test_other_query_parameters_still_change_the_etag(backend, client):
+    insert_users(backend, 12)
+
+    first_page = client.get('/api/users', query_string={'draw': 1, 'start': 0, 'length': 10})
+    second_page = client.get('/api/users', query_string={'draw': 1, 'start': 10, 'length': 10},
+                             headers={'If-None-Match': first_page.headers['ETag']})
+
+    assert second_page.status_code == 200
+    assert second_page.headers['ETag'] != first_page.headers['ETag']
+
+
+
+def test_every_worker_computes_the_same_validators(backend, client, monkeypatch):
+    monkeypatch.setattr(backend.user_change_watcher, 'active', True)
+    insert_users(backend, 3)
+    first = client.get('/api/users', query_string=datatables_args(1, 1))
+
+    # Another worker: forked, reconnected, with nothing cached
+    client_, collection = backend.global_mongo_client, backend.global_users_collection
+    backend.reinitialize_after_fork()
+    monkeypatch.setattr(backend, 'global_mongo_client', client_)
+    monkeypatch.setattr(backend, 'global_users_collection', collection)
+    monkeypatch.setattr(backend, 'db_connection_successful', True)
+    backend.invalidate_user_caches()
+    second = client.get('/api/users', query_string=datatables_args(2, 2),
+                        headers={'If-None-Match': first.headers['ETag']})
+
+    unconditional = client.get('/api/users', query_string=datatables_args(3, 3))
+
+    assert second.status_code == 304
+    assert unconditional.headers['ETag'] == first.headers['ETag']
+    assert unconditional.headers['Last-Modified'] == first.headers['Last-Modified']
+
+
+def test_change_event_moves_the_version_on(backend, monkeypatch):
+    monkeypatch.setattr(backend.user_change_watcher, 'active', True)
+    insert_users(backend, 3)
+    version, _ = backend.users_collection_version()
+    insert_users(backend, 1, start=3)
+    # Kept until the change stream reports the write
+    assert backend.users_collection_version()[0] == version
+
+    backend.handle_user_change({'operationType': 'insert', 'documentKey': {'_id': 1}})
+
+    assert backend.users_collection_version()[0] != version
@@ -0,0 +1,133 @@
+import itertools
+from datetime import datetime
+
+import mongomock
+
+import search
+
+
+def insert_user(backend, **fields):
+    user = {'firstName': 'Ana', 'lastName': 'Silva', 'userName': 'ana', 'email': 'ana@example.com',
+            'phoneNumber': '555 0100', 'updatedAt': datetime(2024, 1, 1), **fields}
+    user[search.SEARCH_TERMS_FIELD] = search.search_terms(user)
+    return backend.global_users_collection.insert_one(user).inserted_id
+
+
+def test_update_writes_search_terms_in_the_same_set(backend, client, monkeypatch):
+    user_id = insert_user(backend)
+    collection = backend.global_users_collection
+    extra_writes = []
+    monkeypatch.setattr(collection, 'update_one', lambda *args, **kwargs: extra_writes.append(args))
+
+    response = client.put(f'/api/users/{user_id}', json={'firstName': 'José'})
+
+    assert response.status_code == 200
+    stored = collection.find_one({'_id': user_id})
+    assert stored[search.SEARCH_TERMS_FIELD] == search.search_terms(stored)
+    assert 'jose' in stored[search.SEARCH_TERMS_FIELD]
+    assert 'silva' in stored[search.SEARCH_TERMS_FIELD]
+    assert extra_writes == []
+
+
+def test_update_of_other_fields_leaves_search_terms_alone(backend, client):
+    user_id = insert_user(backend)
+    before = backend.global_users_collection.find_one({'_id': user_id})[search.SEARCH_TERMS_FIELD]
+
+    response = client.put(f'/api/users/{user_id}', json={'status': 'inactive'})
+
+    assert response.status_code == 200
+    assert backend.global_users_collection.find_one({'_id': user_id})[search.SEARCH_TERMS_FIELD] == before
+
+
+def test_update_losing_to_concurrent_name_changes_is_a_conflict(backend, client, monkeypatch):
+    user_id = insert_user(backend)
+    collection = backend.global_users_collection
+    find_one = collection.find_one
+    renames = itertools.count()
+
+    def find_then_rename(*args, **kwargs):
+        # Another request renames the user between our read and our write, every time
+        user = find_one(*args, **kwargs)
+        collection.update_many({'_id': user_id}, {'$set': {'lastName': f'Name {next(renames)}'}})
+        return user
+    monkeypatch.setattr(collection, 'find_one', find_then_rename)
+
+    response = client.put(f'/api/users/{user_id}', json={'firstName': 'Bia'})
+
+    assert response.status_code == 409
+    assert find_one({'_id': user_id})['firstName'] == 'Ana'
+
+
+def test_search_terms_only_changes_are_not_published(backend, monkeypatch):
+    published = []
+    monkeypatch.setattr(backend.user_events, 'publish', lambda *args: published.append(args))
+    generation = backend.user_list_cache.generation
+    change = {
+        'operationType': 'update',
+        'documentKey': {'_id': 1},
+        'updateDescription': {'updatedFields': {search.SEARCH_TERMS_FIELD: ['ana']}, 'removedFields': []},
+        'fullDocument': {'_id': 1, 'firstName': 'Ana'},
+    }
+
+    backend.handle_user_change(change)
+    assert published == []
+    assert backend.user_list_cache.generation == generation
+
+    change['updateDescription']['updatedFields']['firstName'] = 'Ana'
+    backend.handle_user_change(change)
+    assert [args[0] for args in published] == ['user']
+    assert backend.user_list_cache.generation == generation + 1
+
+
+def test_backfill_pauses_between_batches(monkeypatch):
+    collection = mongomock.MongoClient().CruiseDB.users
+    collection.insert_many([{'firstName': f'User {i}'} for i in range(5)])
+    pauses = []
+    monkeypatch.setattr(search.time, 'sleep', pauses.append)
+
+    search.SearchTermsBackfill(batch_size=2, pause_seconds=0.25)._run(collection)
+
+    assert pauses == [0.25, 0.25]
+    assert collection.count_documents({search.SEARCH_TERMS_FIELD: {'$exists': False}}) == 0
+
+
+def test_only_one_process_holds_the_backfill_lock(monkeypatch):
+    locks = mongomock.MongoClient().CruiseDB.maintenanceLocks
+    backfill = search.SearchTermsBackfill(lease_seconds=60)
+
+    assert backfill.acquire(locks, 'worker-1')
+    assert not backfill.acquire(locks, 'worker-2')
+    # The holder renews its own lease
+    assert backfill.acquire(locks, 'worker-1')
+
+    backfill.release(locks, 'worker-1')
+    assert backfill.acquire(locks, 'worker-2')
+
+
+def test_expired_backfill_lease_is_taken_over():
+    locks = mongomock.MongoClient().CruiseDB.maintenanceLocks
+    locks.insert_one({'_id': search.SearchTermsBackfill.LOCK_ID, 'owner': 'crashed', 'leaseUntil': datetime(2024, 1, 1)})
+
+    assert search.SearchTermsBackfill().acquire(locks, 'worker-1')
+    assert locks.find_one()['owner'] == 'worker-1'
+
+
+def test_leased_run_backfills_and_releases_the_lock():
+    collection = mongomock.MongoClient().CruiseDB.users
+    collection.insert_many([{'firstName': f'User {i}'} for i in range(3)])
+    backfill = search.SearchTermsBackfill()
+
+    backfill._run_when_leased(collection)
+
+    assert collection.count_documents({search.SEARCH_TERMS_FIELD: {'$exists': False}}) == 0
+    assert backfill.acquire(collection.database.maintenanceLocks, 'another-worker')
+
+
+def test_backfill_stops_when_it_loses_its_lease(monkeypatch):
+    collection = mongomock.MongoClient().CruiseDB.users
+    collection.insert_many([{'firstName': f'User {i}'} for i in range(5)])
+    monkeypatch.setattr(search.time, 'sleep', lambda seconds: None)
+
+    search.SearchTermsBackfill(batch_size=2)._run(collection, renew_lease=lambda: False)
+
+    assert collection.count_documents({search.SEARCH_TERMS_FIELD: {'$exists': False}}) == 3
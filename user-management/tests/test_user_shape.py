@@ -0,0 +1,92 @@
+"""
+user_shape_stage against format_user. mongomock has no $type, so the conftest swaps the
+dateOfBirth expression out; here the real stage is evaluated by a small interpreter of
+the aggregation operators it uses, with MongoDB's semantics for them.
+"""
+from datetime import datetime
+
+import pytest
+from bson.objectid import ObjectId
+
+import Backend
+
+MISSING = object()
+
+
+def bson_type(value):
+    if value is MISSING:
+        return 'missing'
+    if value is None:
+        return 'null'
+    if isinstance(value, datetime):
+        return 'date'
+    if isinstance(value, str):
+        return 'string'
+    raise AssertionError(f"unexpected value {value!r}")
+
+
+def evaluate(expression, document):
+    if isinstance(expression, str) and expression.startswith('$'):
+        return document.get(expression[1:], MISSING)
+    if not isinstance(expression, dict):
+        return expression
+    (operator, argument), = expression.items()
+    if operator == '$ifNull':
+        value = evaluate(argument[0], document)
+        return evaluate(argument[1], document) if value in (None, MISSING) else value
+    if operator == '$toString':
+        return str(evaluate(argument, document))
+    if operator == '$type':
+        return bson_type(evaluate(argument, document))
+    if operator == '$eq':
+        return evaluate(argument[0], document) == evaluate(argument[1], document)
+    if operator == '$switch':
+        for branch in argument['branches']:
+            if evaluate(branch['case'], document):
+                return evaluate(branch['then'], document)
+        return argument['default']
+    if operator == '$dateToString':
+        assert argument['format'] == '%Y-%m-%d'
+        return evaluate(argument['date'], document).strftime('%Y-%m-%d')
+    if operator == '$split':
+        return evaluate(argument[0], document).split(argument[1])
+    if operator == '$arrayElemAt':
+        return evaluate(argument[0], document)[argument[1]]
+    raise AssertionError(f"operator {operator} is not interpreted")
+
+
+def project(stage, document):
+    return {field: evaluate(expression, document)
+            for field, expression in stage['$project'].items() if expression != 0}
+
+
+@pytest.mark.parametrize('date_of_birth', [
+    datetime(1990, 5, 17, 13, 45),
+    '1990-05-17T00:00:00.000Z',
+    '1990-05-17',
+    None,
+    MISSING,
+])
+def test_stage_shapes_users_like_format_user(date_of_birth):
+    user = {'_id': ObjectId(), 'firstName': 'Ana', 'lastName': 'Silva', 'userName': 'ana',
+            'email': 'ana@example.com', 'phoneNumber': '555 0100', 'gender': 'female', 'status': 'inactive'}
+    if date_of_birth is not MISSING:
+        user['dateOfBirth'] = date_of_birth
+
+    assert project(Backend.user_shape_stage(), user) == Backend.format_user(user)
+
+
+def test_stage_defaults_match_format_user_for_a_bare_document():
+    user = {'_id': ObjectId()}
+
+    shaped = project(Backend.user_shape_stage(), user)
+
+    assert shaped == Backend.format_user(user)
+    assert shaped['status'] == 'active'
+
+
+def test_kept_fields_are_passed_through_under_a_prefix():
+    stage = Backend.user_shape_stage(keep=('updatedAt',))
+
+    assert stage['$project']['_updatedAt'] == '$updatedAt'
+    assert stage['$project']['_id'] == 0
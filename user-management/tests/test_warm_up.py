@@ -0,0 +1,21 @@
+import threading
+
+
+def test_start_services_does_not_wait_for_the_warm_up(backend, monkeypatch):
+    counting = threading.Event()
+    release = threading.Event()
+
+    def slow_count(fresh=False):
+        counting.set()
+        release.wait(5)
+        return 0
+    monkeypatch.setattr(backend, 'init_db_connection', lambda max_retries: True)
+    monkeypatch.setattr(backend, 'get_total_user_count', slow_count)
+    monkeypatch.setattr(backend.db_health_monitor, 'start', lambda: None)
+    monkeypatch.setattr(backend.user_change_watcher, 'start', lambda: None)
+
+    try:
+        assert backend.start_services() is True
+        assert counting.wait(5)
+    finally:
+        release.set()